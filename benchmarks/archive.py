@@ -0,0 +1,83 @@
+'''Reads against a hot database with closed years archived, vs one holding every year.
+
+Builds a ledger of --rows transactions over --years years, times the reads
+below, archives every closed year but the last (as repositories.archive
+does) and times them again:
+
+- current_month: read_current_month_transactions, which stays on the hot database
+- last_year: read_transactions_between over the year kept hot
+- oldest_year: the same over an archived year, fanning out to the archive
+- all_columns: read_transaction_columns over every year
+- search: search_transactions over every year
+
+Also reports the archival rate and the hot database's size before and after.
+
+    python -m benchmarks.archive --rows 1000000 --years 8
+'''
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.ledger import synthetic_ledger
+from benchmarks.suite import latency
+from src.repositories import SQLiteTransactionRepository
+from src.repositories.archive import archive, file_size
+
+
+def reads(repo: SQLiteTransactionRepository, calls: int) -> dict:
+    year = date.today().year
+    oldest = min(repo.read_transaction_columns()['date'])[:4]
+    return {
+        'current_month': latency(repo.read_current_month_transactions, calls),
+        'last_year': latency(lambda: repo.read_transactions_between(f'{year - 1}-01-01', f'{year - 1}-12-31'), calls),
+        'oldest_year': latency(lambda: repo.read_transactions_between(f'{oldest}-01-01', f'{oldest}-12-31'), calls),
+        'all_columns': latency(repo.read_transaction_columns, max(calls // 20, 3)),
+        'search': latency(lambda: repo.search_transactions('recurring', limit=50), calls)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--years', type=int, default=6)
+    parser.add_argument('--calls', type=int, default=100, help='calls per read')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ledger.db')
+        repo = SQLiteTransactionRepository(path)
+        ledger = synthetic_ledger(args.rows, years=args.years)
+        for category in ledger.categories:
+            repo.create_category(category)
+        repo.create_transactions(ledger.transactions)
+        repo.compact()
+        results = {'rows': args.rows, 'years': args.years, 'single_database': reads(repo, args.calls)}
+        repo.close()
+
+        before = file_size(path)
+        start = time.perf_counter()
+        moved = archive(path, keep_years=1, batch_size=args.batch_size, compact=False)
+        seconds = time.perf_counter() - start
+        repo = SQLiteTransactionRepository(path)
+        start = time.perf_counter()
+        repo.compact()
+        results['archival'] = {
+            'rows': sum(moved.values()),
+            'rows_per_second': round(sum(moved.values()) / seconds),
+            'compact_seconds': round(time.perf_counter() - start, 2),
+            'hot_mib_before': round(before / 2**20, 1),
+            'hot_mib_after': round(file_size(path) / 2**20, 1),
+            'archive_mib': round(file_size(repo.archive_path) / 2**20, 1)
+        }
+        results['archived'] = reads(repo, args.calls)
+        repo.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+'''Memory and throughput of reading the ledger as objects vs columns.
+
+Compares, over a synthetic transactions table (1M rows by default):
+
+- legacy: rows copied field by field into a __dict__ based class (the old
+  read_all_transactions), then fed to pandas through vars()
+- objects: read_all_transactions with slotted dataclasses and a row factory
+- columns: read_transaction_columns straight into a DataFrame
+
+    python -m benchmarks.domain_models --rows 1000000
+'''
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.repositories import SQLiteTransactionRepository
+
+CATEGORIES = ['Groceries', 'Gas', 'Dining', 'Utilities', 'Fun', 'Rent', 'Travel']
+
+
+class LegacyTransaction:
+    '''The pre-dataclass Transaction, kept here for comparison'''
+    def __init__(self, transaction_id, amount, date, description, category, notes):
+        self.transaction_id = transaction_id
+        self.amount = amount
+        self.date = date
+        self.description = description
+        self.category = category
+        self.notes = notes
+
+
+def build_table(repo: SQLiteTransactionRepository, rows: int) -> None:
+    with repo.pool.connection() as conn:
+        conn.executemany(
+            'INSERT INTO transactions (amount_cents, date, description, category, notes) VALUES (?, ?, ?, ?, ?)',
+            (
+                (-(i % 20000), f'20{10 + i % 15:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}',
+                 f'Purchase {i}', CATEGORIES[i % len(CATEGORIES)], None)
+                for i in range(rows)
+            )
+        )
+
+
+def measure(func) -> dict:
+    '''Returns wall time of one untraced run and peak allocation of a traced one'''
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'seconds': round(seconds, 3), 'peak_mib': round(peak / 2**20, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        repo = SQLiteTransactionRepository(os.path.join(directory, 'models.db'))
+        build_table(repo, args.rows)
+
+        def legacy_objects():
+            with repo.pool.connection() as conn:
+                rows = conn.execute(
+                    'SELECT id, amount_cents / 100.0, date, description, category, notes FROM transactions').fetchall()
+            return [LegacyTransaction(row[0], row[1], row[2], row[3], row[4], row[5]) for row in rows]
+
+        results = {
+            'rows': args.rows,
+            'legacy_objects': measure(legacy_objects),
+            'slotted_objects': measure(repo.read_all_transactions),
+            'columns': measure(repo.read_transaction_columns)
+        }
+
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+        if pd is not None:
+            results['legacy_dataframe'] = measure(lambda: pd.DataFrame([vars(t) for t in legacy_objects()]))
+            results['columns_dataframe'] = measure(lambda: pd.DataFrame(repo.read_transaction_columns()))
+
+        repo.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
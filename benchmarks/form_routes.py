@@ -0,0 +1,87 @@
+'''Latency of the HTML form routes and static files through FastAPI's TestClient.
+
+Runs the app against a scratch database holding --categories categories
+and reports p50/p99/mean milliseconds per route:
+
+- get_add_transaction / get_add_category: the form pages
+- post_add_transaction / post_update_transaction: a write, then the form again
+- static: the stylesheet as the pages link it, and revalidating it with If-None-Match
+
+    python -m benchmarks.form_routes --requests 500
+'''
+import argparse
+import io
+import json
+import os
+import re
+import tempfile
+from contextlib import redirect_stdout
+
+from benchmarks.suite import SRC, latency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--categories', type=int, default=25)
+    parser.add_argument('--requests', type=int, default=500, help='HTTP requests per route')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        # app.py resolves templates/ and static/ against the working directory
+        for name in ('static', 'templates'):
+            os.symlink(os.path.join(SRC, name), os.path.join(cwd, name))
+        os.chdir(cwd)
+        os.environ['PYTRANSACTIONS_DB'] = os.path.join(cwd, 'transactions.db')
+
+        from benchmarks.ledger import synthetic_categories
+        from src.repositories import SQLiteTransactionRepository
+
+        repo = SQLiteTransactionRepository(os.environ['PYTRANSACTIONS_DB'])
+        for category in synthetic_categories(args.categories):
+            repo.create_category(category)
+        repo.close()
+
+        from fastapi.testclient import TestClient
+
+        from src.app import app
+
+        transaction = {
+            'amount': -12.5, 'date': '2026-01-15', 'description': 'Benchmark',
+            'category': 'Groceries', 'notes': 'benchmark'
+        }
+        # The application reports every write on stdout; keep the output to the JSON
+        with TestClient(app) as client, redirect_stdout(io.StringIO()):
+            client.post('/add-transaction', data=transaction).raise_for_status()
+            # The stylesheet URL as the pages link it (content-hashed once they do)
+            page = client.get('/add-transaction').text
+            css_url = re.search(r'href="(/static/style\.css[^"]*)"', page).group(1)
+            css = client.get(css_url)
+            etag = css.headers.get('etag')
+
+            def get(url, **kwargs):
+                return lambda: client.get(url, **kwargs).raise_for_status()
+
+            def post(url, data):
+                return lambda: client.post(url, data=data).raise_for_status()
+
+            results = {
+                'categories': args.categories,
+                'routes': {
+                    'get_add_transaction': latency(get('/add-transaction'), args.requests),
+                    'get_add_category': latency(get('/add-category'), args.requests),
+                    'post_add_transaction': latency(post('/add-transaction', transaction), args.requests),
+                    'post_update_transaction': latency(
+                        post('/update-transaction', {**transaction, 'transaction_id': 1}), args.requests),
+                    'static': latency(get(css_url), args.requests),
+                    'static_revalidate': latency(
+                        lambda: client.get(css_url, headers={'if-none-match': etag}), args.requests)
+                },
+                'static_url': css_url,
+                'static_cache_control': css.headers.get('cache-control')
+            }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+'''Import time budget check for the app, application and repository packages.
+
+Runs each import in a fresh interpreter under ``python -X importtime`` and
+fails (exit code 1) when its cumulative import time exceeds the budget or
+when it pulls in a module that must stay lazy (pandas, altair).
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget src.app=400 --repeat 5
+'''
+import argparse
+import json
+import os
+import subprocess  # nosec B404
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+
+# Cumulative import time budgets in milliseconds
+BUDGETS = {
+    'src.repositories': 150,
+    'src.application': 200,
+    'src.app': 1000
+}
+
+FORBIDDEN = ('pandas', 'altair')
+
+
+def measure(module: str, cwd: str) -> dict:
+    '''Imports module in a fresh interpreter and returns its cumulative time'''
+    code = (
+        'import json, sys\n'
+        f'import {module}\n'
+        f'print(json.dumps([m for m in {FORBIDDEN!r} if m in sys.modules]))\n'
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(  # nosec B603
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        # "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith('import time:'):
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        if parts[2] == module:
+            cumulative_us = int(parts[1])
+
+    return {
+        'milliseconds': (cumulative_us or 0) / 1000,
+        'forbidden_imports': json.loads(result.stdout.strip().splitlines()[-1])
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='runs per module; the best is kept')
+    parser.add_argument(
+        '--budget', action='append', default=[], metavar='MODULE=MS',
+        help='override a budget, e.g. src.app=400')
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    for override in args.budget:
+        module, milliseconds = override.split('=')
+        budgets[module] = float(milliseconds)
+
+    # app.py mounts ./static and opens ./transactions.db, so import it from a scratch directory
+    with tempfile.TemporaryDirectory() as cwd:
+        for name in ('static', 'templates'):
+            os.symlink(os.path.join(SRC, name), os.path.join(cwd, name))
+
+        results = {}
+        failed = False
+        for module, budget in budgets.items():
+            runs = [measure(module, cwd) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run['milliseconds'])
+            ok = best['milliseconds'] <= budget and not best['forbidden_imports']
+            failed = failed or not ok
+            results[module] = {**best, 'budget_milliseconds': budget, 'ok': ok}
+
+    print(json.dumps(results, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
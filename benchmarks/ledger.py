@@ -0,0 +1,77 @@
+'''Synthetic ledger generator shared by the benchmarks.
+
+Produces categories, recurring expense rules and a stream of transactions
+spread over the last ``years`` years: every occurrence of the recurring
+rules (rent, subscriptions, paychecks...) plus random day-to-day purchases
+up to the requested row count.
+'''
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from src.application.recurring_schedule import expand
+from src.domain import Category, RecurringExpense, Transaction
+
+BASE_CATEGORIES = [
+    'Groceries', 'Gas', 'Dining', 'Utilities', 'Fun', 'Rent', 'Travel',
+    'Insurance', 'Health', 'Subscriptions', 'Gifts', 'Income'
+]
+FREQUENCIES = ['Weekly', 'Bi-Weekly', 'Monthly', 'Monthly', 'Monthly', 'Quarterly', 'Yearly']
+
+
+@dataclass
+class Ledger:
+    '''A synthetic ledger; transactions is a one-shot iterator'''
+    categories: list[Category]
+    recurring_expenses: list[RecurringExpense]
+    transactions: Iterator[Transaction] = field(repr=False)
+    start: date
+    end: date
+
+
+def synthetic_categories(count: int) -> list[Category]:
+    names = BASE_CATEGORIES[:count] + [f'Category {i}' for i in range(len(BASE_CATEGORIES), count)]
+    return [Category(None, name, 100.0 * (i % 10 + 1), None) for i, name in enumerate(names)]
+
+
+def synthetic_ledger(
+    rows: int, years: int = 3, categories: int = 12, recurring_rules: int = 10,
+    seed: int = 0, end: date | None = None
+) -> Ledger:
+    '''Builds a ledger of exactly ``rows`` transactions ending at ``end`` (default today)'''
+    # Synthetic data only, so a seeded non-cryptographic generator is what we want
+    rng = random.Random(seed)  # nosec B311
+    end = end or date.today()
+    start = end - timedelta(days=365 * years)
+    days = (end - start).days
+
+    category_list = synthetic_categories(categories)
+    names = [c.description for c in category_list]
+
+    rules = [
+        RecurringExpense(
+            None, round(rng.uniform(5, 1500), 2), rng.choice(FREQUENCIES), rng.choice(names),
+            f'Recurring {i}', None, (start + timedelta(days=rng.randrange(28))).isoformat()
+        )
+        for i in range(recurring_rules)
+    ]
+
+    def transactions() -> Iterator[Transaction]:
+        produced = 0
+        for rule in rules:
+            amount = rule.amount if rule.category == 'Income' else -rule.amount
+            for day in expand(rule.created_at, rule.frequency, start, end):
+                if produced == rows:
+                    return
+                yield Transaction(None, amount, str(day), rule.description, rule.category, 'recurring')
+                produced += 1
+
+        for i in range(produced, rows):
+            yield Transaction(
+                None, -round(rng.uniform(1, 200), 2),
+                (start + timedelta(days=rng.randint(0, days))).isoformat(),
+                f'Purchase {i}', rng.choice(names), None
+            )
+
+    return Ledger(category_list, rules, transactions(), start, end)
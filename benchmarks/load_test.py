@@ -0,0 +1,115 @@
+'''Concurrent request throughput of blocking vs async repository access.
+
+Simulates the dashboard handlers (current month listing + category summary)
+as coroutines and runs them concurrently on one event loop, first calling
+SQLiteTransactionRepository directly (the old handlers) and then awaiting
+AsyncSQLiteTransactionRepository. Also reports the worst event loop stall
+observed by a ticker task, which is what other users feel.
+
+    python -m benchmarks.load_test --requests 500 --concurrency 32
+'''
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from src.domain import Category, Transaction
+from src.repositories import (
+    AsyncSQLiteTransactionRepository,
+    SQLiteTransactionRepository,
+)
+
+CATEGORIES = ['Groceries', 'Gas', 'Dining', 'Utilities', 'Fun']
+
+
+def seed(repo: SQLiteTransactionRepository, rows: int, seed: int = 0) -> None:
+    # Synthetic data only, so a seeded non-cryptographic generator is what we want
+    rng = random.Random(seed)  # nosec B311
+    for category in CATEGORIES:
+        repo.create_category(Category(None, category, 500.0, None))
+
+    today = date.today()
+    repo.create_transactions(
+        Transaction(
+            None, -round(rng.uniform(1, 200), 2),
+            (today - timedelta(days=rng.randint(0, 365))).isoformat(),
+            f'Purchase {i}', rng.choice(CATEGORIES), None
+        )
+        for i in range(rows)
+    )
+
+
+async def _ticker(stop: asyncio.Event, interval: float = 0.001) -> float:
+    '''Returns the longest the event loop went without running this task'''
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - start - interval)
+    return worst
+
+
+async def _run(handler, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            await handler()
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(requests)))
+    seconds = time.perf_counter() - start
+
+    stop.set()
+    worst_stall = await ticker
+    return {
+        'requests_per_second': requests / seconds,
+        'seconds': seconds,
+        'max_event_loop_stall_ms': worst_stall * 1000
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'load_test.db')
+        repo = SQLiteTransactionRepository(db_path)
+        seed(repo, args.rows)
+        async_repo = AsyncSQLiteTransactionRepository(repo)
+
+        async def blocking_handler():
+            repo.read_current_month_transactions()
+            repo.read_category_month_summary()
+
+        async def async_handler():
+            await async_repo.read_current_month_transactions()
+            await async_repo.read_category_month_summary()
+
+        results = {
+            'rows': args.rows,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'blocking': asyncio.run(_run(blocking_handler, args.requests, args.concurrency)),
+            'async': asyncio.run(_run(async_handler, args.requests, args.concurrency))
+        }
+        async_repo.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+'''Lookup and range-query latency: SQLite vs the in-memory repository.
+
+Builds one synthetic ledger (100k rows by default) in SQLite, then loads it
+into a plain TransactionRepository and a CachedTransactionRepository and
+times the same queries against all three:
+
+- by_id: read_transaction_by_id for random ids
+- week / month: read_transactions_between over 7 and 31 day windows
+- category: read_transactions_by_category
+
+    python -m benchmarks.repository_lookup --rows 100000 --queries 2000
+'''
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from src.domain.transaction import Transaction
+from src.repositories import (
+    CachedTransactionRepository,
+    SQLiteTransactionRepository,
+    TransactionRepository,
+)
+
+CATEGORIES = ['Groceries', 'Gas', 'Dining', 'Utilities', 'Fun', 'Rent', 'Travel']
+FIRST_DAY = date(2015, 1, 1)
+DAYS = 3650
+
+
+def synthetic_ledger(rows: int):
+    for i in range(rows):
+        yield Transaction(
+            None, -(i % 20000) / 100, (FIRST_DAY + timedelta(days=i % DAYS)).isoformat(),
+            f'Purchase {i}', CATEGORIES[i % len(CATEGORIES)], None
+        )
+
+
+def latency(func, args_list) -> dict:
+    '''Per-call latency percentiles in microseconds'''
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        'p50_us': round(statistics.median(samples), 1),
+        'p99_us': round(samples[int(len(samples) * 0.99) - 1], 1),
+        'mean_us': round(statistics.fmean(samples), 1)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Synthetic benchmark data, not security sensitive
+    rng = random.Random(args.seed)  # nosec B311
+    ids = [(rng.randint(1, args.rows),) for _ in range(args.queries)]
+    starts = [FIRST_DAY + timedelta(days=rng.randrange(DAYS - 31)) for _ in range(args.queries)]
+    weeks = [(s, s + timedelta(days=6)) for s in starts]
+    months = [(s, s + timedelta(days=30)) for s in starts]
+    categories = [(rng.choice(CATEGORIES),) for _ in range(max(args.queries // 20, 10))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_repo = SQLiteTransactionRepository(os.path.join(directory, 'lookup.db'))
+        sqlite_repo.create_transactions(synthetic_ledger(args.rows), chunk_size=10000)
+
+        memory_repo = TransactionRepository()
+        start = time.perf_counter()
+        memory_repo.create_transactions(synthetic_ledger(args.rows), chunk_size=10000)
+        memory_load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached_repo = CachedTransactionRepository(SQLiteTransactionRepository(os.path.join(directory, 'lookup.db')))
+        cached_warm = time.perf_counter() - start
+
+        results = {'rows': args.rows, 'queries': args.queries,
+                   'memory_load_seconds': round(memory_load, 3),
+                   'cached_warm_seconds': round(cached_warm, 3)}
+        for name, repo in (('sqlite', sqlite_repo), ('memory', memory_repo), ('cached', cached_repo)):
+            results[name] = {
+                'by_id': latency(repo.read_transaction_by_id, ids),
+                'week': latency(repo.read_transactions_between, weeks),
+                'month': latency(repo.read_transactions_between, months),
+                'category': latency(repo.read_transactions_by_category, categories)
+            }
+
+        cached_repo.close()
+        sqlite_repo.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
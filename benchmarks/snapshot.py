@@ -0,0 +1,82 @@
+'''Parquet/Arrow snapshot export and reload vs building Transaction objects.
+
+Loads a synthetic ledger (1M rows by default), then for each format times a
+full export, an incremental export after --changes updates and as many
+inserts, and memory-mapped reloads of the whole snapshot and of one month.
+read_all_transactions is timed for comparison, and each reload is checked
+against the database (row count and sum of cents).
+
+    python -m benchmarks.snapshot --rows 1000000
+'''
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.ledger import synthetic_ledger
+from src.repositories import SQLiteTransactionRepository
+from src.repositories.snapshot import export_snapshot, load_snapshot
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, round(time.perf_counter() - start, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--changes', type=int, default=1000, help='updates and inserts before the incremental export')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SQLiteTransactionRepository(os.path.join(tmp, 'ledger.db'))
+        ledger = synthetic_ledger(args.rows)
+        for category in ledger.categories:
+            repo.create_category(category)
+        repo.create_transactions(ledger.transactions)
+        _, objects_seconds = timed(repo.read_all_transactions)
+
+        results = {'rows': args.rows, 'read_all_transactions_seconds': objects_seconds, 'formats': []}
+        for i, file_format in enumerate(('parquet', 'arrow')):
+            directory = os.path.join(tmp, file_format)
+            full = export_snapshot(repo, directory, file_format)
+
+            # Update --changes earlier rows and insert a copy of each, as a day of corrections would
+            after_id = args.rows // 2 + i * args.changes
+            for transaction in repo.read_transactions_page(args.changes, after_id):
+                transaction.amount -= 1
+                repo.update_transaction(transaction)
+                transaction.transaction_id = None
+                repo.create_transaction(transaction)
+            incremental = export_snapshot(repo, directory)
+
+            frame, load_seconds = timed(lambda d=directory: load_snapshot(d))
+            month = ledger.end.strftime('%Y-%m')
+            month_frame, month_seconds = timed(
+                lambda d=directory, m=month: load_snapshot(d, f'{m}-01', ledger.end))
+            with repo.pool.connection() as conn:
+                expected = conn.execute('SELECT count(*), sum(amount_cents) FROM transactions').fetchone()
+
+            results['formats'].append({
+                'format': file_format,
+                'full_export_seconds': full['seconds'],
+                'incremental_export_seconds': incremental['seconds'],
+                'incremental_rows': incremental['transactions'],
+                'load_seconds': load_seconds,
+                'load_month_seconds': month_seconds,
+                'month_rows': len(month_frame),
+                'snapshot_mib': round(sum(
+                    os.path.getsize(os.path.join(root, name))
+                    for root, _, names in os.walk(directory) for name in names) / 2**20, 1),
+                'matches_database': (len(frame), int(frame['amount_cents'].sum())) == tuple(expected)
+            })
+        repo.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+'''Repository and dashboard benchmarks at several ledger sizes.
+
+For each size (10k, 100k and 1M rows by default) a fresh interpreter builds a
+synthetic ledger in a scratch directory and measures:
+
+- insert: create_transactions throughput in rows/s
+- by_id: read_transaction_by_id latency for random ids
+- last_seven_days / current_month: dashboard query latency
+- routes: /get-current-month and /add-category through FastAPI's TestClient;
+  the first current-month request renders the chart, later ones hit the cache
+
+Latencies are reported as p50/p99/mean milliseconds and everything is printed
+as one JSON document, so two runs can be diffed.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --sizes 10000 100000 --queries 500 > after.json
+'''
+import argparse
+import json
+import os
+import subprocess  # nosec B404
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+
+
+def latency(func, calls: int) -> dict:
+    '''Calls func() repeatedly and returns latency percentiles in milliseconds'''
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'p50_ms': round(samples[len(samples) // 2], 3),
+        'p99_ms': round(samples[max(int(len(samples) * 0.99) - 1, 0)], 3),
+        'mean_ms': round(sum(samples) / len(samples), 3)
+    }
+
+
+def run_size(args) -> dict:
+    '''Benchmarks one ledger size; runs inside the scratch directory'''
+    import random
+
+    from benchmarks.ledger import synthetic_ledger
+    from src.repositories import SQLiteTransactionRepository
+
+    ledger = synthetic_ledger(
+        args.rows, years=args.years, categories=args.categories,
+        recurring_rules=args.recurring_rules, seed=args.seed
+    )
+    # app.py opens ./transactions.db, so build the ledger there
+    repo = SQLiteTransactionRepository('transactions.db')
+    for category in ledger.categories:
+        repo.create_category(category)
+    for rule in ledger.recurring_expenses:
+        repo.create_recurring_expense(rule)
+
+    start = time.perf_counter()
+    inserted = repo.create_transactions(ledger.transactions, chunk_size=args.chunk_size)
+    seconds = time.perf_counter() - start
+
+    # Synthetic lookups only, not security sensitive
+    rng = random.Random(args.seed)  # nosec B311
+    results = {
+        'rows': inserted,
+        'insert': {'seconds': round(seconds, 3), 'rows_per_second': round(inserted / seconds)},
+        'by_id': latency(lambda: repo.read_transaction_by_id(rng.randint(1, inserted)), args.queries),
+        'last_seven_days': latency(repo.read_last_seven_days, args.queries),
+        'current_month': latency(repo.read_current_month_transactions, args.queries)
+    }
+    repo.close()
+
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        results['routes'] = {'skipped': str(e)}
+        return results
+
+    from src.app import app
+
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        client.get('/get-current-month').raise_for_status()
+        first = (time.perf_counter() - start) * 1000
+
+        results['routes'] = {
+            'get_current_month_first_ms': round(first, 3),
+            'get_current_month': latency(
+                lambda: client.get('/get-current-month').raise_for_status(), args.requests),
+            'add_category': latency(
+                lambda: client.post(
+                    '/add-category',
+                    data={'monthly_allocation': 50, 'description': 'Benchmark', 'notes': 'benchmark'}
+                ).raise_for_status(),
+                args.requests
+            )
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--categories', type=int, default=12)
+    parser.add_argument('--recurring-rules', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=1000, help='repository calls per measurement')
+    parser.add_argument('--requests', type=int, default=50, help='HTTP requests per route')
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.rows is not None:
+        # Worker mode: one size, already inside its scratch directory
+        print(json.dumps(run_size(args)))
+        return
+
+    results = {
+        'python': sys.version.split()[0],
+        'years': args.years,
+        'categories': args.categories,
+        'recurring_rules': args.recurring_rules,
+        'sizes': []
+    }
+    for rows in args.sizes:
+        # A fresh interpreter and directory per size, so nothing is shared or cached between them
+        with tempfile.TemporaryDirectory() as cwd:
+            for name in ('static', 'templates'):
+                os.symlink(os.path.join(SRC, name), os.path.join(cwd, name))
+
+            worker = [
+                sys.executable, '-m', 'benchmarks.suite', '--rows', str(rows),
+                '--years', str(args.years), '--categories', str(args.categories),
+                '--recurring-rules', str(args.recurring_rules), '--queries', str(args.queries),
+                '--requests', str(args.requests), '--chunk-size', str(args.chunk_size),
+                '--seed', str(args.seed)
+            ]
+            output = subprocess.run(  # nosec B603
+                worker, cwd=cwd, env=dict(os.environ, PYTHONPATH=ROOT),
+                capture_output=True, text=True, check=True
+            ).stdout
+            results['sizes'].append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+'''Sustained single-row insert rate: synchronous commits vs write-behind.
+
+Calls create_transaction --rows times in a loop, as an ingestion script or a
+stream of /add-transaction requests would, and reports inserts per second
+including the final flush. Each mode runs with synchronous=FULL (an fsync per
+commit) and the default synchronous=NORMAL.
+
+    python -m benchmarks.write_behind --rows 20000
+'''
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from src.domain.transaction import Transaction
+from src.repositories import SQLiteTransactionRepository
+
+CATEGORIES = ['Groceries', 'Gas', 'Dining', 'Utilities', 'Fun']
+
+
+def run(rows: int, synchronous: str, write_behind: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SQLiteTransactionRepository(
+            os.path.join(tmp, 'ingest.db'), synchronous=synchronous, write_behind=write_behind)
+        transactions = [
+            Transaction(None, -float(i % 500), f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+                        f'Purchase {i}', CATEGORIES[i % len(CATEGORIES)], None)
+            for i in range(rows)
+        ]
+
+        start = time.perf_counter()
+        for transaction in transactions:
+            repo.create_transaction(transaction)
+        queued = time.perf_counter() - start
+        repo.flush()
+        seconds = time.perf_counter() - start
+
+        assigned = sum(t.transaction_id is not None for t in transactions)
+        count = repo.read_transaction_columns()['transaction_id']
+        repo.close()
+    return {
+        'synchronous': synchronous,
+        'write_behind': write_behind,
+        'seconds': round(seconds, 3),
+        'inserts_per_second': round(rows / seconds),
+        'caller_seconds': round(queued, 3),
+        'ids_assigned': assigned,
+        'rows_committed': len(count)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20_000)
+    args = parser.parse_args()
+
+    results = [
+        run(args.rows, synchronous, write_behind)
+        for synchronous in ('FULL', 'NORMAL')
+        for write_behind in (False, True)
+    ]
+    print(json.dumps({'rows': args.rows, 'runs': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
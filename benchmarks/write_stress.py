@@ -0,0 +1,128 @@
+'''Concurrent writers in several processes against one SQLite database.
+
+Starts --processes worker processes (as uvicorn would with --workers), each
+with --threads threads calling create_transaction --writes times, all at
+once. Every write carries a unique description, and afterwards the parent
+checks that none were lost or duplicated, that the daily and monthly rollups
+agree with the transactions table and that the shared data_version counted
+every write. Runs once with writers taking the lock themselves (BEGIN
+IMMEDIATE + busy retry) and once through the single-writer queue, and prints
+write throughput and any errors as JSON.
+
+    python -m benchmarks.write_stress --processes 4 --threads 8 --writes 250
+'''
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.domain.transaction import Transaction
+from src.repositories import create_repository
+
+
+def writer(db_path: str, process: int, args, start, results) -> None:
+    '''One worker process: --threads threads of --writes single-row inserts'''
+    repo = create_repository(db_path, write_queue=args.write_queue, pool_size=args.threads)
+    errors = []
+    lock = threading.Lock()
+
+    def write(thread: int) -> None:
+        for i in range(args.writes):
+            transaction = Transaction(
+                None, -1.0, f'2024-01-{i % 28 + 1:02d}', f'p{process}-t{thread}-w{i}', 'Stress', None)
+            try:
+                repo.create_transaction(transaction)
+            except sqlite3.Error as e:
+                with lock:
+                    errors.append(repr(e))
+
+    start.wait()
+    began = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(write, range(args.threads)))
+    seconds = time.perf_counter() - began
+
+    busy_retries = repo.pool_stats()['busy_retries']
+    repo.close()
+    results.put({'seconds': seconds, 'errors': errors, 'busy_retries': busy_retries})
+
+
+def verify(db_path: str, expected: int) -> dict:
+    '''Lost, duplicated and inconsistent writes found in the database'''
+    conn = sqlite3.connect(db_path)
+    try:
+        rows, distinct, total = conn.execute(
+            'SELECT count(*), count(DISTINCT description), sum(amount_cents) FROM transactions').fetchone()
+        daily = conn.execute('SELECT sum(total_cents), sum(transaction_count) FROM category_daily_totals').fetchone()
+        monthly = conn.execute('SELECT sum(total_cents) FROM category_monthly_totals').fetchone()[0]
+        version = conn.execute('SELECT version FROM data_version').fetchone()[0]
+    finally:
+        conn.close()
+    return {
+        'rows': rows,
+        'lost': expected - distinct,
+        'duplicated': rows - distinct,
+        'rollups_consistent': daily == (total, rows) and monthly == total,
+        'data_version_consistent': version == rows
+    }
+
+
+def run(args) -> dict:
+    expected = args.processes * args.threads * args.writes
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+        # Fresh interpreters, like separate server workers
+        context = multiprocessing.get_context('spawn')
+        start = context.Event()
+        results = context.Queue()
+        workers = [
+            context.Process(target=writer, args=(db_path, p, args, start, results))
+            for p in range(args.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        # Let every worker open the database and reach the start line first
+        time.sleep(args.warmup)
+
+        began = time.perf_counter()
+        start.set()
+        outcomes = [results.get() for _ in workers]
+        seconds = time.perf_counter() - began
+        for worker in workers:
+            worker.join()
+
+        errors = [e for outcome in outcomes for e in outcome['errors']]
+        return {
+            'write_queue': args.write_queue,
+            'writes': expected,
+            'seconds': round(seconds, 3),
+            'writes_per_second': round(expected / seconds),
+            'busy_retries': sum(outcome['busy_retries'] for outcome in outcomes),
+            'errors': len(errors),
+            'first_errors': sorted(set(errors))[:5],
+            **verify(db_path, expected)
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8, help='writer threads per process')
+    parser.add_argument('--writes', type=int, default=250, help='create_transaction calls per thread')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds for workers to start')
+    args = parser.parse_args()
+
+    results = []
+    for write_queue in (False, True):
+        args.write_queue = write_queue
+        results.append(run(args))
+    print(json.dumps({'processes': args.processes, 'threads': args.threads, 'runs': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,125 @@
-import altair as alt
-import pandas as pd
-
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-
-from .application import Application 
-from .repositories import SQLiteTransactionRepository
-
-app = FastAPI()
-
-# Initialize SQLite repository
-sqlite_repo = SQLiteTransactionRepository("transactions.db")
-
-# Create the application
-sql_app = Application(sqlite_repo)
-
-# Mount static files (CSS, JS, etc.)
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Set up templates
-templates = Jinja2Templates(directory="templates")
+import datetime
+import hashlib
+import io
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Annotated
+
+from fastapi import FastAPI, File, Form, Query, Request, UploadFile
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from .application import AsyncApplication
+from .chart_cache import ChartCache
+from .importers import detect_format
+from .instrumentation import MetricsMiddleware, metrics, render_gauge
+from .repositories import AsyncSQLiteTransactionRepository, create_repository
+from .templating import CachedStaticFiles, create_templates, precompile
+
+# Initialize SQLite repository (path and write settings from PYTRANSACTIONS_* variables);
+# queries run on its worker threads, off the event loop
+sqlite_repo = AsyncSQLiteTransactionRepository(create_repository())
+
+# Create the application; with PYTRANSACTIONS_SNAPSHOT set, the analytics read that snapshot directory
+sql_app = AsyncApplication(sqlite_repo, snapshot=os.environ.get('PYTRANSACTIONS_SNAPSHOT'))
+
+# Rendered dashboard views, keyed by view and repository data version
+chart_cache = ChartCache(maxsize=32)
+
+# Rendered static parts of the form pages, keyed by fragment and what they show
+fragment_cache = ChartCache(maxsize=16)
+
+# Part of every ETag, as data_version starts again from 0 when the process restarts
+BOOT_ID = str(time.time_ns())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile every template now rather than during the first request to use it
+    precompile(templates)
+    yield
+    # Release worker threads and pooled connections on shutdown
+    sqlite_repo.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Compress HTML and JSON responses worth compressing
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# Per-route latency; a pass-through unless metrics are enabled
+app.add_middleware(MetricsMiddleware)
+
+# Mount static files (CSS, JS, etc.); cached by browsers, for a year when linked through static_url()
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+
+# Set up templates, bytecode cached and not re-checked for edits on each render
+templates = create_templates("templates", "static")
+
+def render_chart(name: str, *args) -> str:
+    '''Calls a chart builder, importing the charting module (altair) on first use'''
+    from . import charts
+    return getattr(charts, name)(*args)
+
+async def chart_spec(name: str, data_url: str) -> str:
+    '''Vega-Lite spec reading its data from data_url; independent of the data, so built once per URL'''
+    key = ('chart-spec', name, data_url)
+    spec = chart_cache.get(key)
+
+    if spec is None:
+        # Build it off the event loop, the first one imports altair
+        spec = chart_cache.put(key, await run_in_threadpool(render_chart, name, data_url))
+
+    return spec
+
+def render_fragment(name: str, key: tuple = (), **context) -> str:
+    '''Renders templates/fragments/<name> once per key (which must cover the context) and reuses it'''
+    template = templates.get_template(f'fragments/{name}')
+    if templates.env.auto_reload:
+        # Templates are being edited; show every change
+        return template.render(context)
+    html = fragment_cache.get((name, *key))
+    if html is None:
+        html = fragment_cache.put((name, *key), template.render(context))
+    return html
+
+async def categories_view() -> dict:
+    '''Allocation chart of the categories, fetched by the browser from /api/categories, and the category forms'''
+    return {
+        'chart_json': await chart_spec('category_chart_json', '/api/categories'),
+        'forms': render_fragment('category_forms.html')
+    }
+
+async def transaction_form_view() -> dict:
+    '''The transaction forms, rendered again only when the categories in their dropdowns change'''
+    # Cached by the application until a category is written
+    categories = await sql_app.list_categories()
+    key = tuple(c.description for c in categories)
+    return {'forms': render_fragment('transaction_forms.html', key, categories=categories)}
+
+async def etag_for(request: Request) -> str:
+    '''Weak ETag for a GET: changes with every write, the URL and the day (for default date ranges)'''
+    token = f'{BOOT_ID}:{await sqlite_repo.data_version()}:{datetime.date.today()}:{request.url.path}?{request.url.query}'
+    return 'W/"' + hashlib.blake2s(token.encode(), digest_size=8).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    '''Weak If-None-Match comparison'''
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [candidate.strip().removeprefix('W/') for candidate in header.split(',')]
+    return '*' in candidates or etag.removeprefix('W/') in candidates
+
+async def api_response(request: Request, build) -> Response:
+    '''JSON from build() with an ETag; a 304 without calling build() when the client is current'''
+    # Taken before querying so a concurrent write can only make the ETag older than the body
+    etag = await etag_for(request)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(await build(), headers=headers)
 
 @app.get("/", response_class=HTMLResponse)
 async def read_home(request: Request):
@@ -29,123 +127,270 @@ async def read_home(request: Request):
 
 @app.get("/add-transaction", response_class=HTMLResponse)
 async def add_transaction_form(request: Request):
-    # Get current budget categories
-    categories = sql_app.list_categories()
-
     return templates.TemplateResponse(
         "transaction_form.html", 
         {
             "request": request,
-            'categories': categories
+            **await transaction_form_view()
         })
 
+def next_page_cursor(transactions, page_size: int) -> dict | None:
+    '''Keyset cursor for the page after transactions, or None on the last page'''
+    if len(transactions) < page_size:
+        return None
+    last = transactions[-1]
+    return {'before_date': last.date, 'before_id': last.transaction_id}
+
+@app.get('/transactions', response_class=HTMLResponse)
+async def list_transactions(
+    request: Request,
+    page_size: int = Query(50, ge=1, le=500),
+    before_date: datetime.date | None = None,
+    before_id: int | None = None
+    ):
+    transactions = await sql_app.list_recent_transactions_page(page_size, before_date, before_id)
+
+    return templates.TemplateResponse(
+        'transactions.html',
+        {
+            'request': request,
+            'transactions': transactions,
+            'page_size': page_size,
+            'next_page': next_page_cursor(transactions, page_size)
+        }
+    )
+
+@app.get('/api/transactions')
+async def api_list_transactions(
+    request: Request,
+    page_size: int = Query(50, ge=1, le=500),
+    before_date: datetime.date | None = None,
+    before_id: int | None = None
+    ):
+    async def build():
+        transactions = await sql_app.list_recent_transactions_page(page_size, before_date, before_id)
+        return {
+            'transactions': [asdict(t) for t in transactions],
+            'next': next_page_cursor(transactions, page_size)
+        }
+
+    return await api_response(request, build)
+
+@app.get('/api/search')
+async def api_search_transactions(
+    request: Request,
+    q: str,
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+    category: str | None = None,
+    limit: int = Query(50, ge=1, le=500)
+    ):
+    '''Transactions matching every word of q in the description, notes or category, best first'''
+    async def build():
+        transactions = await sql_app.search_transactions(q, start, end, category, limit)
+        return {'query': q, 'transactions': [asdict(t) for t in transactions]}
+
+    return await api_response(request, build)
+
+@app.get('/search', response_class=HTMLResponse)
+async def search_transactions(
+    request: Request,
+    q: str = '',
+    start: str | None = None,
+    end: str | None = None,
+    category: str | None = None,
+    limit: int = Query(50, ge=1, le=500)
+    ):
+    # The form submits empty strings for filters left blank
+    start, end, category = start or None, end or None, category or None
+    status = {}
+    try:
+        transactions = await sql_app.search_transactions(q, start, end, category, limit) if q.strip() else []
+    except ValueError as e:
+        transactions = []
+        status = {'status_statement': f'Failed to search transactions: {e}', 'status_color': 'red'}
+
+    return templates.TemplateResponse(
+        'search.html',
+        {
+            'request': request,
+            **status,
+            'q': q,
+            'start': start,
+            'end': end,
+            'category': category,
+            'categories': await sql_app.list_categories(),
+            'transactions': transactions
+        }
+    )
+
+@app.get('/api/categories')
+async def api_list_categories(request: Request):
+    async def build():
+        return {'categories': [asdict(c) for c in await sql_app.list_categories()]}
+
+    return await api_response(request, build)
+
+@app.get('/api/summary/month')
+async def api_month_summary(
+    request: Request,
+    month: str | None = Query(None, pattern=r'^\d{4}-\d{2}$'),
+    exclude: Annotated[list[str] | None, Query()] = None
+    ):
+    '''Spent vs allocation per category for a YYYY-MM month (default: this month).
+
+    Income and Investment are left out unless exclude is given; pass exclude= to keep everything.
+    '''
+    month = month or datetime.date.today().strftime('%Y-%m')
+
+    async def build():
+        return {'month': month, 'categories': await sql_app.summarise_month(month, exclude)}
+
+    return await api_response(request, build)
+
+@app.get('/api/summary/range')
+async def api_range_summary(
+    request: Request,
+    start: datetime.date,
+    end: datetime.date,
+    exclude: Annotated[list[str] | None, Query()] = None
+    ):
+    '''Spent, transaction count and allocation per category from start to end (inclusive)'''
+    async def build():
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'categories': await sql_app.summarise_between(start, end, exclude)
+        }
+
+    return await api_response(request, build)
+
+@app.get('/api/analytics')
+async def api_budget_forecast(request: Request, as_of: datetime.date | None = None):
+    '''Burn rate, rolling averages, month-end projection and year-over-year figures per category'''
+    as_of = as_of or datetime.date.today()
+
+    async def build():
+        return {'as_of': as_of.isoformat(), 'categories': await sql_app.forecast_budget(as_of)}
+
+    return await api_response(request, build)
+
+@app.get('/analytics', response_class=HTMLResponse)
+async def budget_forecast(request: Request, as_of: datetime.date | None = None):
+    as_of = as_of or datetime.date.today()
+
+    return templates.TemplateResponse(
+        'analytics.html',
+        {
+            'request': request,
+            'as_of': as_of.isoformat(),
+            'forecast': await sql_app.forecast_budget(as_of)
+        }
+    )
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics():
+    '''Prometheus scrape endpoint: latency histograms plus pool, chart cache and fragment cache gauges'''
+    return PlainTextResponse(
+        metrics.render()
+        + render_gauge('pytransactions_pool_connections', 'SQLite connection pool counters', 'state',
+                       sqlite_repo.repository.pool.stats())
+        + render_gauge('pytransactions_chart_cache', 'Rendered view cache counters', 'stat',
+                       chart_cache.stats())
+        + render_gauge('pytransactions_fragment_cache', 'Rendered form fragment cache counters', 'stat',
+                       fragment_cache.stats()),
+        media_type='text/plain; version=0.0.4'
+    )
+
 @app.get('/update-transaction', response_class=HTMLResponse)
 async def update_transaction_form(request: Request):
     return templates.TemplateResponse('transaction_update_form.html', {'request': request})
 
 @app.get('/add-category', response_class=HTMLResponse)
 async def add_category_form(request: Request):
-    # Get current category data 
-    categories = sql_app.list_categories()
-
-    # Build df
-    df = pd.DataFrame([vars(obj) for obj in categories])
-
-    # Chart it
-    chart = alt.Chart(df).mark_bar().encode(
-        y=alt.Y('description', title='Category'),
-        x=alt.X('monthly_allocation', title='Monthly Allocation')
-    ).properties(
-        title='Current Categories',
-        width=600
-    )
+    view = await categories_view()
 
     return templates.TemplateResponse(
         'category_form.html', 
         {
             'request': request,
-            'chart_json': chart.to_json(),
-            'categories': categories
+            **view
         })
 
 @app.get('/get-last-seven-days', response_class=HTMLResponse)
 async def get_last_seven_days(request: Request):
+    key = ('last-seven-days', await sqlite_repo.data_version(), datetime.date.today())
+    view = chart_cache.get(key)
 
-    # Use sql app to correct transaction
-    transactions = sql_app.list_last_seven_days()
+    if view is None:
+        # Use sql app to correct transaction
+        transactions = await sql_app.list_last_seven_days()
 
-    # Convert to dataframe
-    df = pd.DataFrame([vars(obj) for obj in transactions])
-
-    # Filter df to only purchases
-    df.amount = df.amount * -1
-    df = df.groupby('category').sum().reset_index()
-
-    # Build a chart
-    chart = alt.Chart(df).mark_bar().encode(
-        x=alt.X('category:N', title='Category'),
-        y=alt.Y('amount:Q', title='Amount'),
-    ).properties(
-        width=800
-    )
+        # The chart fetches its per-category totals from the summary API
+        today = datetime.date.today()
+        data_url = f'/api/summary/range?start={today - datetime.timedelta(days=7)}&end={today}'
+        chart_json = await chart_spec('last_seven_days_chart_json', data_url)
+        view = chart_cache.put(key, {'transactions': transactions, 'chart_json': chart_json})
 
     return templates.TemplateResponse(
         'transactions_last_seven.html', 
         {
             'request': request,
-            'transactions': transactions,
-            'chart_json': chart.to_json()
+            **view
         }
     )
 
 @app.get('/get-current-month', response_class=HTMLResponse)
 async def get_current_month(request: Request):
-    # Get this months transactions
-    transactions = sql_app.list_current_month()
-
-    # Convert to dataframe
-    transactions_df = pd.DataFrame([vars(obj) for obj in transactions])
-
-    # Filter df to only purchases
-    transactions_df.amount = transactions_df.amount * -1
-    transactions_df = transactions_df.groupby('category').sum().reset_index()
-    transactions_df['color'] = ['Spent'] * len(transactions_df)
-
-    # Merge with categories
-    categories = sql_app.list_categories()
-    categories_df = pd.DataFrame([vars(obj) for obj in categories])
-    categories_df['color'] = ['Allowance'] * len(categories_df)
-    df = transactions_df.merge(categories_df, left_on='category', right_on='description')
-    df = df[['category', 'amount', 'monthly_allocation']]
-
-    # Melt df
-    df = pd.melt(df, id_vars=['category'], value_vars=['amount', 'monthly_allocation'])
-
-    # Filter to only expenses
-    df = df[(df['category'] != 'Income') & (df['category'] != 'Investment')]
-
-    # Build a chart
-    chart = alt.Chart(df).mark_bar(opacity=0.5).encode(
-        y=alt.Y('category:N', title='Category'),
-        x=alt.X('value:Q', title='Amount   [$ USD]').stack(None),
-        color=alt.Color('variable:N', title=None)
-    )
+    key = ('current-month', await sqlite_repo.data_version(), datetime.date.today())
+    view = chart_cache.get(key)
+
+    if view is None:
+        # Get this months transactions
+        transactions = await sql_app.list_current_month()
+
+        # The chart fetches spent vs allocation per category from the summary API
+        data_url = f"/api/summary/month?month={datetime.date.today().strftime('%Y-%m')}"
+        chart_json = await chart_spec('current_month_chart_json', data_url)
+        view = chart_cache.put(key, {'transactions': transactions, 'chart_json': chart_json})
 
     return templates.TemplateResponse(
         'transactions_this_month.html', 
         {
             'request': request,
-            'transactions': transactions,
-            'chart_json': chart.to_json()
+            **view
         }
     )
 
+async def recurring_expenses_view(start: str | None = None, end: str | None = None) -> dict:
+    '''Recurring expenses and their projected spend vs allocation (default: next 12 months)'''
+    today = datetime.date.today()
+    start = start or today.isoformat()
+    end = end or (today + datetime.timedelta(days=365)).isoformat()
+
+    return {
+        'recurring_expenses': await sql_app.list_recurring_expenses(),
+        **await sql_app.project_recurring_expenses(start, end),
+        'projection_start': start,
+        'projection_end': end
+    }
+
 @app.get('/get-recurring-expense', response_class=HTMLResponse)
-async def get_recurring_expenses(request: Request):
+async def get_recurring_expenses(request: Request, start: str | None = None, end: str | None = None):
+    status = {}
+    try:
+        view = await recurring_expenses_view(start, end)
+    except ValueError as e:
+        # Show the default range rather than failing on a malformed one
+        view = await recurring_expenses_view()
+        status = {'status_statement': f'Failed to project recurring expenses: {e}', 'status_color': 'red'}
+
     return templates.TemplateResponse(
         'recurring_expenses.html',
         {
-            'request': request
+            'request': request,
+            **status,
+            **view
         }
     )
 
@@ -157,28 +402,16 @@ async def add_budet_category(
     notes: str = Form(...)
     ):
 
-    sql_app.create_category(description, monthly_allocation, notes)
-
-    # Get current category data 
-    categories = sql_app.list_categories()
-
-    # Build df
-    df = pd.DataFrame([vars(obj) for obj in categories])
+    await sql_app.create_category(description, monthly_allocation, notes)
 
-    # Chart it
-    chart = alt.Chart(df).mark_bar().encode(
-        y=alt.Y('description', title='Category'),
-        x=alt.X('monthly_allocation', title='Monthly Allocation')
-    ).properties(
-        title='Current Categories',
-        width=600
-    )
+    # The chart refetches /api/categories, whose ETag changed with the write
+    view = await categories_view()
 
     return templates.TemplateResponse(
         'category_form.html',
         {
             'request': request,
-            'chart_json': chart.to_json()
+            **view
         }
     )
 
@@ -188,20 +421,55 @@ async def handle_transaction(
     amount: float = Form(...),
     date: str = Form(...),
     description: str = Form(...),
-    category: str = Form(...),
+    category: str = Form(None),
     notes: str = Form(None)
     ):
 
-    sql_app.create_transaction(amount, date, description, category, notes)
-
-    # Get current budget categories
-    categories = sql_app.list_categories()
+    try:
+        # A blank category is left to the categorisation rules
+        await sql_app.create_transaction(amount, date, description, category, notes)
+        status_statement = f'Added {description}'
+        status_color = 'green'
+    except ValueError as e:
+        status_statement = f'Failed to add transaction: {e}'
+        status_color = 'red'
 
     return templates.TemplateResponse(
         "transaction_form.html",  # Ensure this template exists
         {
             "request": request,
-            'categories': categories
+            **await transaction_form_view(),
+            'status_statement': status_statement,
+            'status_color': status_color
+        }
+    )
+
+@app.post('/import-transactions', response_class=HTMLResponse)
+async def import_transactions(
+    request: Request,
+    file: Annotated[UploadFile, File()],
+    chunk_size: int = Form(1000)
+    ):
+    try:
+        # Stream the spooled upload rather than reading it into memory
+        stream = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+        stats = await sql_app.import_transactions(stream, detect_format(file.filename), chunk_size)
+        status_statement = (
+            f"Imported {stats['rows']} transactions in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_second']:.0f} rows/s), {stats['categorised']} categorised by rules"
+        )
+        status_color = 'green'
+    except Exception as e:  # noqa: BLE001 - any failure to read or store the upload is reported on the form
+        status_statement = f'Failed to import transactions: {e}'
+        status_color = 'red'
+
+    return templates.TemplateResponse(
+        'transaction_form.html',
+        {
+            'request': request,
+            **await transaction_form_view(),
+            'status_statement': status_statement,
+            'status_color': status_color
         }
     )
 
@@ -215,37 +483,159 @@ async def update_trasnaction(
     category: str = Form(...),
     notes: str = Form(None)
     ):
-    sql_app.correct_transaction(
-        transaction_id, amount, 
-        date, description, 
-        category, notes
+    try:
+        await sql_app.correct_transaction(
+            transaction_id, amount, 
+            date, description, 
+            category, notes
+        )
+        status_statement = f'Updated transaction {transaction_id}'
+        status_color = 'green'
+    except ValueError as e:
+        status_statement = f'Failed to update transaction: {e}'
+        status_color = 'red'
+
+    return templates.TemplateResponse(
+        'transaction_form.html', 
+        {
+            'request': request,
+            **await transaction_form_view(),
+            'status_statement': status_statement,
+            'status_color': status_color
+        }
     )
 
-    # Get current budget categories
-    categories = sql_app.list_categories()
+
+class Recategorisation(BaseModel):
+    category: str
+    query: str | None = None
+    start: datetime.date | None = None
+    end: datetime.date | None = None
+    from_category: str | None = None
+
+class Correction(BaseModel):
+    transaction_id: int
+    amount: float
+    date: str
+    description: str
+    category: str
+    notes: str | None = None
+
+class SplitPart(BaseModel):
+    amount: float
+    category: str
+    description: str | None = None
+    notes: str | None = None
+
+async def batch_response(change) -> JSONResponse:
+    '''Runs a batch edit and returns the changed rows, or a 400 with the reason nothing changed'''
+    try:
+        transactions = await change()
+    except ValueError as e:
+        return JSONResponse({'detail': str(e)}, status_code=400)
+    return JSONResponse({'updated': len(transactions), 'transactions': [asdict(t) for t in transactions]})
+
+@app.post('/api/transactions/recategorise')
+async def api_recategorise_transactions(body: Recategorisation):
+    '''Moves every transaction matching query, in the date range and in from_category to category'''
+    return await batch_response(lambda: sql_app.recategorise_transactions(
+        body.category, body.query, body.start, body.end, body.from_category))
+
+@app.post('/api/transactions/batch-update')
+async def api_update_transactions(body: list[Correction]):
+    '''Applies every correction in one commit, or none of them'''
+    return await batch_response(lambda: sql_app.correct_transactions([c.model_dump() for c in body]))
+
+@app.post('/api/transactions/{transaction_id}/split')
+async def api_split_transaction(transaction_id: int, parts: list[SplitPart]):
+    '''Splits a transaction into parts whose amounts add up to it; the first part keeps its id'''
+    return await batch_response(lambda: sql_app.split_transaction(transaction_id, [p.model_dump() for p in parts]))
+
+@app.post('/recategorise-transactions', response_class=HTMLResponse)
+async def recategorise_transactions(
+    request: Request,
+    category: str = Form(...),
+    query: str = Form(None),
+    start: str = Form(None),
+    end: str = Form(None),
+    from_category: str = Form(None)
+    ):
+    try:
+        changed = await sql_app.recategorise_transactions(category, query, start or None, end or None, from_category)
+        status_statement = f'Moved {len(changed)} transactions to {category.strip().title()}'
+        status_color = 'green'
+    except ValueError as e:
+        status_statement = f'Failed to recategorise transactions: {e}'
+        status_color = 'red'
 
     return templates.TemplateResponse(
-        'transaction_form.html', 
+        'transaction_form.html',
         {
             'request': request,
-            'categories': categories
+            **await transaction_form_view(),
+            'status_statement': status_statement,
+            'status_color': status_color
         }
     )
 
+class Rule(BaseModel):
+    pattern: str
+    category: str
+    is_regex: bool = False
+    min_amount: float | None = None
+    max_amount: float | None = None
+    priority: int = 100
+    notes: str | None = None
+
+@app.get('/api/rules')
+async def api_list_categorisation_rules():
+    '''Categorisation rules in priority order'''
+    rules = await sql_app.list_categorisation_rules()
+    return {'rules': [asdict(r) for r in rules]}
+
+@app.post('/api/rules')
+async def api_create_categorisation_rule(body: Rule):
+    try:
+        rule = await sql_app.create_categorisation_rule(**body.model_dump())
+    except ValueError as e:
+        return JSONResponse({'detail': str(e)}, status_code=400)
+    return JSONResponse(asdict(rule), status_code=201)
+
+@app.put('/api/rules/{rule_id}')
+async def api_update_categorisation_rule(rule_id: int, body: Rule):
+    try:
+        rule = await sql_app.correct_categorisation_rule(rule_id, **body.model_dump())
+    except ValueError as e:
+        return JSONResponse({'detail': str(e)}, status_code=400)
+    return asdict(rule)
+
+@app.delete('/api/rules/{rule_id}')
+async def api_delete_categorisation_rule(rule_id: int):
+    if not await sql_app.delete_categorisation_rule(rule_id):
+        return JSONResponse({'detail': f'No categorisation rule with id {rule_id}'}, status_code=404)
+    return Response(status_code=204)
+
+@app.post('/api/rules/apply')
+async def api_apply_categorisation_rules(overwrite: bool = False):
+    '''Back-fills categories from the rules: Uncategorized transactions only, or all with overwrite'''
+    return await sql_app.apply_categorisation_rules(overwrite)
+
 
 @app.post('/add_recurring_expense', response_class=HTMLResponse)
 async def handle_recurring_expense(
     request: Request, 
-    amount: int = Form(...),
+    amount: float = Form(...),
     frequency: str = Form(...),
     category: str = Form(...),
     description: str = Form(...),
     notes: str = Form(None)
 ):
+    view = {}
     try:
-        sql_app.create_recurring_expense(amount, frequency, category, description, notes)
+        await sql_app.create_recurring_expense(amount, frequency, category, description, notes)
         status_statement = f'Successfully added {description} recurring expense!'
         status_color = 'green'
+        view = await recurring_expenses_view()
     except Exception as e:
         status_statement = f'Failed to add recurring expense: {e}'
         status_color = 'red'
@@ -255,6 +645,7 @@ async def handle_recurring_expense(
         {
             'request': request,
             'status_statement': status_statement,
-            'status_color': status_color
+            'status_color': status_color,
+            **view
         }
     )
@@ -1 +1,2 @@
-from .application import Application  # noqa: F401
\ No newline at end of file
+from .application import Application  # noqa: F401
+from .async_application import AsyncApplication  # noqa: F401
\ No newline at end of file
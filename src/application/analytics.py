@@ -0,0 +1,147 @@
+'''Budget burn rate and forecast analytics over the transaction history.
+
+Each period pulls the per day/category totals once from the repository's
+daily rollup, lays them out as a (category x day) NumPy matrix of spend and
+derives every figure from prefix sums over it, so the cost depends on days
+times categories rather than on the number of transactions. Reports are
+cached per period and repository data version, and looked up per category.
+'''
+import calendar
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import date
+
+import numpy as np
+
+try:
+    from repositories.date_ranges import to_date
+except ModuleNotFoundError:
+    from ..repositories.date_ranges import to_date
+
+
+def same_day_last_year(day: date) -> date:
+    '''The same calendar day a year earlier; Feb 29 maps to Feb 28'''
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:
+        return day.replace(year=day.year - 1, day=28)
+
+
+def _percent_change(current: np.ndarray, previous: np.ndarray) -> list:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (current - previous) / np.abs(previous) * 100
+    return [round(float(c), 1) if p else None for c, p in zip(change, previous)]
+
+
+class BudgetAnalytics:
+    '''Per-category burn rate, rolling averages, month-end projection and year-over-year figures'''
+
+    def __init__(self, repository, maxsize: int = 16):
+        self.repository = repository
+        self.maxsize = maxsize
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _spend_matrix(self, first: date, as_of: date, exclude: tuple[str, ...]):
+        '''Category names and their daily spend from first to as_of, one row per category'''
+        columns = self.repository.read_daily_category_totals(first, as_of, exclude)
+        allocations = {
+            c.description: c.monthly_allocation
+            for c in self.repository.read_all_categories()
+            if c.description not in exclude
+        }
+
+        names = sorted(set(columns['category']) | set(allocations))
+        codes = {name: i for i, name in enumerate(names)}
+        spend = np.zeros((len(names), (as_of - first).days + 1))
+        if columns['day']:
+            rows = np.fromiter((codes[c] for c in columns['category']), dtype=np.intp, count=len(columns['category']))
+            days = (np.array(columns['day'], dtype='datetime64[D]') - np.datetime64(first, 'D')).astype(np.intp)
+            # Spend is the negated amount, as in the summaries
+            np.add.at(spend, (rows, days), -np.asarray(columns['total'], dtype=float))
+        return names, allocations, spend
+
+    def _build(self, as_of: date, exclude: tuple[str, ...]) -> dict[str, dict]:
+        # Last year's year-to-date is the furthest back any figure looks
+        first = date(as_of.year - 1, 1, 1)
+        names, allocations, spend = self._spend_matrix(first, as_of, exclude)
+
+        # totals(a, b) sums each category's spend over day offsets a..b inclusive
+        prefix = np.zeros((len(names), spend.shape[1] + 1))
+        np.cumsum(spend, axis=1, out=prefix[:, 1:])
+
+        def offset(day: date) -> int:
+            return (day - first).days
+
+        def totals(start: date, end: date) -> np.ndarray:
+            return prefix[:, offset(end) + 1] - prefix[:, offset(start)]
+
+        month_start = as_of.replace(day=1)
+        elapsed = as_of.day
+        month_days = calendar.monthrange(as_of.year, as_of.month)[1]
+        last_year = same_day_last_year(as_of)
+
+        month_to_date = totals(month_start, as_of)
+        burn_rate = month_to_date / elapsed
+        rolling_30 = (prefix[:, -1] - prefix[:, -31]) / 30
+        rolling_90 = (prefix[:, -1] - prefix[:, -91]) / 90
+        projected = burn_rate * month_days
+        month_last_year = totals(last_year.replace(day=1), last_year)
+        year_to_date = totals(date(as_of.year, 1, 1), as_of)
+        year_last_year = totals(first, last_year)
+        month_change = _percent_change(month_to_date, month_last_year)
+        year_change = _percent_change(year_to_date, year_last_year)
+
+        report = {}
+        for i, name in enumerate(names):
+            allocation = allocations.get(name)
+            report[name] = {
+                'category': name,
+                'monthly_allocation': allocation,
+                'month_to_date': round(float(month_to_date[i]), 2),
+                'daily_burn_rate': round(float(burn_rate[i]), 2),
+                'rolling_30_day_average': round(float(rolling_30[i]), 2),
+                'rolling_90_day_average': round(float(rolling_90[i]), 2),
+                'projected_month_end': round(float(projected[i]), 2),
+                'projected_vs_allocation': (
+                    None if allocation is None else round(float(projected[i]) - allocation, 2)),
+                'month_to_date_last_year': round(float(month_last_year[i]), 2),
+                'month_change_pct': month_change[i],
+                'year_to_date': round(float(year_to_date[i]), 2),
+                'year_to_date_last_year': round(float(year_last_year[i]), 2),
+                'year_change_pct': year_change[i]
+            }
+        return report
+
+    def _report(self, as_of: date | str | None, exclude: Iterable[str]) -> dict[str, dict]:
+        as_of = to_date(as_of or date.today())
+        exclude = tuple(sorted(exclude))
+        key = (as_of, exclude)
+        # Read the version before querying so a concurrent write can only make this entry stale
+        version = self.repository.data_version
+
+        with self._lock:
+            entry = self._reports.get(key)
+            if entry is not None and entry[0] == version:
+                self._reports.move_to_end(key)
+                return entry[1]
+
+        report = self._build(as_of, exclude)
+
+        with self._lock:
+            self._reports[key] = (version, report)
+            self._reports.move_to_end(key)
+            while len(self._reports) > self.maxsize:
+                self._reports.popitem(last=False)
+        return report
+
+    def report(self, as_of: date | str | None = None, exclude: Iterable[str] = ()) -> list[dict]:
+        '''Figures for every category as of a day (default: today), by category name'''
+        return list(self._report(as_of, exclude).values())
+
+    def category_report(
+        self, category: str, as_of: date | str | None = None, exclude: Iterable[str] = ()
+    ) -> dict | None:
+        '''Figures for one category, or None if it has no spend or allocation'''
+        return self._report(as_of, exclude).get(category)
@@ -1,26 +1,268 @@
+import copy
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from datetime import date
+from itertools import islice
+from typing import IO
+
 try:
-    from domain import Transaction, Category, RecurringExpense
+    from application.categoriser import Categoriser, compile_rule_pattern
+    from domain import CategorisationRule, Category, RecurringExpense, Transaction
+    from domain.money import from_cents, to_cents
+    from importers import read_transactions
+    from instrumentation import instrument
     from repositories import SQLiteTransactionRepository
+    from repositories.date_ranges import normalise_date
 except ModuleNotFoundError:
-    from ..domain.transaction import Transaction
-    from ..domain.category import Category 
+    from ..domain.categorisation_rule import CategorisationRule
+    from ..domain.category import Category
+    from ..domain.money import from_cents, to_cents
     from ..domain.recurring_expense import RecurringExpense
+    from ..domain.transaction import Transaction
+    from ..importers import read_transactions
+    from ..instrumentation import instrument
+    from ..repositories.date_ranges import normalise_date
     from ..repositories.sqlite_repository import SQLiteTransactionRepository
+    from .categoriser import Categoriser, compile_rule_pattern
+
+# Money in rather than spending; left out of the spend summaries by default
+NON_EXPENSE_CATEGORIES = ('Income', 'Investment')
 
+# Category of transactions nobody (and no rule) has categorised yet; what the importers default to
+UNCATEGORISED = 'Uncategorized'
+
+@instrument('application')
 class Application:
-    def __init__(self, repository: SQLiteTransactionRepository):
+    def __init__(
+        self, repository: SQLiteTransactionRepository,
+        excluded_categories: Iterable[str] = NON_EXPENSE_CATEGORIES, snapshot: str | None = None
+    ):
         self.repository = repository
+        self.excluded_categories = tuple(excluded_categories)
+        # Snapshot directory the analytics read instead of the database, if any
+        self.snapshot = snapshot
+        self._schedule = None
+        self._analytics = None
+        self._categoriser = None
+        self._categories = None
 
-    def create_transaction(self, amount: float, date: str, description: str, category: str, notes: str) -> None:
-        '''Adds a transaction to database.'''
+    @property
+    def schedule(self):
+        '''Recurring expense schedule; imported on first use as it needs NumPy'''
+        if self._schedule is None:
+            try:
+                from application.recurring_schedule import RecurringSchedule
+            except ModuleNotFoundError:
+                from .recurring_schedule import RecurringSchedule
+            self._schedule = RecurringSchedule()
+        return self._schedule
 
-        # Correct the category
-        category = category.title()
-        
-        transaction = Transaction(None, amount, date, description, category.title(), notes)
+    @property
+    def analytics(self):
+        '''Budget analytics, over the snapshot if one is set; imported on first use as it needs NumPy'''
+        if self._analytics is None:
+            try:
+                from application.analytics import BudgetAnalytics
+            except ModuleNotFoundError:
+                from .analytics import BudgetAnalytics
+            source = self.repository
+            if self.snapshot:
+                try:
+                    from repositories.snapshot import SnapshotRepository
+                except ModuleNotFoundError:
+                    from ..repositories.snapshot import SnapshotRepository
+                source = SnapshotRepository(self.snapshot)
+            self._analytics = BudgetAnalytics(source)
+        return self._analytics
+
+    @property
+    def categoriser(self) -> Categoriser:
+        '''The categorisation rules compiled for matching; recompiled only once a rule has changed'''
+        version = self.repository.rules_version
+        cached = self._categoriser
+        if cached is None or cached[0] != version:
+            # Read after the version, so a rule changed meanwhile triggers another rebuild next time
+            cached = (version, Categoriser(self.repository.read_all_categorisation_rules()))
+            self._categoriser = cached
+        return cached[1]
+
+    @staticmethod
+    def _validated(
+        transaction_id: int | None, amount, date, description: str, category: str, notes: str
+    ) -> Transaction:
+        '''Builds a transaction from user input; raises ValueError for an amount, date or text it cannot store'''
+        # Whole cents only: an amount like 1.005 is a typo rather than something to round
+        amount = from_cents(to_cents(amount, exact=True))
+        date = normalise_date(date)
+        description = (description or '').strip()
+        if not description:
+            raise ValueError('Description is required')
+        category = (category or '').strip().title()
+        if not category:
+            raise ValueError('Category is required')
+        return Transaction(transaction_id, amount, date, description, category, notes)
+
+    def create_transaction(self, amount: float, date: str, description: str, category: str, notes: str) -> None:
+        '''Adds a transaction to database; left blank or Uncategorized, the categorisation rules pick the category.'''
+        category = (category or '').strip()
+        if not category or category.title() == UNCATEGORISED:
+            category = self.categoriser.categorise((description or '').strip(), amount) or UNCATEGORISED
+        transaction = self._validated(None, amount, date, description, category, notes)
         self.repository.create_transaction(transaction)
         print(f"Transaction added: {transaction}")
 
+    def import_transactions(
+        self, source: str | IO[str], file_format: str | None = None,
+        chunk_size: int = 1000, default_category: str = UNCATEGORISED
+    ) -> dict:
+        '''Bulk imports a CSV/OFX bank export and returns throughput stats.
+
+        The file is streamed and written in chunks within one commit, so its
+        size is not bounded by memory. Rows without a category are given one
+        by the categorisation rules where a rule matches.
+        '''
+        start = time.perf_counter()
+
+        categorised = [0]
+        transactions = read_transactions(source, file_format, default_category)
+        transactions = self._categorised(transactions, default_category, categorised)
+        rows = self.repository.create_transactions(
+            self._normalise_categories(transactions, chunk_size), chunk_size)
+
+        seconds = time.perf_counter() - start
+        return {
+            'rows': rows,
+            'categorised': categorised[0],
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else 0.0
+        }
+
+    def _categorised(
+        self, transactions: Iterable[Transaction], uncategorised: str, counter: list[int]
+    ) -> Iterator[Transaction]:
+        '''Lets the categorisation rules pick the category of uncategorised rows, counting those they match'''
+        categoriser = self.categoriser
+        if not len(categoriser):
+            yield from transactions
+            return
+        for t in transactions:
+            if t.category == uncategorised:
+                category = categoriser.categorise(t.description, t.amount)
+                if category is not None:
+                    t.category = category
+                    counter[0] += 1
+            yield t
+
+    @staticmethod
+    def _normalise_categories(transactions: Iterable[Transaction], chunk_size: int) -> Iterator[Transaction]:
+        '''Title-cases categories a chunk at a time, once per distinct value'''
+        titles = {}
+        transactions = iter(transactions)
+        while True:
+            chunk = list(islice(transactions, chunk_size))
+            if not chunk:
+                break
+            for category in {t.category for t in chunk} - titles.keys():
+                titles[category] = category.title()
+            for t in chunk:
+                t.category = titles[t.category]
+            yield from chunk
+
+    @staticmethod
+    def _validated_rule(
+        rule_id: int | None, pattern: str, category: str, is_regex: bool,
+        min_amount, max_amount, priority: int, notes: str
+    ) -> CategorisationRule:
+        '''Builds a categorisation rule from user input; raises ValueError for one that cannot be matched'''
+        # Not stripped: a substring like ' GAS ' may rely on its spaces
+        if not (pattern or '').strip():
+            raise ValueError('Pattern is required')
+        if is_regex:
+            compile_rule_pattern(pattern)
+        category = (category or '').strip().title()
+        if not category:
+            raise ValueError('Category is required')
+        low, high = (
+            from_cents(to_cents(amount, exact=True)) if amount not in (None, '') else None
+            for amount in (min_amount, max_amount)
+        )
+        if low is not None and high is not None and low > high:
+            raise ValueError(f'Minimum amount {low:.2f} is above the maximum {high:.2f}')
+        return CategorisationRule(rule_id, pattern, category, bool(is_regex), low, high, int(priority), notes)
+
+    def create_categorisation_rule(
+        self, pattern: str, category: str, is_regex: bool = False, min_amount: float | None = None,
+        max_amount: float | None = None, priority: int = 100, notes: str | None = None
+    ) -> CategorisationRule:
+        '''Adds a rule giving transactions whose description contains (or matches) pattern the category.
+
+        The amount bounds are inclusive and optional; among the rules that
+        match, the one with the lowest priority wins.
+        '''
+        rule = self._validated_rule(None, pattern, category, is_regex, min_amount, max_amount, priority, notes)
+        self.repository.create_categorisation_rule(rule)
+        print(f"\033[92mCategorisation rule created: {rule}\033[0m")
+        return rule
+
+    def list_categorisation_rules(self) -> [CategorisationRule]:
+        return self.repository.read_all_categorisation_rules()
+
+    def correct_categorisation_rule(
+        self, rule_id: int, pattern: str, category: str, is_regex: bool = False,
+        min_amount: float | None = None, max_amount: float | None = None,
+        priority: int = 100, notes: str | None = None
+    ) -> CategorisationRule:
+        '''Updates a categorisation rule'''
+        rule = self._validated_rule(rule_id, pattern, category, is_regex, min_amount, max_amount, priority, notes)
+        self.repository.update_categorisation_rule(rule)
+        return rule
+
+    def delete_categorisation_rule(self, rule_id: int) -> bool:
+        '''Deletes a categorisation rule; returns whether it existed'''
+        return self.repository.delete_categorisation_rule(rule_id)
+
+    def categorise(self, description: str, amount: float) -> str | None:
+        '''The category the rules give a transaction, or None if no rule matches'''
+        return self.categoriser.categorise(description, amount)
+
+    def apply_categorisation_rules(self, overwrite: bool = False, page_size: int = 5000) -> dict:
+        '''Back-fills categories from the rules over the existing transactions and returns stats.
+
+        Only Uncategorized transactions change unless overwrite is set, when
+        every transaction a rule matches takes the rule's category. The ledger
+        is read a page at a time and each page's changes are one commit.
+        '''
+        start = time.perf_counter()
+        categoriser = self.categoriser
+        rows = updated = 0
+        after_id = None
+        while len(categoriser):
+            page = self.repository.read_transactions_page(page_size, after_id)
+            if not page:
+                break
+            after_id = page[-1].transaction_id
+            rows += len(page)
+
+            changed = []
+            for t in page:
+                if overwrite or t.category == UNCATEGORISED:
+                    category = categoriser.categorise(t.description, t.amount)
+                    if category is not None and category != t.category:
+                        t.category = category
+                        changed.append(t)
+            if changed:
+                updated += len(self.repository.update_transactions(changed))
+
+        seconds = time.perf_counter() - start
+        print(f"\033[92m{updated} of {rows} transactions categorised in {seconds:.2f}s\033[0m")
+        return {
+            'rows': rows,
+            'updated': updated,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else 0.0
+        }
+
     def create_category(self, description: str, monthly_allocation: float, notes: str) -> None:
         '''Adds a category to database'''
 
@@ -37,28 +279,139 @@ class Application:
         
         # Data integrity check
         category = category.title()
+        self.schedule.parse_frequency(frequency)
 
         # Create recurring expense
         recurring_expense = RecurringExpense(None, amount, frequency, category, description, notes, None)
         self.repository.create_recurring_expense(recurring_expense)
 
+    def list_recurring_expenses(self) -> [RecurringExpense]:
+        return self.repository.read_all_recurring_expenses()
+
+    def correct_recurring_expense(
+        self, recurring_expense_id: int, amount: float, frequency: str,
+        category: str, description: str, notes: str) -> None:
+        '''Updates a recurring expense and drops its cached schedule'''
+
+        # Data integrity check
+        category = category.title()
+        self.schedule.parse_frequency(frequency)
+
+        recurring_expense = RecurringExpense(
+            recurring_expense_id, amount, frequency, category, description, notes, None)
+        self.repository.update_recurring_expense(recurring_expense)
+        self.schedule.invalidate(recurring_expense_id)
+
+    def project_recurring_expenses(self, start: str, end: str) -> dict:
+        '''Projected recurring spend vs allocation per category between start and end.
+
+        Returns the projection and the expenses left out of it (stored with a
+        frequency the schedule cannot expand).
+        '''
+        start, end = normalise_date(start), normalise_date(end)
+        expenses = self.repository.read_all_recurring_expenses()
+        allocations = {c.description: c.monthly_allocation for c in self.repository.read_all_categories()}
+        skipped = []
+        projection = self.schedule.projection_vs_allocation(expenses, allocations, start, end, skipped)
+        return {'projection': projection, 'skipped': skipped}
+
     def list_transactions(self):
         '''Gets all transactions'''
-        transactions = self.repository.read_all_transactions()
+        # Stream rather than fetchall so memory stays flat however large the ledger
+        transactions = self.repository.iter_transactions()
         print('\033[92m\nTransactions:\n--------------------------------\033[0m')
         for transaction in transactions:
             print(transaction)
 
+    def list_transactions_page(self, page_size: int = 50, after_id: int | None = None) -> [Transaction]:
+        '''Gets one page of transactions in id order, after after_id.'''
+        return self.repository.read_transactions_page(page_size, after_id)
+
+    def list_recent_transactions_page(
+        self, page_size: int = 50, before_date: date | str | None = None, before_id: int | None = None
+    ) -> [Transaction]:
+        '''Gets one page of transactions, newest first, older than (before_date, before_id).'''
+        before_date = normalise_date(before_date) if before_date else None
+        return self.repository.read_transactions_page_by_date(page_size, before_date, before_id)
+
     def list_last_seven_days(self):
         '''Gets last seven days of transactions.'''
         return self.repository.read_last_seven_days()
 
+    def list_transactions_between(self, start: str, end: str) -> [Transaction]:
+        '''Gets transactions dated between start and end (inclusive).'''
+        return self.repository.read_transactions_between(start, end)
+
+    def list_transaction_columns(self, start: str | None = None, end: str | None = None) -> dict[str, list]:
+        '''Gets transactions as columns, ready for a DataFrame.'''
+        return self.repository.read_transaction_columns(start, end)
+
+    def export_snapshot(self, directory: str, file_format: str | None = None) -> dict:
+        '''Appends what changed since the last export to a Parquet/Arrow snapshot; needs pyarrow'''
+        try:
+            from repositories.snapshot import export_snapshot
+        except ModuleNotFoundError:
+            from ..repositories.snapshot import export_snapshot
+        return export_snapshot(self.repository, directory, file_format)
+
+    def load_snapshot(self, directory: str, start: str | None = None, end: str | None = None):
+        '''Memory-maps a snapshot's transactions from start to end into a DataFrame; needs pyarrow'''
+        try:
+            from repositories.snapshot import load_snapshot
+        except ModuleNotFoundError:
+            from ..repositories.snapshot import load_snapshot
+        return load_snapshot(directory, start, end)
+
+    def search_transactions(
+        self, query: str, start: str | None = None, end: str | None = None,
+        category: str | None = None, limit: int = 50
+    ) -> [Transaction]:
+        '''Finds transactions matching every word of query in the description, notes or category, best first.'''
+        category = category.title() if category else None
+        start = normalise_date(start) if start else None
+        end = normalise_date(end) if end else None
+        return self.repository.search_transactions(query, (start, end), category, limit)
+
     def list_categories(self) -> [Category]:
-        return self.repository.read_all_categories()
+        '''Gets all categories; cached until a category changes, as every form's dropdown needs them'''
+        version = self.repository.categories_version
+        cached = self._categories
+        if cached is None or cached[0] != version:
+            cached = (version, tuple(self.repository.read_all_categories()))
+            self._categories = cached
+        return [copy.copy(c) for c in cached[1]]
 
     def list_current_month(self) -> [Transaction]:
         return self.repository.read_current_month_transactions()
 
+    def _exclusions(self, exclude: Iterable[str] | None) -> list[str]:
+        '''Categories to leave out of a summary; None means excluded_categories'''
+        if exclude is None:
+            exclude = self.excluded_categories
+        return [category.title() for category in exclude if category]
+
+    def summarise_current_month(self, exclude: Iterable[str] | None = None) -> list[dict]:
+        '''Gets spent vs allocation per expense category for this month.'''
+        return self.repository.read_category_month_summary(None, self._exclusions(exclude))
+
+    def summarise_month(self, month: str | None = None, exclude: Iterable[str] | None = None) -> list[dict]:
+        '''Gets spent vs allocation per expense category for a YYYY-MM month (default: this month).'''
+        return self.repository.read_category_month_summary(month, self._exclusions(exclude))
+
+    def summarise_between(self, start: str, end: str, exclude: Iterable[str] | None = None) -> list[dict]:
+        '''Gets spent, transaction count and allocation per expense category between start and end (inclusive).'''
+        return self.repository.read_category_summary_between(start, end, self._exclusions(exclude))
+
+    def forecast_budget(self, as_of: str | None = None, exclude: Iterable[str] | None = None) -> list[dict]:
+        '''Gets burn rate, rolling averages, month-end projection and year-over-year figures per category.'''
+        return self.analytics.report(as_of, self._exclusions(exclude))
+
+    def forecast_category(
+        self, category: str, as_of: str | None = None, exclude: Iterable[str] | None = None
+    ) -> dict | None:
+        '''Gets the forecast figures for one category.'''
+        return self.analytics.category_report(category.title(), as_of, self._exclusions(exclude))
+
     def find_transaction(self, transaction_id: int):
         '''Returns a transaction given the id'''
         transaction = self.repository.read_transaction_by_id(transaction_id)
@@ -70,15 +423,64 @@ class Application:
 
     def correct_transaction(self, transaction_id: int, amount: float, date: str, description: str, category: str, notes: str) -> None:
         '''Updates a transaction'''
+        transaction = self._validated(transaction_id, amount, date, description, category, notes)
 
-        # Correct the category 
-        category = category.title()
+        stored = self.repository.update_transaction(transaction)
+        if isinstance(stored, Future):
+            # Write-behind: only the committed update tells whether the id exists
+            stored = stored.result()
+        if stored is None:
+            raise ValueError(f'Transaction {transaction_id} not found')
+        print(f"\033[92mTransaction updated {stored}\033[0m")
+
+    def correct_transactions(self, corrections: Iterable[dict]) -> [Transaction]:
+        '''Validates and applies many corrections in one commit; each dict holds correct_transaction's arguments'''
+        transactions = [
+            self._validated(
+                c['transaction_id'], c['amount'], c['date'], c['description'], c['category'], c.get('notes'))
+            for c in corrections
+        ]
+        # Every id must exist, or the whole batch is rolled back
+        updated = self.repository.update_transactions(transactions, require_all=True)
+        if len(updated) != len({t.transaction_id for t in transactions}):
+            raise ValueError(f'{len(updated)} of {len(transactions)} transactions found')
+        print(f"\033[92m{len(updated)} transactions updated\033[0m")
+        return updated
+
+    def recategorise_transactions(
+        self, category: str, query: str | None = None, start: str | None = None,
+        end: str | None = None, from_category: str | None = None
+    ) -> [Transaction]:
+        '''Moves every transaction matching query, dated start to end and in from_category to category in one commit'''
+        category = (category or '').strip().title()
+        if not category:
+            raise ValueError('Category is required')
+        query = (query or '').strip() or None
+        from_category = (from_category or '').strip().title() or None
+        if not (query or start or end or from_category):
+            raise ValueError('Give a search, a date range or a category to move transactions from')
+
+        changed = self.repository.recategorise_transactions(category, query, (start, end), from_category)
+        print(f"\033[92m{len(changed)} transactions moved to {category}\033[0m")
+        return changed
+
+    def split_transaction(self, transaction_id: int, parts: Iterable[dict]) -> [Transaction]:
+        '''Splits a transaction into parts (dicts of amount, category and optional description/notes) in one commit.
 
-        # Create a transaction
-        transaction = Transaction(transaction_id, amount, date, description, category, notes)
+        The amounts must add up to the transaction's; the first part keeps its id.
+        '''
+        transactions = []
+        for part in parts:
+            category = (part.get('category') or '').strip().title()
+            if not category:
+                raise ValueError('Every part needs a category')
+            amount = from_cents(to_cents(part['amount'], exact=True))
+            description = (part.get('description') or '').strip() or None
+            transactions.append(Transaction(None, amount, None, description, category, part.get('notes')))
 
-        self.repository.update_transaction(transaction)
-        print(f"\033[92mTransaction updated {transaction}\033[0m")
+        stored = self.repository.split_transaction(transaction_id, transactions)
+        print(f"\033[92mTransaction {transaction_id} split into {len(stored)}\033[0m")
+        return stored
 
 if __name__=='__main__':
     app = Application()
\ No newline at end of file
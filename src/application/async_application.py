@@ -0,0 +1,32 @@
+import functools
+
+try:
+    from application.application import Application
+    from repositories.async_sqlite_repository import AsyncSQLiteTransactionRepository
+except ModuleNotFoundError:
+    from ..repositories.async_sqlite_repository import AsyncSQLiteTransactionRepository
+    from .application import Application
+
+
+class AsyncApplication:
+    '''Awaitable variant of Application for the FastAPI handlers.
+
+    Each Application method becomes a coroutine executed on the async
+    repository's worker threads, so its database calls never block the
+    event loop.
+    '''
+
+    def __init__(self, repository: AsyncSQLiteTransactionRepository, **options):
+        self.repository = repository
+        self.application = Application(repository.repository, **options)
+
+    def __getattr__(self, name):
+        attr = getattr(self.application, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.repository.run(attr, *args, **kwargs)
+
+        return method
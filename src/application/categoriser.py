@@ -0,0 +1,166 @@
+'''Picks a category for a transaction from its description and amount.
+
+Substring rules are indexed by their first three characters: the
+description's own three character runs are intersected with that index in
+one set operation, and only the few substrings whose first run occurs are
+then searched for, so the cost barely grows with the number of rules (a
+pure Python Aho-Corasick automaton, stepping through the description a
+character at a time, came out at half the speed). A regular expression
+rule is indexed the same way by a run of plain text every match must
+contain, and run only when that text is found; the few without one are
+joined into one alternation that is tried first as a filter. The first rule in priority order whose pattern matches and
+whose amount range holds the amount wins. Matching ignores case.
+'''
+import re
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+
+try:
+    from domain.categorisation_rule import CategorisationRule
+    from domain.money import to_cents
+except ModuleNotFoundError:
+    from ..domain.categorisation_rule import CategorisationRule
+    from ..domain.money import to_cents
+
+# Bank descriptions repeat (the same merchant every week), so recent lookups are memoised
+CACHE_SIZE = 65536
+
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+REGEX_SPECIAL = frozenset('.^$*+?{}[]\\|()')
+QUANTIFIERS = frozenset('?*+{')
+
+
+def compile_rule_pattern(pattern: str) -> re.Pattern:
+    '''Compiles a regex rule; raises ValueError if it is invalid or cannot be joined with other rules'''
+    if BACKREFERENCE.search(pattern):
+        raise ValueError(f'Backreferences are not supported in rules: {pattern!r}')
+    try:
+        # Wrapped as it will be in the joined alternation, which rejects flags like (?i) mid-pattern
+        compiled = re.compile(f'(?:{pattern})', re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f'Invalid regular expression {pattern!r}: {e}') from None
+    if compiled.groupindex:
+        raise ValueError(f'Named groups are not supported in rules: {pattern!r}')
+    return compiled
+
+
+def required_literal(pattern: str) -> str | None:
+    '''The longest run of plain text (casefolded) every match of pattern contains, or None if under three characters.
+
+    Conservative: nothing is taken from a pattern with alternation or inline
+    flags, nor from inside a group or class, nor a character a quantifier follows.
+    '''
+    if '|' in pattern or re.search(r'\(\?[aiLmsux]', pattern):
+        return None
+    runs, run, depth, i = [], '', 0, 0
+    while i < len(pattern):
+        char, literal = pattern[i], None
+        i += 1
+        if char == '\\':
+            escaped = pattern[i:i + 1]
+            literal = escaped if escaped and not escaped.isalnum() and escaped.isascii() else None
+            i += 1
+        elif char == '[':
+            # Skip the class; a ] straight after [ or [^ is a member, not the end
+            i += pattern[i] == '^' if i < len(pattern) else 0
+            i += pattern[i:i + 1] == ']'
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            i += 1
+        elif char == '{':
+            # A repeat count such as {2,5}, not text
+            i = pattern.find('}', i) + 1 or len(pattern)
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char not in REGEX_SPECIAL and char.isascii():
+            literal = char
+
+        if literal is None or depth or pattern[i:i + 1] in QUANTIFIERS:
+            runs.append(run)
+            run = ''
+        else:
+            run += literal
+    runs.append(run)
+    # Of equally long runs the last, as bank descriptions lead with generic text like "POS"
+    longest = max(reversed(runs), key=len).casefold()
+    return longest if len(longest) >= 3 else None
+
+
+def trigrams(text: str) -> Iterator[tuple[str, str, str]]:
+    '''Every run of three characters in text, built at C speed'''
+    return zip(text, text[1:], text[2:])
+
+
+class Categoriser:
+    '''Rules compiled for matching; build a new one when the rules change'''
+
+    def __init__(self, rules: Iterable[CategorisationRule], cache_size: int = CACHE_SIZE):
+        self.rules = sorted(rules, key=lambda r: (r.priority, r.rule_id or 0))
+        # Inclusive (low, high) cents per rule, None for a rule matching any amount
+        self._bounds = [
+            None if r.min_amount is None and r.max_amount is None else (
+                to_cents(r.min_amount) if r.min_amount is not None else float('-inf'),
+                to_cents(r.max_amount) if r.max_amount is not None else float('inf'))
+            for r in self.rules
+        ]
+
+        # First three characters -> [(substring, rule index, regex to confirm or None)];
+        # shorter substrings, and regexes without a required substring, are checked always
+        self._index, self._short, self._regexes = {}, [], []
+        for i, rule in enumerate(self.rules):
+            if rule.is_regex:
+                pattern = compile_rule_pattern(rule.pattern)
+                keyword = required_literal(rule.pattern)
+                if keyword is None:
+                    self._regexes.append((i, pattern))
+                    continue
+            else:
+                pattern, keyword = None, rule.pattern.casefold()
+            if len(keyword) < 3:
+                self._short.append((keyword, i))
+            else:
+                self._index.setdefault(tuple(keyword[:3]), []).append((keyword, i, pattern))
+        self._prefixes = set(self._index)
+        self._any_regex = re.compile(
+            '|'.join(pattern.pattern for _, pattern in self._regexes), re.IGNORECASE) if self._regexes else None
+
+        self._candidates = lru_cache(maxsize=cache_size)(self._find)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _find(self, description: str) -> tuple[int, ...]:
+        '''Indices of every rule whose pattern matches description, in priority order'''
+        text = description.casefold()
+        hits = [i for keyword, i in self._short if keyword in text]
+        index = self._index
+        for prefix in self._prefixes.intersection(trigrams(text)):
+            for keyword, i, pattern in index[prefix]:
+                if keyword in text and (pattern is None or pattern.search(description)):
+                    hits.append(i)
+        if self._any_regex is not None and self._any_regex.search(description):
+            hits.extend(i for i, pattern in self._regexes if pattern.search(description))
+        return tuple(sorted(set(hits))) if len(hits) > 1 else tuple(hits)
+
+    def match(self, description: str, amount: float) -> CategorisationRule | None:
+        '''The first rule matching description and amount, or None'''
+        if not description:
+            return None
+        cents = None
+        for i in self._candidates(description):
+            bounds = self._bounds[i]
+            if bounds is None:
+                return self.rules[i]
+            if cents is None:
+                cents = to_cents(amount)
+            if bounds[0] <= cents <= bounds[1]:
+                return self.rules[i]
+        return None
+
+    def categorise(self, description: str, amount: float) -> str | None:
+        '''The category of the first rule matching description and amount, or None'''
+        rule = self.match(description, amount)
+        return rule.category if rule is not None else None
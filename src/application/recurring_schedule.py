@@ -0,0 +1,162 @@
+'''Expands recurring expenses into dated occurrences.
+
+Occurrences are computed with NumPy datetime64 arithmetic over the whole
+date range at once, and cached per expense until the expense changes.
+'''
+import threading
+from datetime import date
+
+import numpy as np
+
+try:
+    from domain.recurring_expense import RecurringExpense
+except ModuleNotFoundError:
+    from ..domain.recurring_expense import RecurringExpense
+
+# Normalised frequency -> (unit, step); month based steps keep the anchor day of month
+FREQUENCIES = {
+    'daily': ('D', 1),
+    'weekly': ('D', 7),
+    'bi weekly': ('D', 14),
+    'biweekly': ('D', 14),
+    'monthly': ('M', 1),
+    'bi monthly': ('M', 2),
+    'bimonthly': ('M', 2),
+    'quarterly': ('M', 3),
+    'semi annually': ('M', 6),
+    'yearly': ('M', 12),
+    'annually': ('M', 12)
+}
+
+AVERAGE_MONTH_DAYS = 365.2425 / 12
+
+
+def parse_frequency(frequency: str) -> tuple[str, int]:
+    '''Maps a stored frequency such as "Semi-Annually" to (unit, step)'''
+    key = ' '.join(frequency.lower().replace('-', ' ').split())
+    if key not in FREQUENCIES:
+        raise ValueError(f'Unsupported frequency: {frequency!r}')
+    return FREQUENCIES[key]
+
+
+def _day(value: date | str) -> np.datetime64:
+    if isinstance(value, date):
+        value = value.isoformat()
+    return np.datetime64(value[:10], 'D')
+
+
+def expand(anchor: date | str, frequency: str, start: date | str, end: date | str) -> np.ndarray:
+    '''Returns every occurrence from anchor on that falls within [start, end]'''
+    anchor, start, end = _day(anchor), _day(start), _day(end)
+    unit, step = parse_frequency(frequency)
+    start = max(start, anchor)
+    if end < start:
+        return np.empty(0, dtype='datetime64[D]')
+
+    if unit == 'D':
+        first = -(-(start - anchor).astype(int) // step)
+        last = (end - anchor).astype(int) // step
+        return anchor + step * np.arange(first, last + 1)
+
+    # Step whole months, clamping the anchor day to each month's length (Jan 31 -> Feb 28)
+    anchor_month = anchor.astype('datetime64[M]')
+    day_offset = (anchor - anchor_month.astype('datetime64[D]')).astype(int)
+    first = -(-(start.astype('datetime64[M]') - anchor_month).astype(int) // step)
+    last = (end.astype('datetime64[M]') - anchor_month).astype(int) // step
+
+    months = anchor_month + step * np.arange(first, last + 1)
+    month_starts = months.astype('datetime64[D]')
+    month_lengths = ((months + 1).astype('datetime64[D]') - month_starts).astype(int)
+    dates = month_starts + np.minimum(day_offset, month_lengths - 1)
+    return dates[(dates >= start) & (dates <= end)]
+
+
+class RecurringSchedule:
+    '''Cached expansion of recurring expenses over date ranges.
+
+    Each expense's occurrences are cached per range together with the fields
+    they depend on, so an edited expense is recomputed even if nobody calls
+    invalidate().
+    '''
+
+    parse_frequency = staticmethod(parse_frequency)
+
+    def __init__(self, max_ranges_per_expense: int = 8):
+        self.max_ranges_per_expense = max_ranges_per_expense
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(expense: RecurringExpense) -> tuple:
+        return (expense.frequency, expense.created_at)
+
+    def occurrences(self, expense: RecurringExpense, start: date | str, end: date | str) -> np.ndarray:
+        '''Returns the expense's occurrence dates within [start, end]'''
+        key = (str(start)[:10], str(end)[:10])
+        signature = self._signature(expense)
+
+        with self._lock:
+            entry = self._cache.get(expense.recurring_expense_id)
+            if entry is not None and entry[0] == signature and key in entry[1]:
+                return entry[1][key]
+
+        # Expenses saved without a timestamp recur from the start of the range
+        dates = expand(expense.created_at or start, expense.frequency, start, end)
+
+        with self._lock:
+            entry = self._cache.get(expense.recurring_expense_id)
+            if entry is None or entry[0] != signature:
+                entry = (signature, {})
+                self._cache[expense.recurring_expense_id] = entry
+            ranges = entry[1]
+            if len(ranges) >= self.max_ranges_per_expense:
+                ranges.pop(next(iter(ranges)))
+            ranges[key] = dates
+        return dates
+
+    def invalidate(self, recurring_expense_id: int | None = None) -> None:
+        '''Drops one expense's cached expansions, or all of them'''
+        with self._lock:
+            if recurring_expense_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(recurring_expense_id, None)
+
+    def projected_spend(
+        self, expenses: list[RecurringExpense], start: date | str, end: date | str,
+        skipped: list[RecurringExpense] | None = None
+    ) -> dict[str, float]:
+        '''Total projected spend per category within [start, end].
+
+        Expenses stored with a frequency the schedule cannot expand are left
+        out, and appended to skipped when it is given.
+        '''
+        totals = {}
+        for expense in expenses:
+            try:
+                count = len(self.occurrences(expense, start, end))
+            except ValueError:
+                if skipped is not None:
+                    skipped.append(expense)
+                continue
+            if count:
+                totals[expense.category] = totals.get(expense.category, 0.0) + count * expense.amount
+        return totals
+
+    def projection_vs_allocation(
+        self, expenses: list[RecurringExpense], allocations: dict[str, float],
+        start: date | str, end: date | str, skipped: list[RecurringExpense] | None = None
+    ) -> list[dict]:
+        '''Projected recurring spend per category next to its allocation for the range'''
+        days = int((_day(end) - _day(start)).astype(int)) + 1
+        months = max(days, 0) / AVERAGE_MONTH_DAYS
+
+        projected = self.projected_spend(expenses, start, end, skipped)
+        return [
+            {
+                'category': category,
+                'projected': round(total, 2),
+                'allocation': round(allocations.get(category, 0.0) * months, 2)
+            }
+            for category, total in sorted(projected.items())
+        ]
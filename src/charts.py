@@ -0,0 +1,52 @@
+'''Altair chart builders for the dashboards.
+
+Each chart reads its data from a JSON API URL (``data.url`` in the Vega-Lite
+spec), so the spec is small, does not depend on the ledger and the browser
+fetches the pre-aggregated numbers itself. Imported lazily by app.py as
+altair is slow to import and most routes never chart anything.
+'''
+import altair as alt
+
+from .instrumentation import metrics
+
+
+def _url_data(data_url: str, property: str = 'categories') -> alt.Data:
+    '''Data loaded by the browser from data_url; the rows live under property'''
+    return alt.Data(url=data_url, format=alt.DataFormat(type='json', property=property))
+
+
+def category_chart_json(data_url: str) -> str:
+    '''Bar chart of the monthly allocation per category'''
+    chart = alt.Chart(_url_data(data_url)).mark_bar().encode(
+        y=alt.Y('description:N', title='Category'),
+        x=alt.X('monthly_allocation:Q', title='Monthly Allocation')
+    ).properties(
+        title='Current Categories',
+        width=600
+    )
+    with metrics.timed('chart', 'category_chart_json.to_json'):
+        return chart.to_json()
+
+def last_seven_days_chart_json(data_url: str) -> str:
+    '''Bar chart of spending per category'''
+    chart = alt.Chart(_url_data(data_url)).mark_bar().encode(
+        x=alt.X('category:N', title='Category'),
+        y=alt.Y('spent:Q', title='Amount'),
+    ).properties(
+        width=800
+    )
+    with metrics.timed('chart', 'last_seven_days_chart_json.to_json'):
+        return chart.to_json()
+
+def current_month_chart_json(data_url: str) -> str:
+    '''Spent vs allocation bars per expense category'''
+    # Income and investments are already left out by the summary API
+    chart = alt.Chart(_url_data(data_url)).transform_fold(
+        ['spent', 'monthly_allocation'], as_=['variable', 'value']
+    ).mark_bar(opacity=0.5).encode(
+        y=alt.Y('category:N', title='Category'),
+        x=alt.X('value:Q', title='Amount   [$ USD]').stack(None),
+        color=alt.Color('variable:N', title=None)
+    )
+    with metrics.timed('chart', 'current_month_chart_json.to_json'):
+        return chart.to_json()
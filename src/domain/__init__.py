@@ -1,3 +1,5 @@
 from .transaction import Transaction  # noqa: F401
 from .category import Category  # noqa: F401
-from .recurring_expense import RecurringExpense  # noqa: F401
\ No newline at end of file
+from .recurring_expense import RecurringExpense  # noqa: F401
+from .categorisation_rule import CategorisationRule  # noqa: F401
+from .money import to_cents, from_cents  # noqa: F401
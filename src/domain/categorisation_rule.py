@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class CategorisationRule:
+    rule_id: int | None
+    pattern: str
+    category: str
+    is_regex: bool
+    min_amount: float | None
+    max_amount: float | None
+    priority: int
+    notes: str
+
+    def __repr__(self):
+        match = f'matches /{self.pattern}/' if self.is_regex else f'contains {self.pattern!r}'
+        return f'#{self.priority} {match} -> {self.category}'
@@ -0,0 +1,43 @@
+'''Money amounts are stored as whole cents and handled as float dollars.
+
+The database keeps INTEGER cents so sums are exact; Transaction, Category and
+RecurringExpense keep float dollars, converted with these helpers wherever
+rows are written or read.
+'''
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+
+def to_cents(amount: float | str | Decimal, exact: bool = False) -> int:
+    '''Whole cents in a dollar amount, rounded half away from zero.
+
+    exact=True rejects amounts with a fraction of a cent instead of rounding.
+    Raises ValueError for anything that is not a finite number, TypeError for a bool.
+    '''
+    if isinstance(amount, bool):
+        raise TypeError(f'Invalid amount: {amount!r}')
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, float) and abs(amount) < 1e13:
+        # Fast path: a float entered with at most two decimals is within rounding error of whole cents
+        scaled = amount * 100
+        cents = round(scaled)
+        if abs(scaled - cents) < 1e-6:
+            return cents
+
+    try:
+        value = amount if isinstance(amount, Decimal) else Decimal(str(amount).strip())
+    except InvalidOperation:
+        raise ValueError(f'Invalid amount: {amount!r}') from None
+    if not value.is_finite():
+        raise ValueError(f'Invalid amount: {amount!r}')
+
+    scaled = value * 100
+    cents = scaled.to_integral_value(ROUND_HALF_UP)
+    if exact and cents != scaled:
+        raise ValueError(f'Amount has a fraction of a cent: {amount!r}')
+    return int(cents)
+
+
+def from_cents(cents: int) -> float:
+    '''Dollar amount of a number of cents'''
+    return cents / 100
@@ -1,14 +1,14 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
 class Transaction:
-    def __init__(
-        self, transaction_id: int | None, amount: float, date: str, description: str, 
-        category: str, notes: str
-    ):
-        self.transaction_id = transaction_id
-        self.amount = amount
-        self.date = date
-        self.description = description
-        self.category = category
-        self.notes = notes 
+    transaction_id: int | None
+    amount: float
+    date: str
+    description: str
+    category: str
+    notes: str
 
     def __repr__(self):
         return f"Transaction(id={self.transaction_id}, amount={self.amount}, date='{self.date}', description='{self.description}', category='{self.category}', notes='{self.notes}')"
@@ -0,0 +1,3 @@
+from .csv_importer import parse_csv  # noqa: F401
+from .file_importer import detect_format, read_transactions  # noqa: F401
+from .ofx_importer import parse_ofx  # noqa: F401
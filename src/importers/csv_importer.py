@@ -0,0 +1,63 @@
+import csv
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+try:
+    from domain.transaction import Transaction
+except ModuleNotFoundError:
+    from ..domain.transaction import Transaction
+
+DEFAULT_COLUMNS = {
+    'amount': 'amount',
+    'date': 'date',
+    'description': 'description',
+    'category': 'category',
+    'notes': 'notes'
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d')
+
+
+def parse_amount(value: str) -> float:
+    '''Parses a bank formatted amount such as "$1,234.50" or "(12.00)"'''
+    value = value.strip().replace('$', '').replace(',', '')
+    if value.startswith('(') and value.endswith(')'):
+        value = '-' + value[1:-1]
+    return float(value)
+
+
+def parse_date(value: str) -> str:
+    '''Normalises a bank formatted date to YYYY-MM-DD'''
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise ValueError(f'Unrecognised date: {value!r}')
+
+
+def parse_csv(
+    lines: Iterable[str], columns: dict | None = None,
+    default_category: str = 'Uncategorized'
+) -> Iterator[Transaction]:
+    '''Yields transactions from CSV lines one row at a time.
+
+    ``columns`` maps transaction fields to header names in the file; fields
+    missing from the mapping fall back to the default column names.
+    '''
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    reader = csv.DictReader(lines)
+
+    for line_number, row in enumerate(reader, start=2):
+        try:
+            amount = parse_amount(row[columns['amount']])
+            date = parse_date(row[columns['date']])
+            description = row[columns['description']].strip()
+        except (KeyError, ValueError, AttributeError) as e:
+            raise ValueError(f'Line {line_number}: {e}') from e
+
+        category = (row.get(columns['category']) or '').strip() or default_category
+        notes = (row.get(columns['notes']) or '').strip() or None
+
+        yield Transaction(None, amount, date, description, category, notes)
@@ -0,0 +1,50 @@
+import os
+from collections.abc import Iterator
+from typing import IO
+
+try:
+    from domain.transaction import Transaction
+    from importers.csv_importer import parse_csv
+    from importers.ofx_importer import parse_ofx
+except ModuleNotFoundError:
+    from ..domain.transaction import Transaction
+    from .csv_importer import parse_csv
+    from .ofx_importer import parse_ofx
+
+FORMATS = {
+    '.csv': 'csv',
+    '.ofx': 'ofx',
+    '.qfx': 'ofx'
+}
+
+# Read OFX in fixed size chunks rather than lines; some banks emit it on one line
+OFX_CHUNK_SIZE = 64 * 1024
+
+
+def detect_format(filename: str) -> str:
+    '''Guesses the file format from its extension'''
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f'Unsupported import file type: {extension or filename}')
+    return FORMATS[extension]
+
+
+def read_transactions(
+    source: str | IO[str], file_format: str | None = None,
+    default_category: str = 'Uncategorized'
+) -> Iterator[Transaction]:
+    '''Streams transactions from a CSV or OFX file path or open text file'''
+    if isinstance(source, str):
+        file_format = file_format or detect_format(source)
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            yield from read_transactions(f, file_format, default_category)
+        return
+
+    file_format = (file_format or detect_format(getattr(source, 'name', ''))).lower()
+    if file_format == 'csv':
+        yield from parse_csv(source, default_category=default_category)
+    elif file_format == 'ofx':
+        chunks = iter(lambda: source.read(OFX_CHUNK_SIZE), '')
+        yield from parse_ofx(chunks, default_category=default_category)
+    else:
+        raise ValueError(f'Unsupported import format: {file_format}')
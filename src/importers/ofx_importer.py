@@ -0,0 +1,66 @@
+import re
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+try:
+    from domain.transaction import Transaction
+except ModuleNotFoundError:
+    from ..domain.transaction import Transaction
+
+# Matches "<TAG>value" and "</TAG>"; OFX 1.x (SGML) leaves leaf tags unclosed
+TAG_PATTERN = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _iter_tags(chunks: Iterable[str]) -> Iterator[tuple[bool, str, str]]:
+    '''Tokenises OFX text incrementally so files never need to fit in memory'''
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        # Only tokenise up to the last tag start; its value may continue in the next chunk
+        cut = buffer.rfind('<')
+        if cut <= 0:
+            continue
+        for match in TAG_PATTERN.finditer(buffer, 0, cut):
+            yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+        buffer = buffer[cut:]
+
+    for match in TAG_PATTERN.finditer(buffer):
+        yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+
+
+def _parse_ofx_date(value: str) -> str:
+    '''Converts an OFX timestamp (YYYYMMDD[HHMMSS[.XXX][TZ]]) to YYYY-MM-DD'''
+    return datetime.strptime(value[:8], '%Y%m%d').strftime('%Y-%m-%d')
+
+
+def parse_ofx(chunks: Iterable[str], default_category: str = 'Uncategorized') -> Iterator[Transaction]:
+    '''Yields transactions from the STMTTRN records of an OFX/QFX export'''
+    record = None
+
+    for closing, tag, value in _iter_tags(chunks):
+        if tag == 'STMTTRN':
+            if not closing:
+                record = {}
+                continue
+            if record is not None:
+                yield _to_transaction(record, default_category)
+            record = None
+        elif record is not None and not closing and value:
+            record[tag] = value
+
+    # Tolerate a final record whose closing tag is missing
+    if record:
+        yield _to_transaction(record, default_category)
+
+
+def _to_transaction(record: dict, default_category: str) -> Transaction:
+    try:
+        amount = float(record['TRNAMT'])
+        date = _parse_ofx_date(record['DTPOSTED'])
+    except (KeyError, ValueError) as e:
+        raise ValueError(f'Invalid OFX transaction {record.get("FITID", "")}: {e}') from e
+
+    description = record.get('NAME') or record.get('MEMO') or record.get('TRNTYPE', '')
+    notes = record.get('MEMO') if record.get('NAME') else None
+
+    return Transaction(None, amount, date, description, default_category, notes)
@@ -0,0 +1,292 @@
+'''Lightweight timing instrumentation with Prometheus text output.
+
+Repository and Application methods are wrapped by ``@instrument``, routes by
+``MetricsMiddleware`` and SQL statements by ``TimedConnection``. All of them
+check ``metrics.enabled`` (or ``metrics.trace_sql``) first and fall straight
+through when it is off, so disabled instrumentation costs one attribute test
+per call. Enable with PYTRANSACTIONS_METRICS=1 (and PYTRANSACTIONS_TRACE_SQL=1
+for per-statement timings) or ``metrics.enable()`` at runtime.
+'''
+import functools
+import inspect
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds; the last bucket (+Inf) is implicit
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CALL_METRIC = 'pytransactions_call_duration_seconds'
+HTTP_METRIC = 'pytransactions_http_request_duration_seconds'
+SQL_METRIC = 'pytransactions_sql_duration_seconds'
+
+HELP = {
+    CALL_METRIC: 'Repository, Application and chart call latency',
+    HTTP_METRIC: 'HTTP request latency per route',
+    SQL_METRIC: 'SQLite statement latency per phase'
+}
+
+
+def _flag(name: str) -> bool:
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Histogram:
+    '''Call count, total and max seconds, and per-bucket counts'''
+    __slots__ = ('count', 'counts', 'max', 'total')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+class Metrics:
+    '''Registry of latency histograms keyed by metric name and label values'''
+
+    def __init__(self, enabled: bool = False, trace_sql: bool = False):
+        self.enabled = enabled
+        self.trace_sql = trace_sql
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self, trace_sql: bool | None = None) -> None:
+        self.enabled = True
+        if trace_sql is not None:
+            self.trace_sql = trace_sql
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.trace_sql = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def observe(self, metric: str, labels: tuple[tuple[str, str], ...], seconds: float) -> None:
+        '''Records one observation; labels is a tuple of (name, value) pairs'''
+        with self._lock:
+            histogram = self._histograms.get((metric, labels))
+            if histogram is None:
+                histogram = self._histograms[(metric, labels)] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, component: str, name: str):
+        '''Times the enclosed block as a call of component/name'''
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(CALL_METRIC, (('component', component), ('name', name)), time.perf_counter() - start)
+
+    def snapshot(self) -> list[dict]:
+        '''One row per series, slowest total first'''
+        with self._lock:
+            items = [(key, h.count, h.total, h.max) for key, h in self._histograms.items()]
+        rows = [
+            {
+                'metric': metric,
+                **dict(labels),
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'mean_ms': round(total * 1000 / count, 3),
+                'max_ms': round(maximum * 1000, 3)
+            }
+            for (metric, labels), count, total, maximum in items
+        ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def render(self) -> str:
+        '''Prometheus text exposition format (version 0.0.4)'''
+        with self._lock:
+            items = sorted(
+                (key, list(h.counts), h.count, h.total) for key, h in self._histograms.items())
+
+        lines = []
+        current = None
+        for (metric, labels), counts, count, total in items:
+            if metric != current:
+                current = metric
+                lines.append(f'# HELP {metric} {HELP.get(metric, metric)}')
+                lines.append(f'# TYPE {metric} histogram')
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{metric}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{label_text}}} {total!r}')
+            lines.append(f'{metric}_count{{{label_text}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_gauge(metric: str, help_text: str, label: str, values: dict) -> str:
+    '''Prometheus text for one gauge with a single label'''
+    lines = [f'# HELP {metric} {help_text}', f'# TYPE {metric} gauge']
+    lines.extend(f'{metric}{{{label}="{_escape(key)}"}} {value}' for key, value in values.items())
+    return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics(_flag('PYTRANSACTIONS_METRICS'), _flag('PYTRANSACTIONS_TRACE_SQL'))
+
+
+def _timed_method(component: str, name: str, func):
+    labels = (('component', component), ('name', name))
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return await func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                metrics.observe(CALL_METRIC, labels, time.perf_counter() - start)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.observe(CALL_METRIC, labels, time.perf_counter() - start)
+    return wrapper
+
+
+def instrument(component: str):
+    '''Class decorator timing every public method defined on the class.
+
+    Generators are left alone (timing them would only measure their
+    creation); inherited methods are timed under the class defining them.
+    '''
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith('_') or not inspect.isfunction(value):
+                continue
+            if inspect.isgeneratorfunction(value) or inspect.isasyncgenfunction(value):
+                continue
+            setattr(cls, attr, _timed_method(component, f'{cls.__name__}.{attr}', value))
+        return cls
+    return decorate
+
+
+def _statement_label(sql: str) -> str:
+    '''Collapses whitespace and truncates, so a statement is one short label'''
+    label = ' '.join(sql.split())
+    return label if len(label) <= 160 else label[:157] + '...'
+
+
+class TimedCursor(sqlite3.Cursor):
+    '''Cursor recording execute and fetch time per statement'''
+
+    _statement = ''
+
+    def _observe(self, phase: str, start: float) -> None:
+        metrics.observe(
+            SQL_METRIC, (('statement', self._statement), ('phase', phase)), time.perf_counter() - start)
+
+    def execute(self, sql, parameters=()):
+        self._statement = _statement_label(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._observe('execute', start)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._statement = _statement_label(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._observe('execute', start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._observe('fetch', start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._observe('fetch', start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._observe('fetch', start)
+
+
+class TimedConnection(sqlite3.Connection):
+    '''Connection handing out TimedCursors while metrics and trace_sql are on'''
+
+    def cursor(self, factory=sqlite3.Cursor):
+        if metrics.enabled and metrics.trace_sql and factory is sqlite3.Cursor:
+            factory = TimedCursor
+        return super().cursor(factory)
+
+
+class MetricsMiddleware:
+    '''ASGI middleware timing each request under its route path template'''
+
+    def __init__(self, app):
+        self.app = app
+        self._paths = None
+
+    def _route_path(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        if self._paths is None:
+            self._paths = {
+                getattr(route, 'endpoint', None) or getattr(route, 'app', None): route.path
+                for route in scope['app'].routes
+            }
+        return self._paths.get(endpoint, getattr(endpoint, '__name__', 'unmatched'))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not metrics.enabled:
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            labels = (
+                ('method', scope['method']), ('route', self._route_path(scope)), ('status', str(status[0])))
+            metrics.observe(HTTP_METRIC, labels, time.perf_counter() - start)
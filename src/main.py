@@ -1,9 +1,12 @@
 from application import Application 
-from repositories import SQLiteTransactionRepository
+from repositories import create_repository
+from instrumentation import metrics
+
+PAGE_SIZE = 20
 
 if __name__ == "__main__":
     # Initialize SQLite repository
-    sqlite_repo = SQLiteTransactionRepository("transactions.db")
+    sqlite_repo = create_repository()
 
     # Create the application
     app = Application(sqlite_repo)
@@ -16,6 +19,15 @@ if __name__ == "__main__":
         print(' 3. Read transaction by id')
         print(' 4. Update transaction')
         print(' 5. Read last seven days')
+        print(' 6. Import transactions from file')
+        print(' 7. Show timing metrics')
+        print(' 8. Budget forecast')
+        print(' 9. Search transactions')
+        print('10. Export snapshot')
+        print('11. Recategorise transactions')
+        print('12. Split transaction')
+        print('13. Categorisation rules')
+        print('14. Apply categorisation rules')
         print('')
 
         resp = input("Enter action: ")
@@ -28,7 +40,7 @@ if __name__ == "__main__":
             amount = input('Enter amount:            ')
             date =   input('Enter date [YYYY-MM-DD]: ')
             desc =   input('Enter description:       ')
-            cat =    input('Enter category:          ')
+            cat =    input('Enter category [rules]:  ')
             notes =  input('Enter notes:             ')
 
             # Add transaction
@@ -43,7 +55,21 @@ if __name__ == "__main__":
                 print(f'\033[91mFailed to add transaction:\n    {e}\033[0m')
 
         elif resp == '2':
-            app.list_transactions()
+            # Page through the ledger instead of printing it all at once
+            after_id = None
+            while True:
+                page = app.list_transactions_page(PAGE_SIZE, after_id)
+                if not page:
+                    print('\033[93mNo more transactions\033[0m')
+                    break
+
+                print('\033[92m\nTransactions:\n' + '-' * 120 + '\033[0m')
+                for transaction in page:
+                    print(transaction)
+                after_id = page[-1].transaction_id
+
+                if len(page) < PAGE_SIZE or input('Enter for next page, q to stop: ').strip().lower() == 'q':
+                    break
 
         elif resp == '3':
             try:
@@ -75,11 +101,14 @@ if __name__ == "__main__":
             transaction.notes = input('Enter notes: ')
 
 
-            app.correct_transaction(
-                transaction.transaction_id, transaction.amount, 
-                transaction.date, transaction.description, 
-                transaction.category, transaction.notes
-            )
+            try:
+                app.correct_transaction(
+                    transaction.transaction_id, transaction.amount, 
+                    transaction.date, transaction.description, 
+                    transaction.category, transaction.notes
+                )
+            except ValueError as e:
+                print(f'\033[91mFailed to update transaction:\n    {e}\033[0m')
         
         elif resp == '5':
             '''Reads last seven days'''
@@ -88,4 +117,152 @@ if __name__ == "__main__":
             # Print 
             print('\033[92m\nTransactions:\n' + '-' * 120 + '\033[0m')
             for transaction in transactions:
-                print(transaction)
\ No newline at end of file
+                print(transaction)
+
+        elif resp == '6':
+            path = input('Enter CSV/OFX file path: ').strip()
+            chunk_size = input('Enter chunk size [1000]: ').strip()
+
+            try:
+                stats = app.import_transactions(path, chunk_size=int(chunk_size or 1000))
+                print(
+                    f"\033[92mImported {stats['rows']} transactions in {stats['seconds']:.2f}s "
+                    f"({stats['rows_per_second']:.0f} rows/s), {stats['categorised']} categorised by rules\033[0m"
+                )
+            except Exception as e:  # noqa: BLE001 - report any failure and return to the menu
+                print(f'\033[91mFailed to import transactions:\n    {e}\033[0m')
+
+        elif resp == '7':
+            if not metrics.enabled:
+                # Start recording now; timings show up from the next action on
+                metrics.enable(trace_sql=input('Also time SQL statements? [y/N]: ').strip().lower() == 'y')
+                print('\033[93mMetrics enabled; run some actions, then choose 7 again\033[0m')
+                continue
+
+            rows = metrics.snapshot()
+            print('\033[92m\nTimings (slowest total first):\n' + '-' * 120 + '\033[0m')
+            print(f"{'calls':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9}  name")
+            for row in rows:
+                name = row.get('name') or f"{row['statement']} [{row['phase']}]"
+                print(f"{row['count']:>8} {row['total_ms']:>10.2f} {row['mean_ms']:>9.3f} {row['max_ms']:>9.3f}  {name}")
+
+        elif resp == '8':
+            as_of = input('As of [YYYY-MM-DD, today]: ').strip() or None
+
+            try:
+                forecast = app.forecast_budget(as_of)
+            except Exception as e:  # noqa: BLE001 - report any failure and return to the menu
+                print(f'\033[91mFailed to forecast budget:\n    {e}\033[0m')
+                continue
+
+            print('\033[92m\nBudget forecast:\n' + '-' * 120 + '\033[0m')
+            print(
+                f"{'category':<20} {'allocation':>10} {'to date':>10} {'burn/day':>9} {'avg 30d':>9} "
+                f"{'avg 90d':>9} {'projected':>10} {'over':>10} {'vs LY':>8} {'YTD vs LY':>10}"
+            )
+            for row in forecast:
+                allocation = row['monthly_allocation']
+                over = row['projected_vs_allocation']
+                month_change = row['month_change_pct']
+                year_change = row['year_change_pct']
+                line = (
+                    f"{row['category'][:20]:<20} {allocation if allocation is not None else '':>10} "
+                    f"{row['month_to_date']:>10.2f} {row['daily_burn_rate']:>9.2f} "
+                    f"{row['rolling_30_day_average']:>9.2f} {row['rolling_90_day_average']:>9.2f} "
+                    f"{row['projected_month_end']:>10.2f} {over if over is not None else '':>10} "
+                    f"{f'{month_change}%' if month_change is not None else '':>8} "
+                    f"{f'{year_change}%' if year_change is not None else '':>10}"
+                )
+                # Red when heading over the allocation
+                print(f'\033[91m{line}\033[0m' if over is not None and over > 0 else line)
+
+        elif resp == '9':
+            query = input('Search for:                 ').strip()
+            start = input('From [YYYY-MM-DD, any]:     ').strip() or None
+            end =   input('To [YYYY-MM-DD, any]:       ').strip() or None
+            cat =   input('Category [any]:             ').strip() or None
+
+            try:
+                results = app.search_transactions(query, start, end, cat, limit=PAGE_SIZE)
+            except Exception as e:  # noqa: BLE001 - report any failure and return to the menu
+                print(f'\033[91mFailed to search transactions:\n    {e}\033[0m')
+                continue
+
+            print(f'\033[92m\nTop {len(results)} matches:\n--------------------------------\033[0m')
+            for transaction in results:
+                print(transaction)
+
+        elif resp == '10':
+            directory = input('Snapshot directory [snapshot]: ').strip() or 'snapshot'
+            file_format = input('Format for a new snapshot [parquet/arrow]: ').strip().lower() or None
+
+            try:
+                stats = app.export_snapshot(directory, file_format)
+                print(
+                    f"\033[92mExport {stats['export']}: {stats['transactions']} transactions written, "
+                    f"{stats['superseded']} superseded in {stats['seconds']:.2f}s\033[0m"
+                )
+            except Exception as e:  # noqa: BLE001 - report any failure and return to the menu
+                print(f'\033[91mFailed to export snapshot:\n    {e}\033[0m')
+
+        elif resp == '11':
+            query = input('Matching [any]:             ').strip() or None
+            start = input('From [YYYY-MM-DD, any]:     ').strip() or None
+            end =   input('To [YYYY-MM-DD, any]:       ').strip() or None
+            old =   input('Currently in [any]:         ').strip() or None
+            cat =   input('Move to category:           ').strip()
+
+            try:
+                app.recategorise_transactions(cat, query, start, end, old)
+            except Exception as e:  # noqa: BLE001 - report any failure and return to the menu
+                print(f'\033[91mFailed to recategorise transactions:\n    {e}\033[0m')
+
+        elif resp == '12':
+            try:
+                transaction_id = int(input('Enter transaction id to split: '))
+                transaction = app.find_transaction(transaction_id)
+                if transaction is None:
+                    continue
+
+                # Read parts until they account for the whole amount
+                parts, remaining = [], transaction.amount
+                while abs(remaining) >= 0.005:
+                    print(f'Remaining: ${remaining:.2f}')
+                    amount = float(input('Part amount:      ') or remaining)
+                    cat =          input('Part category:    ')
+                    desc =         input('Part description: ').strip() or None
+                    parts.append({'amount': amount, 'category': cat, 'description': desc})
+                    remaining = round(remaining - amount, 2)
+
+                app.split_transaction(transaction_id, parts)
+            except Exception as e:  # noqa: BLE001 - report any failure and return to the menu
+                print(f'\033[91mFailed to split transaction:\n    {e}\033[0m')
+
+        elif resp == '13':
+            print('\033[92m\nCategorisation rules (first match wins):\n--------------------------------\033[0m')
+            for rule in app.list_categorisation_rules():
+                print(f'{rule.rule_id:>4}  {rule}')
+
+            pattern = input('\nNew rule text [blank to skip]: ')
+            if not pattern.strip():
+                continue
+            is_regex = input('Regular expression? [y/N]:     ').strip().lower() == 'y'
+            cat =      input('Category:                      ')
+            low =      input('Minimum amount [any]:          ').strip() or None
+            high =     input('Maximum amount [any]:          ').strip() or None
+            priority = input('Priority [100]:                ').strip() or 100
+
+            try:
+                app.create_categorisation_rule(pattern, cat, is_regex, low, high, int(priority))
+            except Exception as e:  # noqa: BLE001 - report any failure and return to the menu
+                print(f'\033[91mFailed to add categorisation rule:\n    {e}\033[0m')
+
+        elif resp == '14':
+            overwrite = input('Also recategorise transactions that have a category? [y/N]: ').strip().lower() == 'y'
+            try:
+                app.apply_categorisation_rules(overwrite)
+            except Exception as e:  # noqa: BLE001 - report any failure and return to the menu
+                print(f'\033[91mFailed to apply categorisation rules:\n    {e}\033[0m')
+
+    # Commit any queued (write-behind) writes and close the pooled connections
+    sqlite_repo.close()
@@ -1,2 +1,7 @@
+from .async_sqlite_repository import AsyncSQLiteTransactionRepository  # noqa: F401
+from .cached_repository import CachedTransactionRepository  # noqa: F401
+from .connection_pool import SQLiteConnectionPool  # noqa: F401
+from .factory import create_repository  # noqa: F401
 from .repository import TransactionRepository  # noqa: F401
-from .sqlite_repository import SQLiteTransactionRepository  # noqa: F401
\ No newline at end of file
+from .sqlite_repository import SQLiteTransactionRepository  # noqa: F401
+from .write_queue import SQLiteWriteQueue  # noqa: F401
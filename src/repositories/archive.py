@@ -0,0 +1,91 @@
+'''Moves closed years of transactions out of the hot database into its archive.
+
+    python -m repositories.archive transactions.db [--keep-years 1] [--batch-size 10000] [--no-compact]
+
+Every year before the current one except the newest --keep-years moves to
+the archive database next to it (transactions.archive.db), a batch of rows
+per commit, so the app can keep running. Reads of the current month and of
+the years kept never open the archive; reads reaching further back fan out
+to it transparently (ATTACH and UNION ALL). The rollups behind the budget
+and analytics views stay in the hot database and still cover every year.
+
+Archived transactions are read only. Run the command again after importing
+transactions dated in an archived year to move them too, and after a crash
+to finish an interrupted move. Both databases are then compacted (search
+index merged, VACUUM), reclaiming the space the moved rows took.
+'''
+import argparse
+import os
+import time
+from datetime import date
+
+try:
+    from repositories.sqlite_repository import (
+        ARCHIVE_BATCH_SIZE,
+        SQLiteTransactionRepository,
+    )
+except ModuleNotFoundError:
+    from .sqlite_repository import ARCHIVE_BATCH_SIZE, SQLiteTransactionRepository
+
+
+def hot_years_before(repository: SQLiteTransactionRepository, year: int) -> list[int]:
+    '''Years before year with transactions in the hot database, oldest first'''
+    years, lower = [], ''
+    with repository.pool.connection() as conn:
+        # One index seek per year rather than a scan of every date
+        while True:
+            first = conn.execute(
+                'SELECT min(date) FROM transactions WHERE date >= ? AND date < ?', (lower, f'{year:04d}')
+            ).fetchone()[0]
+            if first is None:
+                return years
+            years.append(int(first[:4]))
+            lower = f'{years[-1] + 1:04d}'
+
+
+def archive(
+    db_path: str, keep_years: int = 1, batch_size: int = ARCHIVE_BATCH_SIZE, compact: bool = True
+) -> dict[int, int]:
+    '''Archives every closed year but the newest keep_years; returns the rows moved per year'''
+    repository = SQLiteTransactionRepository(db_path)
+    try:
+        years = hot_years_before(repository, date.today().year - keep_years)
+        moved = {year: repository.archive_year(year, batch_size) for year in years}
+        if compact and moved:
+            repository.compact()
+    finally:
+        repository.close()
+    return moved
+
+
+def file_size(path: str) -> int:
+    '''Bytes in a database and its WAL'''
+    return sum(os.path.getsize(p) for p in (path, path + '-wal') if os.path.exists(p))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('db_path')
+    parser.add_argument('--keep-years', type=int, default=1, help='closed years to keep in the hot database')
+    parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='rows moved per commit')
+    parser.add_argument('--no-compact', action='store_true', help='skip the VACUUM of both databases')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    before = file_size(args.db_path)
+    try:
+        moved = archive(args.db_path, args.keep_years, args.batch_size, not args.no_compact)
+    except Exception as e:  # noqa: BLE001 - report any failure with a non-zero exit
+        print(f'\033[91mArchiving failed:\n    {e}\033[0m')
+        raise SystemExit(1) from None
+
+    if not moved:
+        print(f'\033[93mNo closed years to archive in {args.db_path}\033[0m')
+        return
+    years = ', '.join(f'{year}: {rows}' for year, rows in moved.items())
+    print(f'\033[92mArchived {sum(moved.values())} transactions in {time.perf_counter() - start:.1f}s ({years})\033[0m')
+    print(f'{args.db_path}: {before / 2**20:.1f} MiB -> {file_size(args.db_path) / 2**20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
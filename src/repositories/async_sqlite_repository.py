@@ -0,0 +1,71 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from repositories.sqlite_repository import SQLiteTransactionRepository
+except ModuleNotFoundError:
+    from .sqlite_repository import SQLiteTransactionRepository
+
+
+class AsyncSQLiteTransactionRepository:
+    '''Awaitable facade over SQLiteTransactionRepository.
+
+    Exposes the same methods as the wrapped repository, but as coroutines
+    that run the blocking sqlite3 call on a dedicated worker thread pool, so
+    the FastAPI event loop keeps serving other requests meanwhile.
+    '''
+
+    def __init__(
+        self, repository: SQLiteTransactionRepository | str,
+        max_workers: int | None = None, **repository_options
+    ):
+        if isinstance(repository, str):
+            repository = SQLiteTransactionRepository(repository, **repository_options)
+        self.repository = repository
+
+        # One worker per pooled connection so workers never queue on the pool
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or repository.pool.max_connections,
+            thread_name_prefix='sqlite-repository'
+        )
+
+    async def run(self, func, *args, **kwargs):
+        '''Runs a blocking callable on the repository worker threads'''
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        # A property may query the database; it would run on the event loop
+        if isinstance(getattr(type(self.repository), name, None), property):
+            raise AttributeError(  # noqa: TRY004 - what __getattr__ must raise
+                f'{name} is a repository property; await run() to read it off the event loop')
+        attr = getattr(self.repository, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return method
+
+    async def data_version(self) -> int:
+        '''The repository's data_version, read on a worker thread as SQLite answers it with a query'''
+        return await self.run(lambda: self.repository.data_version)
+
+    async def iter_transactions(self, batch_size: int = 1000):
+        '''Streams every transaction, fetching each keyset page on a worker thread'''
+        after_id = None
+        while True:
+            page = await self.run(self.repository.read_transactions_page, batch_size, after_id)
+            if not page:
+                return
+            for transaction in page:
+                yield transaction
+            after_id = page[-1].transaction_id
+
+    def close(self) -> None:
+        '''Waits for queued work, then closes the pooled connections'''
+        self.executor.shutdown(wait=True)
+        self.repository.close()
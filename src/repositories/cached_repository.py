@@ -0,0 +1,170 @@
+from collections.abc import Iterable
+from concurrent.futures import Future
+
+try:
+    from domain.categorisation_rule import CategorisationRule
+    from domain.category import Category
+    from domain.recurring_expense import RecurringExpense
+    from domain.transaction import Transaction
+    from instrumentation import instrument
+    from repositories.repository import TransactionRepository
+    from repositories.sqlite_repository import (
+        ARCHIVE_BATCH_SIZE,
+        SQLiteTransactionRepository,
+    )
+except ModuleNotFoundError:
+    from ..domain.categorisation_rule import CategorisationRule
+    from ..domain.category import Category
+    from ..domain.recurring_expense import RecurringExpense
+    from ..domain.transaction import Transaction
+    from ..instrumentation import instrument
+    from .repository import TransactionRepository
+    from .sqlite_repository import ARCHIVE_BATCH_SIZE, SQLiteTransactionRepository
+
+
+def _committed(result):
+    '''Waits for a write-behind write to commit; plain results pass through'''
+    return result.result() if isinstance(result, Future) else result
+
+
+@instrument('repository')
+class CachedTransactionRepository(TransactionRepository):
+    '''Write-through in-memory cache in front of a SQLite repository.
+
+    The whole ledger is loaded once, then every read is served from the
+    in-memory indexes while writes go to SQLite first and are mirrored only
+    after they commit. Assumes this process is the database's only writer.
+    '''
+
+    def __init__(self, backend: SQLiteTransactionRepository | str, batch_size: int = 10000, **backend_options):
+        super().__init__()
+        if isinstance(backend, str):
+            backend = SQLiteTransactionRepository(backend, **backend_options)
+        self.backend = backend
+        self.batch_size = batch_size
+        self.warm()
+
+    @property
+    def pool(self):
+        return self.backend.pool
+
+    def pool_stats(self) -> dict:
+        return self.backend.pool_stats()
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def warm(self) -> None:
+        '''(Re)loads the cache from the backend'''
+        with self._lock:
+            self._reset()
+            self._mirror_transactions_after(None)
+            for category in self.backend.read_all_categories():
+                super().create_category(category)
+            for re in self.backend.read_all_recurring_expenses():
+                super().create_recurring_expense(re)
+            for rule in self.backend.read_all_categorisation_rules():
+                super().create_categorisation_rule(rule)
+
+    def _reset(self) -> None:
+        '''Empties the cache, keeping the data, categories and rules versions increasing'''
+        versions = self._data_version, self._categories_version, self._rules_version
+        lock = self._lock
+        TransactionRepository.__init__(self)
+        self._data_version, self._categories_version, self._rules_version = (v + 1 for v in versions)
+        self._lock = lock
+
+    def _mirror_transactions_after(self, after_id: int | None) -> None:
+        '''Copies every backend transaction with an id above after_id into memory'''
+        while True:
+            page = self.backend.read_transactions_page(self.batch_size, after_id)
+            if not page:
+                return
+            super().create_transactions(page, self.batch_size)
+            after_id = page[-1].transaction_id
+
+    def create_transaction(self, transaction: Transaction) -> int:
+        with self._lock:
+            # Wait out a write-behind backend: the cache mirrors committed rows only
+            _committed(self.backend.create_transaction(transaction))
+            return super().create_transaction(transaction)
+
+    def create_transactions(self, transactions: Iterable[Transaction], chunk_size: int = 1000) -> int:
+        '''Bulk inserts into SQLite, then mirrors the new rows with their assigned ids'''
+        with self._lock:
+            last_id = self._next_ids['transaction'] - 1
+            count = self.backend.create_transactions(transactions, chunk_size)
+            self._mirror_transactions_after(last_id)
+        return count
+
+    def create_category(self, category: Category):
+        with self._lock:
+            self.backend.create_category(category)
+            super().create_category(category)
+
+    def create_recurring_expense(self, re: RecurringExpense):
+        with self._lock:
+            self.backend.create_recurring_expense(re)
+            # Re-read so the cache holds the database's created_at timestamp
+            super().create_recurring_expense(self.backend.read_recurring_expense_by_id(re.recurring_expense_id))
+
+    def create_categorisation_rule(self, rule: CategorisationRule):
+        with self._lock:
+            self.backend.create_categorisation_rule(rule)
+            super().create_categorisation_rule(rule)
+
+    def update_categorisation_rule(self, rule: CategorisationRule) -> None:
+        with self._lock:
+            self.backend.update_categorisation_rule(rule)
+            super().update_categorisation_rule(rule)
+
+    def delete_categorisation_rule(self, rule_id: int) -> bool:
+        with self._lock:
+            deleted = self.backend.delete_categorisation_rule(rule_id)
+            super().delete_categorisation_rule(rule_id)
+            return deleted
+
+    def update_recurring_expense(self, re: RecurringExpense) -> None:
+        with self._lock:
+            self.backend.update_recurring_expense(re)
+            super().update_recurring_expense(re)
+
+    def update_transaction(self, t: Transaction) -> Transaction | None:
+        with self._lock:
+            stored = _committed(self.backend.update_transaction(t))
+            if stored is not None:
+                super().update_transaction(stored)
+            return stored
+
+    def update_transactions(self, transactions: Iterable[Transaction], require_all: bool = False) -> [Transaction]:
+        with self._lock:
+            # Mirror the rows as stored, so the cache holds what SQLite normalised
+            return super().update_transactions(self.backend.update_transactions(transactions, require_all))
+
+    def recategorise_transactions(
+        self, category: str, query: str | None = None, date_range=None, from_category: str | None = None
+    ) -> [Transaction]:
+        '''Recategorises in SQLite (whose full-text matching decides the rows), then mirrors the changed rows'''
+        with self._lock:
+            changed = self.backend.recategorise_transactions(category, query, date_range, from_category)
+            super().update_transactions(changed)
+            return changed
+
+    def split_transaction(self, transaction_id: int, parts: list[Transaction]) -> [Transaction]:
+        with self._lock:
+            first, *rest = self.backend.split_transaction(transaction_id, parts)
+            super().update_transaction(first)
+            for t in rest:
+                super().create_transaction(t)
+            return [first, *rest]
+
+    def archive_year(self, year: int, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        '''Moves a closed year to the archive in SQLite, then reloads the cache'''
+        with self._lock:
+            moved = self.backend.archive_year(year, batch_size)
+            self.warm()
+            return moved
+
+    def compact(self) -> None:
+        with self._lock:
+            self.backend.compact()
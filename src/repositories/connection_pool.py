@@ -0,0 +1,227 @@
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from instrumentation import TimedConnection
+except ModuleNotFoundError:
+    from ..instrumentation import TimedConnection
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def is_busy_error(error: Exception) -> bool:
+    '''True for the lock contention errors another process's write causes'''
+    return isinstance(error, sqlite3.OperationalError) and (
+        'locked' in str(error) or 'busy' in str(error))
+
+
+class SQLiteConnectionPool:
+    '''Thread-safe pool of persistent SQLite connections.
+
+    Connections are opened lazily (up to ``max_connections``), tuned with the
+    configured pragmas once, and then handed out again and again, so callers
+    stop paying for connect, schema parsing and statement preparation on
+    every query. Safe to share across the threadpool FastAPI runs sync work on.
+
+    Writers use ``write_connection``, which takes the database write lock up
+    front with BEGIN IMMEDIATE. SQLite waits up to ``busy_timeout`` seconds
+    for a lock held by another connection or process; if it is still busy the
+    BEGIN is retried ``write_retries`` times with jittered exponential backoff.
+
+    Databases registered with ``attach`` are ATTACHed to every connection
+    as it is borrowed, before any transaction starts.
+    '''
+
+    def __init__(
+        self, db_path: str, max_connections: int = 5, timeout: float = 30.0,
+        journal_mode: str = 'WAL', synchronous: str = 'NORMAL',
+        cache_size: int = -16000, mmap_size: int = 256 * 1024 * 1024,
+        cached_statements: int = 256, busy_timeout: float | None = None,
+        write_retries: int = 5, retry_delay: float = 0.05, max_retry_delay: float = 2.0
+    ):
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f'Unsupported journal_mode: {journal_mode}')
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f'Unsupported synchronous mode: {synchronous}')
+
+        self.db_path = db_path
+        # Every connection to ":memory:" is a separate database, so only one may exist
+        self.max_connections = 1 if db_path == ':memory:' else max_connections
+        self.timeout = timeout
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_size = int(cache_size)
+        self.mmap_size = int(mmap_size)
+        self.cached_statements = cached_statements
+        self.busy_timeout = timeout if busy_timeout is None else busy_timeout
+        self.write_retries = write_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        # Schema name -> path of the databases every connection attaches
+        self.attachments = {}
+        self._stats = {'opened': 0, 'open': 0, 'in_use': 0, 'hits': 0, 'waits': 0, 'busy_retries': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        '''Opens and tunes a new connection'''
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            # Times statements while PYTRANSACTIONS_TRACE_SQL is on, a plain cursor otherwise
+            factory=TimedConnection
+        )
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        conn.execute(f'PRAGMA journal_mode={self.journal_mode}')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA cache_size={self.cache_size}')
+        conn.execute(f'PRAGMA mmap_size={self.mmap_size}')
+        conn.attached = set()
+        return conn
+
+    def attach(self, schema: str, path: str, conn: sqlite3.Connection | None = None) -> None:
+        '''Attaches the database at path as schema to every connection, and to the borrowed conn right away'''
+        with self._lock:
+            self.attachments[schema] = path
+        if conn is not None:
+            self._attach(conn)
+
+    def _attach(self, conn: sqlite3.Connection) -> None:
+        '''ATTACHes the registered databases conn lacks; must run outside a transaction'''
+        if len(conn.attached) == len(self.attachments):
+            return
+        with self._lock:
+            missing = [(s, p) for s, p in self.attachments.items() if s not in conn.attached]
+        for schema, path in missing:
+            # Schema names come from code, never from input
+            conn.execute(f'ATTACH DATABASE ? AS {schema}', (path,))
+            conn.attached.add(schema)
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError('Connection pool is closed')
+
+        # Reuse an idle connection if there is one
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        if conn is not None:
+            with self._lock:
+                self._stats['hits'] += 1
+                self._stats['in_use'] += 1
+            return conn
+
+        # Otherwise open a new one while under the limit
+        with self._lock:
+            can_open = self._stats['open'] < self.max_connections
+            if can_open:
+                self._stats['open'] += 1
+                self._stats['opened'] += 1
+                self._stats['in_use'] += 1
+            else:
+                self._stats['waits'] += 1
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._stats['open'] -= 1
+                    self._stats['in_use'] -= 1
+                raise
+
+        # Pool exhausted, wait for a connection to be released
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f'No SQLite connection available after {self.timeout}s') from None
+        with self._lock:
+            self._stats['in_use'] += 1
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._stats['in_use'] -= 1
+            if self._closed:
+                self._stats['open'] -= 1
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        '''Borrows a connection; commits on success and rolls back on error'''
+        conn = self._acquire()
+        try:
+            self._attach(conn)
+            with conn:
+                yield conn
+        finally:
+            self._release(conn)
+
+    def _begin_immediate(self, conn: sqlite3.Connection) -> None:
+        '''Starts a write transaction, backing off and retrying while the database is busy'''
+        delay = self.retry_delay
+        for attempt in range(self.write_retries + 1):
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                return
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == self.write_retries:
+                    raise
+            with self._lock:
+                self._stats['busy_retries'] += 1
+            # Jitter so processes that collided do not retry in lockstep; not security sensitive
+            time.sleep(random.uniform(delay / 2, delay))  # nosec B311
+            delay = min(delay * 2, self.max_retry_delay)
+
+    @contextmanager
+    def write_connection(self):
+        '''Borrows a connection holding the write lock (BEGIN IMMEDIATE); commits on success and rolls back on error
+
+        Taking the lock before the first read means a write never has to be
+        upgraded mid-transaction, which fails at once when another process
+        committed in between instead of waiting on busy_timeout.
+        '''
+        conn = self._acquire()
+        try:
+            self._attach(conn)
+            self._begin_immediate(conn)
+            with conn:
+                yield conn
+        finally:
+            self._release(conn)
+
+    def stats(self) -> dict:
+        '''Returns a snapshot of the pool counters'''
+        with self._lock:
+            stats = dict(self._stats)
+        stats['idle'] = self._idle.qsize()
+        stats['max_connections'] = self.max_connections
+        return stats
+
+    def close(self) -> None:
+        '''Closes every idle connection; borrowed ones close when released'''
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._stats['open'] -= 1
@@ -0,0 +1,36 @@
+from datetime import date, datetime, timedelta
+
+
+def to_date(value: date | str) -> date:
+    '''Accepts a date or an ISO formatted (YYYY-MM-DD... or YYYY-MM) string'''
+    if isinstance(value, date):
+        return value
+    if len(value) == 7:
+        value += '-01'
+    return date.fromisoformat(value[:10])
+
+
+def normalise_date(value: date | str) -> str:
+    '''Returns a transaction date as YYYY-MM-DD, the only form stored.
+
+    Accepts a date, datetime or ISO formatted string (a time after the date
+    is dropped); raises ValueError for anything else, including partial dates.
+    '''
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    value = value.strip()
+    if len(value) > 10 and value[10] in 'T ':
+        value = value[:10]
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f'Invalid date {value!r}, expected YYYY-MM-DD') from None
+
+
+def month_bounds(day: date) -> tuple[date, date]:
+    '''Returns the first and last day of the month containing day'''
+    first = day.replace(day=1)
+    next_month = (first + timedelta(days=32)).replace(day=1)
+    return first, next_month - timedelta(days=1)
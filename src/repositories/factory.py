@@ -0,0 +1,43 @@
+'''Builds the SQLite repository from arguments or the environment.
+
+Every process serving the app (e.g. each uvicorn worker) calls
+``create_repository`` and so opens the same database with the same settings:
+
+- PYTRANSACTIONS_DB: database path (default transactions.db)
+- PYTRANSACTIONS_POOL_SIZE: pooled connections per process (default 5)
+- PYTRANSACTIONS_BUSY_TIMEOUT: seconds to wait for another writer's lock (default 30)
+- PYTRANSACTIONS_WRITE_QUEUE: 1 to commit writes in batches from a single writer thread
+- PYTRANSACTIONS_WRITE_BEHIND: 1 to queue transaction inserts/updates without waiting for the
+  commit; reads may miss a write for up to WRITE_BEHIND_FLUSH_INTERVAL seconds
+
+Explicit arguments take precedence over the environment.
+'''
+import os
+
+try:
+    from repositories.sqlite_repository import SQLiteTransactionRepository
+except ModuleNotFoundError:
+    from .sqlite_repository import SQLiteTransactionRepository
+
+DEFAULT_DB_PATH = 'transactions.db'
+
+
+def repository_options(env: dict | None = None) -> dict:
+    '''SQLiteTransactionRepository keyword arguments set in the environment'''
+    env = os.environ if env is None else env
+    options = {}
+    if env.get('PYTRANSACTIONS_POOL_SIZE'):
+        options['pool_size'] = int(env['PYTRANSACTIONS_POOL_SIZE'])
+    if env.get('PYTRANSACTIONS_BUSY_TIMEOUT'):
+        options['busy_timeout'] = float(env['PYTRANSACTIONS_BUSY_TIMEOUT'])
+    for name in ('write_queue', 'write_behind'):
+        value = env.get(f'PYTRANSACTIONS_{name.upper()}')
+        if value:
+            options[name] = value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return options
+
+
+def create_repository(db_path: str | None = None, **options) -> SQLiteTransactionRepository:
+    '''Opens the repository at db_path (default: PYTRANSACTIONS_DB, then transactions.db)'''
+    db_path = db_path or os.environ.get('PYTRANSACTIONS_DB') or DEFAULT_DB_PATH
+    return SQLiteTransactionRepository(db_path, **{**repository_options(), **options})
@@ -0,0 +1,173 @@
+'''Converts a database storing REAL dollar amounts to the integer cents schema.
+
+    python -m repositories.migrate transactions.db [--batch-size 10000]
+
+Stop the app first. Rows are copied into a new database a batch at a time,
+each batch its own write transaction, so memory use stays flat and the
+rollups and search index are built as the rows arrive. Amounts become whole
+cents and dates are normalised to YYYY-MM-DD (the bank formats the CSV
+importer reads are recognised). A row that cannot be converted stops the
+migration and is reported by id; fix it in the original and run the command
+again, which resumes after the last batch copied. Once every row is copied
+and the totals match, the original is kept as <db>.real-amounts.bak and the
+new database takes its place.
+'''
+import argparse
+import os
+import sqlite3
+import time
+
+try:
+    from domain.money import to_cents
+    from importers.csv_importer import parse_date
+    from repositories.date_ranges import normalise_date
+    from repositories.sqlite_repository import (
+        SCHEMA_VERSION,
+        SQLiteTransactionRepository,
+    )
+except ModuleNotFoundError:
+    from ..domain.money import to_cents
+    from ..importers.csv_importer import parse_date
+    from .date_ranges import normalise_date
+    from .sqlite_repository import SCHEMA_VERSION, SQLiteTransactionRepository
+
+BATCH_SIZE = 10000
+
+
+def migrated_date(value) -> str:
+    '''A legacy date as YYYY-MM-DD: ISO text, or one of the bank formats the importer reads'''
+    try:
+        return normalise_date(str(value))
+    except ValueError:
+        return parse_date(str(value))
+
+
+# Table: (legacy columns, new columns, legacy row -> new row), in copy order
+TABLES = {
+    'categories': (
+        'id, description, monthly_allocation, notes',
+        'id, description, monthly_allocation_cents, notes',
+        lambda row: (row[0], row[1], to_cents(row[2]), row[3])
+    ),
+    'recurring_expenses': (
+        'id, amount, frequency, category, description, notes, created_at',
+        'id, amount_cents, frequency, category, description, notes, created_at',
+        lambda row: (row[0], to_cents(row[1]), *row[2:])
+    ),
+    'transactions': (
+        'id, amount, date, description, category, notes',
+        'id, amount_cents, date, description, category, notes',
+        lambda row: (row[0], to_cents(row[1]), migrated_date(row[2]), *row[3:])
+    )
+}
+
+
+def needs_migration(db_path: str) -> bool:
+    '''Whether db_path holds tables older than SCHEMA_VERSION'''
+    conn = sqlite3.connect(db_path)
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions'").fetchone()
+        return exists is not None and conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+def copy_table(source, target: SQLiteTransactionRepository, table: str, batch_size: int) -> int:
+    '''Copies the rows of table not copied yet, one write transaction per batch; returns the rows copied'''
+    legacy_columns, columns, convert = TABLES[table]
+    select = f'SELECT {legacy_columns} FROM {table} WHERE id > ? ORDER BY id LIMIT ?'  # nosec B608
+    placeholders = ', '.join('?' for _ in columns.split(','))
+    insert = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'  # nosec B608
+
+    with target.pool.connection() as conn:
+        last_id = conn.execute(f'SELECT coalesce(max(id), 0) FROM {table}').fetchone()[0]  # nosec B608
+
+    copied = 0
+    while True:
+        rows = source.execute(select, (last_id, batch_size)).fetchall()
+        if not rows:
+            return copied
+
+        converted, errors = [], []
+        for row in rows:
+            try:
+                converted.append(convert(row))
+            except (TypeError, ValueError) as e:
+                errors.append(f'{table} id {row[0]}: {e}')
+        if errors:
+            raise ValueError('Rows that cannot be converted:\n    ' + '\n    '.join(errors[:20]))
+
+        target._write(lambda cursor, batch=converted: cursor.executemany(insert, batch))
+        last_id = rows[-1][0]
+        copied += len(rows)
+
+
+def check_totals(source, target: SQLiteTransactionRepository) -> None:
+    '''Raises if the copy lost rows or cents'''
+    # Rounded with to_cents, as the copy was; SQLite's round() disagrees on half cents such as 1.005
+    count = cents = 0
+    for (amount,) in source.execute('SELECT amount FROM transactions'):
+        count += 1
+        cents += to_cents(amount)
+    expected = (count, cents)
+    with target.pool.connection() as conn:
+        actual = conn.execute('SELECT count(*), coalesce(sum(amount_cents), 0) FROM transactions').fetchone()
+        rollup = conn.execute('SELECT coalesce(sum(total_cents), 0) FROM category_monthly_totals').fetchone()[0]
+    if expected != tuple(actual) or rollup != actual[1]:
+        raise RuntimeError(
+            f'Copy does not match the original: {expected[0]} rows / {expected[1]} cents expected, '
+            f'{actual[0]} rows / {actual[1]} cents copied, {rollup} cents in the rollup')
+
+
+def migrate(db_path: str, batch_size: int = BATCH_SIZE) -> dict:
+    '''Rewrites db_path with integer cents and YYYY-MM-DD dates; returns the rows copied per table'''
+    if not needs_migration(db_path):
+        return {}
+
+    backup = db_path + '.real-amounts.bak'
+    if os.path.exists(backup):
+        raise FileExistsError(f'{backup} already exists; move it away first')
+
+    staging = db_path + '.migrating'
+    source = sqlite3.connect(db_path)
+    try:
+        # Fold any WAL into the file, so the rename below moves every committed row
+        source.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        target = SQLiteTransactionRepository(staging)
+        try:
+            copied = {table: copy_table(source, target, table, batch_size) for table in TABLES}
+            check_totals(source, target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+    os.replace(db_path, backup)
+    os.replace(staging, db_path)
+    return copied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('db_path')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='rows per write transaction')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        copied = migrate(args.db_path, args.batch_size)
+    except Exception as e:  # noqa: BLE001 - report any failure with a non-zero exit
+        print(f'\033[91mMigration failed:\n    {e}\033[0m')
+        raise SystemExit(1) from None
+
+    if not copied:
+        print(f'\033[93m{args.db_path} is already at schema version {SCHEMA_VERSION}\033[0m')
+        return
+    counts = ', '.join(f'{rows} {table}' for table, rows in copied.items())
+    print(f'\033[92mMigrated {args.db_path} in {time.perf_counter() - start:.1f}s ({counts})\033[0m')
+    print(f'Original kept as {args.db_path}.real-amounts.bak')
+
+
+if __name__ == '__main__':
+    main()
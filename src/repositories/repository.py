@@ -1,23 +1,467 @@
-from typing import Optional, List
+import copy
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Iterator
+from dataclasses import fields
+from datetime import date, timedelta
+from itertools import islice
 
 try:
     from domain.transaction import Transaction
+    from domain.category import Category
+    from domain.recurring_expense import RecurringExpense
+    from domain.categorisation_rule import CategorisationRule
+    from domain.money import from_cents, to_cents
+    from repositories.date_ranges import month_bounds, normalise_date, to_date
+    from instrumentation import instrument
 except ModuleNotFoundError:
     from ..domain.transaction import Transaction
+    from ..domain.category import Category
+    from ..domain.recurring_expense import RecurringExpense
+    from ..domain.categorisation_rule import CategorisationRule
+    from ..domain.money import from_cents, to_cents
+    from .date_ranges import month_bounds, normalise_date, to_date
+    from ..instrumentation import instrument
 
+TRANSACTION_FIELDS = tuple(f.name for f in fields(Transaction))
+CATEGORY_FIELDS = tuple(f.name for f in fields(Category))
+
+
+def search_tokens(text: str) -> list[str]:
+    '''Case and accent folded words of text, like the FTS5 unicode61 tokenizer'''
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return re.findall(r'\w+', ''.join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+@instrument('repository')
 class TransactionRepository:
+    '''In-memory repository with the same interface as SQLiteTransactionRepository.
+
+    Transactions are stored as row tuples in a dict by id and indexed by
+    (date, id) in sorted lists, one for the whole ledger and one per category,
+    so range queries are a pair of bisects. Reads build fresh objects from the
+    tuples, so callers cannot change indexed fields behind the repository's back.
+    '''
+
     def __init__(self):
-        self.transactions = []
+        self._transactions = {}
+        self._date_index = []
+        self._category_index = {}
+        self._monthly_totals = {}
+        self._categories = {}
+        self._recurring_expenses = {}
+        self._rules = {}
+        self._next_ids = {'transaction': 1, 'category': 1, 'recurring_expense': 1, 'rule': 1}
+        self._data_version = 0
+        self._rules_version = 0
+        self._categories_version = 0
+        self._lock = threading.RLock()
+
+    @property
+    def data_version(self) -> int:
+        '''Counter incremented by every create_*/update_* call'''
+        return self._data_version
+
+    @property
+    def categories_version(self) -> int:
+        '''Counter incremented by every category change'''
+        return self._categories_version
+
+    @property
+    def rules_version(self) -> int:
+        '''Counter incremented by every categorisation rule change'''
+        return self._rules_version
+
+    def close(self) -> None:
+        '''Nothing to release; present for interface parity'''
+
+    def _assign_id(self, kind: str, current: int | None) -> int:
+        if current is None:
+            current = self._next_ids[kind]
+        self._next_ids[kind] = max(self._next_ids[kind], current + 1)
+        return current
+
+    def _index(self, t: Transaction) -> None:
+        # Stored as the SQLite repository would return it: whole cents and a YYYY-MM-DD date
+        cents = to_cents(t.amount)
+        day = normalise_date(t.date)
+        key = (day, t.transaction_id)
+        self._transactions[t.transaction_id] = (
+            t.transaction_id, from_cents(cents), day, t.description, t.category, t.notes)
+        insort(self._date_index, key)
+        insort(self._category_index.setdefault(t.category, []), key)
+        # Totals are kept in cents so they stay exact
+        totals = self._monthly_totals.setdefault((day[:7], t.category), [0, 0])
+        totals[0] += cents
+        totals[1] += 1
+
+    @staticmethod
+    def _normalised(t: Transaction) -> Transaction:
+        '''t as it would be stored; raises ValueError before any index is touched'''
+        return Transaction(
+            t.transaction_id, from_cents(to_cents(t.amount)), normalise_date(t.date), t.description, t.category, t.notes)
+
+    def _unindex(self, transaction_id: int) -> None:
+        _, amount, day, _, category, _ = self._transactions.pop(transaction_id)
+        key = (day, transaction_id)
+        del self._date_index[bisect_left(self._date_index, key)]
+        keys = self._category_index[category]
+        del keys[bisect_left(keys, key)]
+        totals = self._monthly_totals[(day[:7], category)]
+        totals[0] -= to_cents(amount)
+        totals[1] -= 1
+
+    def _rows(self, keys) -> [Transaction]:
+        transactions = self._transactions
+        return [Transaction(*transactions[i]) for _, i in keys]
+
+    def create_transaction(self, transaction: Transaction) -> int:
+        with self._lock:
+            transaction.transaction_id = self._assign_id('transaction', transaction.transaction_id)
+            self._index(transaction)
+            self._data_version += 1
+            return transaction.transaction_id
+
+    def create_transactions(self, transactions: Iterable[Transaction], chunk_size: int = 1000) -> int:
+        '''Adds transactions in chunks; returns the number added'''
+        count = 0
+        transactions = iter(transactions)
+        with self._lock:
+            while True:
+                chunk = list(islice(transactions, chunk_size))
+                if not chunk:
+                    break
+                for t in chunk:
+                    t.transaction_id = self._assign_id('transaction', t.transaction_id)
+                    self._index(t)
+                count += len(chunk)
+            self._data_version += 1
+        return count
+
+    def create_category(self, category: Category):
+        with self._lock:
+            category.category_id = self._assign_id('category', category.category_id)
+            self._categories[category.category_id] = copy.copy(category)
+            self._categories_version += 1
+            self._data_version += 1
+
+    def create_recurring_expense(self, re: RecurringExpense):
+        with self._lock:
+            re.recurring_expense_id = self._assign_id('recurring_expense', re.recurring_expense_id)
+            stored = copy.copy(re)
+            if stored.created_at is None:
+                stored.created_at = date.today().isoformat()
+            self._recurring_expenses[re.recurring_expense_id] = stored
+            self._data_version += 1
+
+    def create_categorisation_rule(self, rule: CategorisationRule):
+        with self._lock:
+            rule.rule_id = self._assign_id('rule', rule.rule_id)
+            self._rules[rule.rule_id] = copy.copy(rule)
+            self._rules_version += 1
+
+    def read_all_transactions(self) -> [Transaction]:
+        with self._lock:
+            return [Transaction(*row) for row in self._transactions.values()]
+
+    def read_transactions_page(self, page_size: int = 50, after_id: int | None = None) -> [Transaction]:
+        '''Returns up to page_size transactions in id order, starting after after_id'''
+        with self._lock:
+            ids = sorted(i for i in self._transactions if i > (after_id or 0))[:page_size]
+            return [Transaction(*self._transactions[i]) for i in ids]
+
+    def read_transactions_page_by_date(
+        self, page_size: int = 50, before_date: str | None = None, before_id: int | None = None
+    ) -> [Transaction]:
+        '''Returns up to page_size transactions, newest first, older than (before_date, before_id)'''
+        with self._lock:
+            if before_date is None:
+                stop = len(self._date_index)
+            else:
+                stop = bisect_left(self._date_index, (before_date, before_id if before_id is not None else -1))
+            keys = self._date_index[max(stop - page_size, 0):stop]
+            return self._rows(reversed(keys))
+
+    def iter_transactions(self, batch_size: int = 1000) -> Iterator[Transaction]:
+        '''Streams every transaction in id order'''
+        after_id = None
+        while True:
+            page = self.read_transactions_page(batch_size, after_id)
+            if not page:
+                return
+            yield from page
+            after_id = page[-1].transaction_id
+
+    def read_transaction_by_id(self, transaction_id: int) -> Transaction:
+        with self._lock:
+            row = self._transactions.get(transaction_id)
+            return Transaction(*row) if row is not None else None
+
+    @staticmethod
+    def _range(keys: list, lower: str, upper: str) -> list[tuple[str, int]]:
+        '''(date, id) keys with lower <= date < upper, oldest first'''
+        return keys[bisect_left(keys, (lower,)):bisect_left(keys, (upper,))]
+
+    def read_transactions_between(self, start: date | str, end: date | str) -> [Transaction]:
+        '''Returns transactions dated from start to end (inclusive), newest first'''
+        lower = to_date(start).isoformat()
+        upper = (to_date(end) + timedelta(days=1)).isoformat()
+        with self._lock:
+            return self._rows(reversed(self._range(self._date_index, lower, upper)))
+
+    def read_transactions_by_category(self, category: str) -> [Transaction]:
+        '''Returns a category's transactions, newest first'''
+        with self._lock:
+            return self._rows(reversed(self._category_index.get(category, [])))
+
+    def search_transactions(
+        self, query: str, date_range: tuple[date | str | None, date | str | None] | None = None,
+        category: str | None = None, limit: int = 50
+    ) -> [Transaction]:
+        '''Returns transactions whose description, notes or category contain every word of query as a
+        word prefix, newest first (a linear scan; there is no relevance ranking in memory)'''
+        words = search_tokens(query)
+        if not words:
+            return []
+        start, end = date_range or (None, None)
+        lower = to_date(start).isoformat() if start else ''
+        upper = (to_date(end) + timedelta(days=1)).isoformat() if end else '~'
+
+        with self._lock:
+            keys = self._category_index.get(category, []) if category else self._date_index
+            matches = []
+            for _, transaction_id in reversed(self._range(keys, lower, upper)):
+                row = self._transactions[transaction_id]
+                if self._matches(row, words):
+                    matches.append(Transaction(*row))
+                    if len(matches) == limit:
+                        break
+            return matches
+
+    @staticmethod
+    def _matches(row: tuple, words: list[str]) -> bool:
+        '''Whether every word is a prefix of a word in the row's description, notes or category'''
+        tokens = search_tokens(' '.join(filter(None, row[3:6])))
+        return all(any(token.startswith(word) for token in tokens) for word in words)
+
+    def read_transaction_columns(
+        self, start: date | str | None = None, end: date | str | None = None
+    ) -> dict[str, list]:
+        '''Returns transactions as column lists keyed by Transaction field name'''
+        lower = to_date(start).isoformat() if start else ''
+        upper = (to_date(end) + timedelta(days=1)).isoformat() if end else '~'
+        with self._lock:
+            if start is None and end is None:
+                rows = list(self._transactions.values())
+            else:
+                rows = [self._transactions[i] for _, i in self._range(self._date_index, lower, upper)]
+            columns = zip(*rows) if rows else ([] for _ in TRANSACTION_FIELDS)
+            return {name: list(column) for name, column in zip(TRANSACTION_FIELDS, columns)}
+
+    def read_last_seven_days(self) -> [Transaction]:
+        today = date.today()
+        return self.read_transactions_between(today - timedelta(days=7), today)
+
+    def read_current_month_transactions(self) -> [Transaction]:
+        first, last = month_bounds(date.today())
+        return self.read_transactions_between(first, last)
+
+    def read_category_month_summary(
+        self, month: date | str | None = None, exclude: Iterable[str] = ()
+    ) -> list[dict]:
+        '''Returns spent vs monthly allocation per category for a month, leaving out exclude'''
+        month = to_date(month or date.today()).strftime('%Y-%m')
+        exclude = set(exclude)
+        with self._lock:
+            allocations = [(c.description, c.monthly_allocation) for c in self._categories.values()]
+            return sorted(
+                (
+                    {'category': category, 'spent': -from_cents(self._monthly_totals[(month, category)][0]),
+                     'monthly_allocation': allocation}
+                    for category, allocation in allocations
+                    if category not in exclude and self._monthly_totals.get((month, category), (0, 0))[1] > 0
+                ),
+                key=lambda row: row['category']
+            )
+
+    def read_category_summary_between(
+        self, start: date | str, end: date | str, exclude: Iterable[str] = ()
+    ) -> list[dict]:
+        '''Returns spent, transaction count and monthly allocation per category from start to end (inclusive)'''
+        lower = to_date(start).isoformat()
+        upper = (to_date(end) + timedelta(days=1)).isoformat()
+        exclude = set(exclude)
+        totals = {}
+        with self._lock:
+            for _, i in self._range(self._date_index, lower, upper):
+                _, amount, _, _, category, _ = self._transactions[i]
+                if category in exclude:
+                    continue
+                spent = totals.setdefault(category, [0, 0])
+                spent[0] -= to_cents(amount)
+                spent[1] += 1
+            allocations = {c.description: c.monthly_allocation for c in self._categories.values()}
+        return [
+            {'category': category, 'spent': from_cents(spent), 'transaction_count': count,
+             'monthly_allocation': allocations.get(category)}
+            for category, (spent, count) in sorted(totals.items())
+        ]
+
+    def read_daily_category_totals(
+        self, start: date | str, end: date | str, exclude: Iterable[str] = ()
+    ) -> dict[str, list]:
+        '''Returns per day/category totals from start to end (inclusive) as columns'''
+        lower = to_date(start).isoformat()
+        upper = (to_date(end) + timedelta(days=1)).isoformat()
+        exclude = set(exclude)
+        totals = {}
+        with self._lock:
+            for day, i in self._range(self._date_index, lower, upper):
+                _, amount, _, _, category, _ = self._transactions[i]
+                if category in exclude:
+                    continue
+                total = totals.setdefault((day[:10], category), [0, 0])
+                total[0] += to_cents(amount)
+                total[1] += 1
+        return {
+            'day': [day for day, _ in totals],
+            'category': [category for _, category in totals],
+            'total': [from_cents(total) for total, _ in totals.values()],
+            'transaction_count': [count for _, count in totals.values()]
+        }
+
+    def read_all_categories(self) -> [Category]:
+        with self._lock:
+            return [copy.copy(c) for c in self._categories.values()]
+
+    def read_category_columns(self) -> dict[str, list]:
+        with self._lock:
+            rows = list(self._categories.values())
+            return {name: [getattr(c, name) for c in rows] for name in CATEGORY_FIELDS}
+
+    def read_all_recurring_expenses(self) -> [RecurringExpense]:
+        with self._lock:
+            return [copy.copy(re) for re in self._recurring_expenses.values()]
+
+    def read_recurring_expense_by_id(self, recurring_expense_id: int) -> RecurringExpense:
+        with self._lock:
+            re = self._recurring_expenses.get(recurring_expense_id)
+            return copy.copy(re) if re is not None else None
+
+    def read_all_categorisation_rules(self) -> [CategorisationRule]:
+        '''Returns every categorisation rule, in priority order'''
+        with self._lock:
+            return [copy.copy(r) for r in sorted(self._rules.values(), key=lambda r: (r.priority, r.rule_id))]
+
+    def update_categorisation_rule(self, rule: CategorisationRule) -> None:
+        with self._lock:
+            if rule.rule_id in self._rules:
+                self._rules[rule.rule_id] = copy.copy(rule)
+                self._rules_version += 1
+
+    def delete_categorisation_rule(self, rule_id: int) -> bool:
+        '''Deletes a categorisation rule; returns whether it existed'''
+        with self._lock:
+            if self._rules.pop(rule_id, None) is None:
+                return False
+            self._rules_version += 1
+            return True
+
+    def update_recurring_expense(self, re: RecurringExpense) -> None:
+        with self._lock:
+            stored = self._recurring_expenses.get(re.recurring_expense_id)
+            if stored is None:
+                return
+            stored.amount = re.amount
+            stored.frequency = re.frequency
+            stored.category = re.category
+            stored.description = re.description
+            stored.notes = re.notes
+            self._data_version += 1
+
+    def update_transaction(self, t: Transaction) -> Transaction | None:
+        # Normalised up front, so a bad value fails before the old row is unindexed
+        stored = self._normalised(t)
+        with self._lock:
+            if t.transaction_id not in self._transactions:
+                return None
+            self._unindex(t.transaction_id)
+            self._index(stored)
+            self._data_version += 1
+            return Transaction(*self._transactions[t.transaction_id])
+
+    def update_transactions(self, transactions: Iterable[Transaction], require_all: bool = False) -> [Transaction]:
+        '''Updates every transaction found, or none if any has a bad value; returns those found, as stored.
+
+        require_all=True raises ValueError, updating nothing, when any id is not found.
+        '''
+        # All validated before any index is touched, as the SQLite repository's single UPDATE is all or nothing
+        stored = {t.transaction_id: self._normalised(t) for t in transactions}
+        with self._lock:
+            found = [t for t in stored.values() if t.transaction_id in self._transactions]
+            if require_all and len(found) != len(stored):
+                missing = sorted(set(stored) - {t.transaction_id for t in found})
+                raise ValueError(f"Transactions not found: {', '.join(map(str, missing))}")
+            for t in found:
+                self._unindex(t.transaction_id)
+                self._index(t)
+            if found:
+                self._data_version += 1
+            return [Transaction(*self._transactions[t.transaction_id]) for t in found]
+
+    def recategorise_transactions(
+        self, category: str, query: str | None = None,
+        date_range: tuple[date | str | None, date | str | None] | None = None,
+        from_category: str | None = None
+    ) -> [Transaction]:
+        '''Moves every transaction matching all the filters to category; returns those changed'''
+        words = search_tokens(query) if query else []
+        start, end = date_range or (None, None)
+        lower = to_date(start).isoformat() if start else ''
+        upper = (to_date(end) + timedelta(days=1)).isoformat() if end else '~'
 
-    def create(self, transaction: Transaction):
-        '''Creates a new transaction'''
-        self.transactions.append(transaction)
+        with self._lock:
+            keys = self._category_index.get(from_category, []) if from_category else self._date_index
+            # Built from stored (already normalised) rows, so re-indexing them cannot fail halfway
+            changed = []
+            for _, transaction_id in self._range(keys, lower, upper):
+                row = self._transactions[transaction_id]
+                if row[4] != category and (not words or self._matches(row, words)):
+                    changed.append(Transaction(*row[:4], category, row[5]))
+            for t in changed:
+                self._unindex(t.transaction_id)
+                self._index(t)
+            self._data_version += 1
+            return changed
 
-    def read_all(self) -> List[Transaction]:
-        '''Gets all transactions'''
-        return self.transactions
+    def split_transaction(self, transaction_id: int, parts: list[Transaction]) -> [Transaction]:
+        '''Replaces a transaction with parts whose amounts add up to its amount (see the SQLite repository)'''
+        if len(parts) < 2:
+            raise ValueError('A split needs at least two parts')
+        with self._lock:
+            original = self._transactions.get(transaction_id)
+            if original is None:
+                raise ValueError(f'No transaction with id {transaction_id}')
+            _, amount, day, description, _, notes = original
+            stored = [
+                # Normalised up front, so a bad part fails before anything is unindexed
+                Transaction(None, from_cents(to_cents(p.amount)), normalise_date(p.date or day),
+                            p.description or description, p.category, notes if p.notes is None else p.notes)
+                for p in parts
+            ]
+            total = sum(to_cents(t.amount) for t in stored)
+            if total != to_cents(amount):
+                raise ValueError(f'Split parts add up to {from_cents(total):.2f}, not the original {amount:.2f}')
 
-    def read_by_id(self, transaction_id: int) -> Optional[Transaction]:
-        '''Returns a transaction by transaction id'''
-        return next((t for t in self.transactions if t.transaction_id == transaction_id), None)
+            stored[0].transaction_id = transaction_id
+            self._unindex(transaction_id)
+            for t in stored:
+                t.transaction_id = self._assign_id('transaction', t.transaction_id)
+                self._index(t)
+            self._data_version += 1
 
+            for part, t in zip(parts, stored):
+                part.transaction_id = t.transaction_id
+            return [Transaction(*self._transactions[t.transaction_id]) for t in stored]
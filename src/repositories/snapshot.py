@@ -0,0 +1,364 @@
+'''Columnar Parquet/Arrow snapshots of the ledger for offline analytics.
+
+    python -m repositories.snapshot transactions.db snapshot/ [--format arrow]
+
+``export_snapshot`` streams the transactions table in chunks into a dataset
+partitioned by month, next to single files for the small tables:
+
+    snapshot/
+        manifest.json
+        transactions/month=2024-03/part-1-0.parquet
+        changes/part-2.parquet
+        categories.parquet
+        recurring_expenses.parquet
+
+The first export writes every transaction. Later ones append only what
+changed since the previous one: transactions with a higher id than it saw,
+plus those updated or deleted since (from the transaction_changes log). Every
+row records the export that wrote it and changes/ lists the ids each export
+superseded, so ``load_snapshot`` keeps the latest version of each row and
+drops deleted ones. categories and recurring_expenses are rewritten whole.
+
+``load_snapshot`` memory-maps the files, reads only the months asked for and
+returns a pandas DataFrame; ``SnapshotRepository`` serves the budget
+analytics from it. Imported lazily, as it needs pyarrow.
+'''
+import argparse
+import gc
+import glob
+import json
+import os
+import time
+from collections.abc import Iterable
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+try:
+    from domain.category import Category
+    from domain.money import from_cents
+    from repositories.date_ranges import to_date
+    from repositories.sqlite_repository import SQLiteTransactionRepository, union_all
+except ModuleNotFoundError:
+    from ..domain.category import Category
+    from ..domain.money import from_cents
+    from .date_ranges import to_date
+    from .sqlite_repository import SQLiteTransactionRepository, union_all
+
+# Dataset format and file extension per export format
+FORMATS = {'parquet': ('parquet', 'parquet'), 'arrow': ('ipc', 'arrow')}
+
+TRANSACTION_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('amount_cents', pa.int64()),
+    ('date', pa.date32()),
+    ('description', pa.string()),
+    ('category', pa.string()),
+    ('notes', pa.string()),
+    ('export', pa.int32()),                   # Export that wrote this version of the row
+    ('month', pa.string())                    # Partition key, stored in the directory name only
+])
+CHANGES_SCHEMA = pa.schema([('id', pa.int64()), ('export', pa.int32())])
+PARTITIONING = ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive')
+
+# Small tables rewritten whole by every export: (columns, schema)
+TABLES = {
+    'categories': (
+        'id, description, monthly_allocation_cents, notes',
+        pa.schema([('id', pa.int64()), ('description', pa.string()),
+                   ('monthly_allocation_cents', pa.int64()), ('notes', pa.string())])
+    ),
+    'recurring_expenses': (
+        'id, amount_cents, frequency, category, description, notes, created_at',
+        pa.schema([('id', pa.int64()), ('amount_cents', pa.int64()), ('frequency', pa.string()),
+                   ('category', pa.string()), ('description', pa.string()), ('notes', pa.string()),
+                   ('created_at', pa.string())])
+    )
+}
+
+CHUNK_SIZE = 100_000
+
+
+def read_manifest(directory: str) -> dict:
+    '''The snapshot's manifest, or {} if nothing was exported to directory yet'''
+    try:
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(directory: str, manifest: dict) -> None:
+    # Replaced atomically, so an interrupted export leaves the previous snapshot valid
+    path = os.path.join(directory, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _transaction_batches(cursor, export: int, chunk_size: int):
+    '''Arrow record batches of chunk_size rows from a transactions cursor'''
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        ids, cents, dates, descriptions, categories, notes = zip(*rows)
+        dates = pa.array(dates, pa.string())
+        yield pa.RecordBatch.from_arrays([
+            pa.array(ids, pa.int64()),
+            pa.array(cents, pa.int64()),
+            dates.cast(pa.date32()),
+            pa.array(descriptions, pa.string()),
+            pa.array(categories, pa.string()),
+            pa.array(notes, pa.string()),
+            pa.repeat(pa.scalar(export, pa.int32()), len(rows)),
+            pc.utf8_slice_codeunits(dates, 0, 7)
+        ], schema=TRANSACTION_SCHEMA)
+
+
+def _write_table(table: pa.Table, path: str, file_format: str) -> None:
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, path + '.tmp')
+    else:
+        from pyarrow import feather
+        feather.write_feather(table, path + '.tmp', compression='uncompressed')
+    os.replace(path + '.tmp', path)
+
+
+def export_snapshot(
+    repository: SQLiteTransactionRepository, directory: str, file_format: str | None = None,
+    chunk_size: int = CHUNK_SIZE
+) -> dict:
+    '''Exports what changed since the last export to directory; returns the rows written.
+
+    file_format is 'parquet' or 'arrow' (uncompressed Arrow IPC, fastest to
+    memory-map) and defaults to the snapshot's existing format, else parquet.
+    '''
+    start = time.perf_counter()
+    manifest = read_manifest(directory)
+    file_format = file_format or manifest.get('format', 'parquet')
+    if file_format not in FORMATS:
+        raise ValueError(f'Unsupported snapshot format: {file_format}')
+    if manifest and manifest['format'] != file_format:
+        raise ValueError(f"{directory} holds a {manifest['format']} snapshot; export to a new directory")
+    dataset_format, extension = FORMATS[file_format]
+
+    export = manifest.get('exports', 0) + 1
+    last_id = manifest.get('last_id', 0)
+    change_seq = manifest.get('change_seq', 0)
+    os.makedirs(os.path.join(directory, 'changes'), exist_ok=True)
+    # Files of an export interrupted before its manifest was written
+    for path in glob.glob(os.path.join(directory, 'transactions', '*', f'part-{export}-*')):
+        os.remove(path)
+
+    with repository.pool.connection() as conn:
+        # Archived years included; attached first, as ATTACH cannot run in a transaction
+        schemas = repository.partitions(conn)
+        # One read transaction, so every table comes from the same point in time
+        conn.execute('BEGIN')
+        try:
+            max_id = conn.execute(union_all(
+                'SELECT coalesce(max(id), 0) FROM {schema}.transactions', schemas, 'ORDER BY 1 DESC LIMIT 1'
+            )).fetchone()[0]
+            max_seq = conn.execute('SELECT coalesce(max(seq), 0) FROM transaction_changes').fetchone()[0]
+
+            # Superseded ids only matter once an earlier export holds rows
+            changed = []
+            if manifest:
+                changed = [row[0] for row in conn.execute(
+                    'SELECT DISTINCT id FROM transaction_changes WHERE seq > ? AND seq <= ?',
+                    (change_seq, max_seq))]
+
+            # Rows change only in the hot database, but one changed and then archived is read from the archive
+            cursor = conn.execute(
+                union_all(
+                    '''
+                    SELECT id, amount_cents, date, description, category, notes
+                    FROM {schema}.transactions
+                    WHERE id > :last_id
+                       OR id IN (SELECT id FROM main.transaction_changes WHERE seq > :seq AND seq <= :max_seq)
+                    ''',
+                    schemas,
+                    'ORDER BY id'
+                ),
+                {'last_id': last_id, 'seq': change_seq if manifest else max_seq, 'max_seq': max_seq}
+            )
+            written = 0
+
+            def counted(batches):
+                nonlocal written
+                for batch in batches:
+                    written += batch.num_rows
+                    yield batch
+
+            # As in _to_columns: the fetched row tuples hold no cycles, but
+            # millions of them would trigger repeated full GC passes
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                ds.write_dataset(
+                    counted(_transaction_batches(cursor, export, chunk_size)),
+                    os.path.join(directory, 'transactions'),
+                    schema=TRANSACTION_SCHEMA,
+                    format=dataset_format,
+                    partitioning=PARTITIONING,
+                    basename_template=f'part-{export}-{{i}}.{extension}',
+                    existing_data_behavior='overwrite_or_ignore',
+                    # Rows arrive in id order, spread over every month; buffer them into sizeable row groups
+                    min_rows_per_group=min(chunk_size, 16_384),
+                    max_rows_per_group=chunk_size
+                )
+            finally:
+                if gc_enabled:
+                    gc.enable()
+
+            if changed:
+                changes = pa.table(
+                    [pa.array(changed, pa.int64()), pa.repeat(pa.scalar(export, pa.int32()), len(changed))],
+                    schema=CHANGES_SCHEMA)
+                _write_table(changes, os.path.join(directory, 'changes', f'part-{export}.{extension}'), file_format)
+
+            for table, (columns, schema) in TABLES.items():
+                rows = conn.execute(f'SELECT {columns} FROM {table} ORDER BY id').fetchall()  # nosec B608
+                arrays = [pa.array(values, field.type) for values, field in
+                          zip(zip(*rows) if rows else [[]] * len(schema), schema)]
+                _write_table(pa.table(arrays, schema=schema), os.path.join(directory, f'{table}.{extension}'), file_format)
+        finally:
+            conn.rollback()
+
+    stats = {
+        'export': export,
+        'transactions': written,
+        'superseded': len(changed),
+        'seconds': round(time.perf_counter() - start, 3),
+        'exported_at': datetime.now().isoformat(timespec='seconds')
+    }
+    _write_manifest(directory, {
+        'format': file_format,
+        'exports': export,
+        'last_id': max_id,
+        'change_seq': max_seq,
+        'history': (manifest.get('history', []) + [stats])[-50:]
+    })
+    return stats
+
+
+def _dataset(path: str, file_format: str, **options) -> ds.Dataset:
+    # use_mmap maps the files instead of reading them into memory
+    filesystem = fs.LocalFileSystem(use_mmap=True)
+    return ds.dataset(path, format=FORMATS[file_format][0], filesystem=filesystem, **options)
+
+
+def load_snapshot(directory: str, start: date | str | None = None, end: date | str | None = None):
+    '''Returns the snapshot's transactions from start to end (inclusive, both optional) as a DataFrame.
+
+    Columns are the Transaction fields (amount in dollars) plus the exact
+    amount_cents; rows are unsorted.
+    '''
+    manifest = read_manifest(directory)
+    if not manifest:
+        raise FileNotFoundError(f'No snapshot in {directory}')
+    file_format = manifest['format']
+
+    # Months prune whole partitions, the date bounds the rows within the end months
+    condition = None
+    if start:
+        start = to_date(start)
+        condition = (ds.field('month') >= start.strftime('%Y-%m')) & (ds.field('date') >= pa.scalar(start))
+    if end:
+        end = to_date(end)
+        upper = (ds.field('month') <= end.strftime('%Y-%m')) & (ds.field('date') <= pa.scalar(end))
+        condition = upper if condition is None else condition & upper
+
+    table = _dataset(
+        os.path.join(directory, 'transactions'), file_format, partitioning=PARTITIONING
+    ).to_table(columns=[field.name for field in TRANSACTION_SCHEMA][:-1], filter=condition)
+
+    # Drop row versions superseded by a later export's update or delete
+    changes_path = os.path.join(directory, 'changes')
+    if os.listdir(changes_path):
+        latest = _dataset(changes_path, file_format, schema=CHANGES_SCHEMA).to_table()
+        latest = latest.group_by('id').aggregate([('export', 'max')])
+        table = table.join(latest, 'id', join_type='left outer')
+        superseded = table['export_max']
+        table = table.filter(pc.or_kleene(pc.is_null(superseded), pc.greater_equal(table['export'], superseded)))
+        table = table.drop_columns(['export_max'])
+
+    frame = table.drop_columns(['export']).to_pandas(date_as_object=False)
+    frame.insert(1, 'amount', frame['amount_cents'] / 100)
+    return frame.rename(columns={'id': 'transaction_id'})
+
+
+def load_snapshot_table(directory: str, table: str):
+    '''Returns the snapshot's categories or recurring_expenses as a DataFrame'''
+    if table not in TABLES:
+        raise ValueError(f'Unknown snapshot table: {table}')
+    manifest = read_manifest(directory)
+    if not manifest:
+        raise FileNotFoundError(f'No snapshot in {directory}')
+    file_format = manifest['format']
+    path = os.path.join(directory, f'{table}.{FORMATS[file_format][1]}')
+    return _dataset(path, file_format).to_table().to_pandas()
+
+
+class SnapshotRepository:
+    '''Read-only view of a snapshot with the repository reads BudgetAnalytics makes.
+
+    Lets the forecasts run over the last export instead of the live database.
+    '''
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @property
+    def data_version(self) -> int:
+        '''Exports written so far, so a new export invalidates cached reports'''
+        return read_manifest(self.directory).get('exports', 0)
+
+    def read_daily_category_totals(
+        self, start: date | str, end: date | str, exclude: Iterable[str] = ()
+    ) -> dict[str, list]:
+        '''Per day/category totals from start to end (inclusive) as columns, like the SQLite rollup'''
+        frame = load_snapshot(self.directory, start, end)
+        frame = frame[~frame['category'].isin(list(exclude))]
+        daily = frame.groupby(['date', 'category'], sort=False)['amount_cents'].agg(['sum', 'count']).reset_index()
+        return {
+            'day': daily['date'].dt.strftime('%Y-%m-%d').tolist(),
+            'category': daily['category'].tolist(),
+            'total': (daily['sum'] / 100).tolist(),
+            'transaction_count': daily['count'].tolist()
+        }
+
+    def read_all_categories(self) -> [Category]:
+        frame = load_snapshot_table(self.directory, 'categories')
+        return [
+            Category(row.id, row.description, from_cents(row.monthly_allocation_cents), row.notes)
+            for row in frame.itertuples(index=False)
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('db_path')
+    parser.add_argument('directory')
+    parser.add_argument('--format', choices=sorted(FORMATS), help='parquet unless the snapshot exists')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows fetched per batch')
+    args = parser.parse_args()
+
+    repository = SQLiteTransactionRepository(args.db_path)
+    try:
+        stats = export_snapshot(repository, args.directory, args.format, args.chunk_size)
+    finally:
+        repository.close()
+    print(
+        f"\033[92mExport {stats['export']}: {stats['transactions']} transactions written, "
+        f"{stats['superseded']} superseded in {stats['seconds']:.2f}s\033[0m"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,275 @@
+import gc
+import json
+import os
 import sqlite3
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future
+from dataclasses import fields
+from datetime import date, timedelta
+from itertools import islice
 
 try:
     from domain.transaction import Transaction 
     from domain.category import Category
     from domain.recurring_expense import RecurringExpense
+    from domain.categorisation_rule import CategorisationRule
+    from domain.money import from_cents, to_cents
+    from repositories.connection_pool import SQLiteConnectionPool
+    from repositories.write_queue import Insert, SQLiteWriteQueue
+    from repositories.date_ranges import month_bounds, normalise_date, to_date
+    from instrumentation import instrument
 except ModuleNotFoundError:
     from ..domain.transaction import Transaction
     from ..domain.category import Category
     from ..domain.recurring_expense import RecurringExpense
+    from ..domain.categorisation_rule import CategorisationRule
+    from ..domain.money import from_cents, to_cents
+    from .connection_pool import SQLiteConnectionPool
+    from .write_queue import Insert, SQLiteWriteQueue
+    from .date_ranges import month_bounds, normalise_date, to_date
+    from ..instrumentation import instrument
 
+# PRAGMA user_version of the current schema: 2 stores integer cents and YYYY-MM-DD dates
+SCHEMA_VERSION = 2
+
+TRANSACTION_FIELDS = tuple(f.name for f in fields(Transaction))
+CATEGORY_FIELDS = tuple(f.name for f in fields(Category))
+
+# RETURNING needs SQLite 3.35 (UPDATE ... FROM, 3.33)
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+# Most recent matches ranked per search
+SEARCH_CANDIDATES = 10000
+
+INSERT_TRANSACTION = '''
+    INSERT INTO transactions
+        (amount_cents, date, description, category, notes)
+    VALUES
+        (?, ?, ?, ?, ?)
+'''
+
+# Write-behind batches commit at this many writes or once the oldest is this many seconds old
+WRITE_BEHIND_FLUSH_SIZE = 1000
+WRITE_BEHIND_FLUSH_INTERVAL = 0.05
+
+# Closed years moved out of the hot database live in an archive database attached under this name
+ARCHIVE_SCHEMA = 'archive'
+ARCHIVE_BATCH_SIZE = 10000
+
+# The hot database alone: every year not archived, and always the current one
+HOT = ('main',)
+
+def archive_path_for(db_path: str) -> str | None:
+    '''The archive database kept next to db_path (transactions.db -> transactions.archive.db); None for :memory:'''
+    if db_path == ':memory:':
+        return None
+    return os.path.splitext(db_path)[0] + '.archive.db'
+
+def _bound_year(bound: str, open_end: int) -> int:
+    '''The year of an ISO date bound; open_end for '' / '~' or anything not starting with a year'''
+    year = bound[:4]
+    return int(year) if len(year) == 4 and year.isdigit() else open_end
+
+def union_all(select: str, schemas: tuple[str, ...], order_by: str = '') -> str:
+    '''select, reading {schema}.transactions, run against each schema and combined with UNION ALL.
+
+    order_by (e.g. "ORDER BY id LIMIT :limit") ends each schema's select and
+    then the combined rows, so every schema contributes only what the whole
+    can use. Use named parameters: each schema's select binds the same ones.
+    '''
+    if len(schemas) == 1:
+        return f'{select.format(schema=schemas[0])} {order_by}'
+    # Schema names are constants of this module, never input
+    arms = [f'SELECT * FROM ({select.format(schema=schema)} {order_by})' for schema in schemas]  # nosec B608
+    return '\nUNION ALL\n'.join(arms) + f' {order_by}'
+
+def match_expression(query: str) -> str:
+    '''Turns free text into an FTS5 query: every word, quoted, as a prefix'''
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in query.split())
+
+def index_pending_search(cursor) -> None:
+    '''Adds transactions inserted since the last call to the full-text index'''
+    cursor.execute('''
+        INSERT INTO transactions_fts (rowid, description, notes, category)
+        SELECT t.id, t.description, t.notes, t.category
+        FROM transactions_fts_pending p
+        JOIN transactions t ON t.id = p.id;
+    ''')
+    cursor.execute('DELETE FROM transactions_fts_pending')
+
+def transaction_params(t: Transaction) -> tuple:
+    '''INSERT_TRANSACTION parameters: the amount in cents and the date normalised to YYYY-MM-DD'''
+    return (to_cents(t.amount), normalise_date(t.date), t.description, t.category, t.notes)
+
+def _transaction_row(cursor, row) -> Transaction:
+    '''sqlite3 row factory building Transactions straight from result rows'''
+    return Transaction(*row)
+
+def _category_row(cursor, row) -> Category:
+    return Category(*row)
+
+def _recurring_expense_row(cursor, row) -> RecurringExpense:
+    return RecurringExpense(*row)
+
+def _categorisation_rule_row(cursor, row) -> CategorisationRule:
+    rule_id, pattern, category, is_regex, *rest = row
+    return CategorisationRule(rule_id, pattern, category, bool(is_regex), *rest)
+
+def categorisation_rule_params(rule: CategorisationRule) -> tuple:
+    '''Column values of a rule, amounts in cents'''
+    return (
+        rule.pattern, rule.category, int(rule.is_regex),
+        to_cents(rule.min_amount) if rule.min_amount is not None else None,
+        to_cents(rule.max_amount) if rule.max_amount is not None else None,
+        rule.priority, rule.notes
+    )
+
+def _to_columns(names: tuple[str, ...], cursor, chunk_size: int = 1000) -> dict[str, list]:
+    '''Transposes a cursor's rows into one list per column, a chunk at a time'''
+    columns = [[] for _ in names]
+
+    # Millions of short-lived row tuples would otherwise trigger repeated full
+    # GC passes over the growing columns; they hold no reference cycles
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return dict(zip(names, columns))
+
+@instrument('repository')
 class SQLiteTransactionRepository:
-    def __init__(self, db_path: str):
+    def __init__(
+        self, db_path: str, pool_size: int = 5, timeout: float = 30.0,
+        journal_mode: str = 'WAL', synchronous: str = 'NORMAL',
+        cache_size: int = -16000, mmap_size: int = 256 * 1024 * 1024,
+        cached_statements: int = 256, busy_timeout: float | None = None,
+        write_queue: bool = False, write_behind: bool = False,
+        flush_size: int = WRITE_BEHIND_FLUSH_SIZE, flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        archive_path: str | None = None
+    ):
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} is too old; "
+                f"{'.'.join(map(str, MIN_SQLITE_VERSION))} or later is required")
         self.db_path = db_path
-        #self._initialize_database()
+        self.archive_path = archive_path or archive_path_for(db_path)
+        self.pool = SQLiteConnectionPool(
+            db_path,
+            max_connections=pool_size,
+            timeout=timeout,
+            journal_mode=journal_mode,
+            synchronous=synchronous,
+            cache_size=cache_size,
+            mmap_size=mmap_size,
+            cached_statements=cached_statements,
+            busy_timeout=busy_timeout
+        )
+        try:
+            self._initialize_database()
+        except Exception:
+            self.pool.close()
+            raise
+
+        # Optional single writer thread committing the writes of many threads together.
+        # Write-behind also uses it, but callers do not wait, so batches can be larger
+        self.write_behind = write_behind
+        if write_behind:
+            self.write_queue = SQLiteWriteQueue(
+                self.pool, max_batch=flush_size, max_delay=flush_interval, before_commit=self._after_write)
+        elif write_queue:
+            self.write_queue = SQLiteWriteQueue(self.pool, before_commit=self._after_write)
+        else:
+            self.write_queue = None
+
+    @property
+    def data_version(self) -> int:
+        '''Counter incremented by every create_*/update_* call, in any process using the database'''
+        # Kept in the database rather than in memory, so caches in every worker process see each write
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT version FROM data_version WHERE id = 1').fetchone()[0]
+
+    def pool_stats(self) -> dict:
+        '''Returns connection pool counters (open connections, waits, hits)'''
+        return self.pool.stats()
+
+    def close(self) -> None:
+        '''Commits any queued writes, then closes the pooled connections'''
+        if self.write_queue is not None:
+            self.write_queue.close()
+        self.pool.close()
+
+    def flush(self) -> None:
+        '''Blocks until every queued write-behind write has been committed'''
+        if self.write_queue is not None:
+            self.write_queue.flush()
+
+    @staticmethod
+    def _after_write(cursor, writes: int) -> None:
+        '''Ends every write transaction: indexes new transactions for search and bumps data_version'''
+        index_pending_search(cursor)
+        if writes:
+            cursor.execute('UPDATE data_version SET version = version + ? WHERE id = 1', (writes,))
+
+    def _write(self, func):
+        '''Runs func(cursor) in a write transaction and returns its result.
+
+        Through the write queue when enabled, otherwise on a pooled connection
+        holding the write lock (BEGIN IMMEDIATE, retried while busy).
+        '''
+        if self.write_queue is not None:
+            return self.write_queue.submit(func).result()
+        with self.pool.write_connection() as conn:
+            cursor = conn.cursor()
+            result = func(cursor)
+            self._after_write(cursor, 1)
+            return result
+
+    def partitions(self, conn, lower: str = '', upper: str = '~') -> tuple[str, ...]:
+        '''Schemas whose transactions table may hold rows dated from lower up to upper (ISO text).
+
+        Always the hot database, "main"; the archive too when it holds one of
+        those years, attaching it to conn first. Call outside a transaction.
+        '''
+        # '' and '~' sort before and after every ISO date, as open ends; so does a malformed bound here
+        archived = conn.execute(
+            'SELECT 1 FROM transaction_archives WHERE year >= ? AND year <= ? LIMIT 1',
+            (_bound_year(lower, 0), _bound_year(upper, 9999))
+        ).fetchone()
+        if archived is None:
+            return HOT
+        self.pool.attach(ARCHIVE_SCHEMA, self.archive_path, conn)
+        return HOT + (ARCHIVE_SCHEMA,)
 
     def _initialize_database(self):
         '''Initializes the database'''
-        with sqlite3.connect(self.db_path) as conn:
+        # Holds the write lock, so processes starting together create and backfill everything once
+        with self.pool.write_connection() as conn:
             cursor = conn.cursor()
 
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions'")
+            exists = cursor.fetchone() is not None
+            version = cursor.execute('PRAGMA user_version').fetchone()[0]
+            if exists and version < SCHEMA_VERSION:
+                raise RuntimeError(
+                    f'{self.db_path} stores amounts as REAL dollars; convert it first with '
+                    f'"python -m repositories.migrate {self.db_path}"')
+
             # Create transactions table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS transactions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    amount REAL NOT NULL,
-                    date DATE NOT NULL,
+                    amount_cents INTEGER NOT NULL         -- Whole cents, so sums are exact
+                        CHECK (typeof(amount_cents) = 'integer'),
+                    date TEXT NOT NULL                    -- YYYY-MM-DD, so ranges and months are plain text compares
+                        CHECK (date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'),
                     description TEXT NOT NULL,
                     category TEXT NOT NULL,
                     notes TEXT
@@ -36,16 +281,16 @@ class SQLiteTransactionRepository:
             CREATE TABLE IF NOT EXISTS categories (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 description TEXT NOT NULL,
-                monthly_allocation REAL NOT NULL,
+                monthly_allocation_cents INTEGER NOT NULL,
                 notes TEXT
             );
             ''')
 
             # Create recurring expenses table
             cursor.execute('''
-            CREATE TABLE recurring_expenses (
+            CREATE TABLE IF NOT EXISTS recurring_expenses (
                 id INTEGER PRIMARY KEY AUTOINCREMENT, -- Unique identifier for each expense
-                amount REAL NOT NULL,                 -- Expense amount
+                amount_cents INTEGER NOT NULL,        -- Expense amount in cents
                 frequency TEXT NOT NULL,              -- Frequency (e.g., "daily", "weekly", "monthly", "yearly")
                 category TEXT NOT NULL REFERENCES categories(description), 
                 description TEXT NOT NULL,            -- Short description of the expense
@@ -53,114 +298,1195 @@ class SQLiteTransactionRepository:
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP -- Timestamp of when the expense was added
             );
             ''')
+
+            # Index the date range and per-category filters used by the dashboards
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date)')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_transactions_category_date
+                ON transactions(category, date)
+            ''')
+
+            self._initialize_monthly_totals(cursor)
+            self._initialize_daily_totals(cursor)
+            self._initialize_search(cursor)
+            self._initialize_change_log(cursor)
+            self._initialize_categorisation_rules(cursor)
+            self._initialize_categories_version(cursor)
+            self._initialize_archives(cursor)
+
+            # Write counter shared by every process, so each can tell when its cached views are stale
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS data_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                );
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)')
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
             
             conn.commit()
 
-    def create_transaction(self, transaction: Transaction):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+    def _initialize_monthly_totals(self, cursor):
+        '''Creates the per month/category rollup and the triggers maintaining it'''
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_monthly_totals'")
+        exists = cursor.fetchone() is not None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS category_monthly_totals (
+                month TEXT NOT NULL,                  -- YYYY-MM
+                category TEXT NOT NULL,
+                total_cents INTEGER NOT NULL DEFAULT 0, -- Sum of transaction amounts
+                transaction_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (month, category)
+            ) WITHOUT ROWID;
+        ''')
+
+        # Backfill from existing transactions the first time the rollup is created
+        if not exists:
             cursor.execute('''
-                INSERT INTO transactions 
-                    (amount, date, description, category, notes)
-                VALUES 
-                    (?, ?, ?, ?, ?)
-            ''', (transaction.amount, transaction.date, transaction.description, transaction.category, transaction.notes))
-            conn.commit()
-            #transaction.transaction_id = cursor.lastrowid
+                INSERT INTO category_monthly_totals (month, category, total_cents, transaction_count)
+                SELECT substr(date, 1, 7), category, SUM(amount_cents), COUNT(*)
+                FROM transactions
+                GROUP BY substr(date, 1, 7), category
+            ''')
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_totals_insert
+            AFTER INSERT ON transactions
+            BEGIN
+                INSERT INTO category_monthly_totals (month, category, total_cents, transaction_count)
+                VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount_cents, 1)
+                ON CONFLICT (month, category) DO UPDATE
+                SET total_cents = total_cents + excluded.total_cents,
+                    transaction_count = transaction_count + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_totals_update
+            AFTER UPDATE OF amount_cents, date, category ON transactions
+            BEGIN
+                UPDATE category_monthly_totals
+                SET total_cents = total_cents - OLD.amount_cents,
+                    transaction_count = transaction_count - 1
+                WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+
+                INSERT INTO category_monthly_totals (month, category, total_cents, transaction_count)
+                VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount_cents, 1)
+                ON CONFLICT (month, category) DO UPDATE
+                SET total_cents = total_cents + excluded.total_cents,
+                    transaction_count = transaction_count + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_totals_delete
+            AFTER DELETE ON transactions
+            BEGIN
+                UPDATE category_monthly_totals
+                SET total_cents = total_cents - OLD.amount_cents,
+                    transaction_count = transaction_count - 1
+                WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+            END
+        ''')
+
+    def _initialize_daily_totals(self, cursor):
+        '''Creates the per day/category rollup read by the analytics, and its triggers'''
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_daily_totals'")
+        exists = cursor.fetchone() is not None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS category_daily_totals (
+                day TEXT NOT NULL,                    -- YYYY-MM-DD
+                category TEXT NOT NULL,
+                total_cents INTEGER NOT NULL DEFAULT 0, -- Sum of transaction amounts
+                transaction_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, category)
+            ) WITHOUT ROWID;
+        ''')
+
+        # Backfill from existing transactions the first time the rollup is created
+        if not exists:
+            cursor.execute('''
+                INSERT INTO category_daily_totals (day, category, total_cents, transaction_count)
+                SELECT substr(date, 1, 10), category, SUM(amount_cents), COUNT(*)
+                FROM transactions
+                GROUP BY substr(date, 1, 10), category
+            ''')
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_daily_insert
+            AFTER INSERT ON transactions
+            BEGIN
+                INSERT INTO category_daily_totals (day, category, total_cents, transaction_count)
+                VALUES (substr(NEW.date, 1, 10), NEW.category, NEW.amount_cents, 1)
+                ON CONFLICT (day, category) DO UPDATE
+                SET total_cents = total_cents + excluded.total_cents,
+                    transaction_count = transaction_count + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_daily_update
+            AFTER UPDATE OF amount_cents, date, category ON transactions
+            BEGIN
+                UPDATE category_daily_totals
+                SET total_cents = total_cents - OLD.amount_cents,
+                    transaction_count = transaction_count - 1
+                WHERE day = substr(OLD.date, 1, 10) AND category = OLD.category;
+
+                INSERT INTO category_daily_totals (day, category, total_cents, transaction_count)
+                VALUES (substr(NEW.date, 1, 10), NEW.category, NEW.amount_cents, 1)
+                ON CONFLICT (day, category) DO UPDATE
+                SET total_cents = total_cents + excluded.total_cents,
+                    transaction_count = transaction_count + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_daily_delete
+            AFTER DELETE ON transactions
+            BEGIN
+                UPDATE category_daily_totals
+                SET total_cents = total_cents - OLD.amount_cents,
+                    transaction_count = transaction_count - 1
+                WHERE day = substr(OLD.date, 1, 10) AND category = OLD.category;
+            END
+        ''')
+
+    def _initialize_change_log(self, cursor):
+        '''Records updated and deleted transactions for incremental snapshot exports.
+
+        Inserts need no entry: ids only grow, so rows added since an export
+        are those with a higher id than it saw.
+        '''
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transaction_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, -- Order of the changes, never reused
+                id INTEGER NOT NULL                   -- Transaction updated or deleted
+            );
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_changes_update
+            AFTER UPDATE ON transactions
+            BEGIN
+                INSERT INTO transaction_changes (id) VALUES (OLD.id);
+                INSERT INTO transaction_changes (id) SELECT NEW.id WHERE NEW.id != OLD.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_changes_delete
+            AFTER DELETE ON transactions
+            BEGIN
+                INSERT INTO transaction_changes (id) VALUES (OLD.id);
+            END
+        ''')
+
+    def _initialize_categorisation_rules(self, cursor):
+        '''Creates the categorisation rules and a change counter bumped by triggers, in any process'''
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS categorisation_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                pattern TEXT NOT NULL,                -- Substring of the description, or a regular expression
+                category TEXT NOT NULL,
+                is_regex INTEGER NOT NULL DEFAULT 0,
+                min_amount_cents INTEGER,             -- Inclusive amount range; NULL for no bound
+                max_amount_cents INTEGER,
+                priority INTEGER NOT NULL DEFAULT 100, -- Lowest first; the first matching rule wins
+                notes TEXT
+            );
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS categorisation_rules_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO categorisation_rules_version (id, version) VALUES (1, 0)')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_categorisation_rules_insert
+            AFTER INSERT ON categorisation_rules
+            BEGIN
+                UPDATE categorisation_rules_version SET version = version + 1 WHERE id = 1;
+            END;
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_categorisation_rules_update
+            AFTER UPDATE ON categorisation_rules
+            BEGIN
+                UPDATE categorisation_rules_version SET version = version + 1 WHERE id = 1;
+            END;
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_categorisation_rules_delete
+            AFTER DELETE ON categorisation_rules
+            BEGIN
+                UPDATE categorisation_rules_version SET version = version + 1 WHERE id = 1;
+            END;
+        ''')
+
+    def _initialize_categories_version(self, cursor):
+        '''Creates a counter of category changes, bumped by triggers in any process'''
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS categories_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            );
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO categories_version (id, version) VALUES (1, 0)')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_categories_version_insert
+            AFTER INSERT ON categories
+            BEGIN
+                UPDATE categories_version SET version = version + 1 WHERE id = 1;
+            END;
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_categories_version_update
+            AFTER UPDATE ON categories
+            BEGIN
+                UPDATE categories_version SET version = version + 1 WHERE id = 1;
+            END;
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_categories_version_delete
+            AFTER DELETE ON categories
+            BEGIN
+                UPDATE categories_version SET version = version + 1 WHERE id = 1;
+            END;
+        ''')
+
+    def _initialize_archives(self, cursor):
+        '''Creates the list of closed years whose transactions moved to the archive database'''
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transaction_archives (
+                year INTEGER PRIMARY KEY,             -- Closed year with transactions in the archive
+                transaction_count INTEGER NOT NULL DEFAULT 0, -- Rows moved there so far
+                archived_at DATETIME DEFAULT CURRENT_TIMESTAMP -- Last time rows of the year were moved
+            );
+        ''')
+
+    def _initialize_search(self, cursor):
+        '''Creates the full-text index over description, notes and category, and its triggers.
+
+        New transactions are not indexed by their insert trigger: FTS5 flushes
+        its pending index data at every statement savepoint, and a trigger runs
+        inside one, which made each indexed insert several times slower. The
+        trigger only queues the id in transactions_fts_pending and every write
+        transaction ends by indexing the queued rows in one statement
+        (index_pending_search). Updates and deletes of indexed rows are kept
+        in sync by their triggers.
+        '''
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('transactions_fts', 'transactions_fts_pending')")
+        existing = {row[0] for row in cursor.fetchall()}
+
+        # External content: the index stores tokens only and reads the text back from transactions
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+                description, notes, category,
+                content='transactions', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'                          -- Fast short prefixes for search as you type
+            );
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transactions_fts_pending (
+                id INTEGER PRIMARY KEY                -- Transaction inserted but not indexed yet
+            );
+        ''')
+
+        # Index existing transactions the first time the table is created
+        if 'transactions_fts' not in existing:
+            cursor.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+            cursor.execute('DELETE FROM transactions_fts_pending')
+
+        # Databases indexed before the pending queue existed have per-row triggers to replace
+        if 'transactions_fts_pending' not in existing:
+            for trigger in ('insert', 'update', 'delete'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS trg_transactions_fts_{trigger}')
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert
+            AFTER INSERT ON transactions
+            BEGIN
+                INSERT INTO transactions_fts_pending (id) VALUES (NEW.id);
+            END
+        ''')
+        # A pending row is indexed with its values at the end of the transaction
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+            AFTER UPDATE OF description, notes, category ON transactions
+            WHEN NOT EXISTS (SELECT 1 FROM transactions_fts_pending WHERE id = OLD.id)
+            BEGIN
+                INSERT INTO transactions_fts (transactions_fts, rowid, description, notes, category)
+                VALUES ('delete', OLD.id, OLD.description, OLD.notes, OLD.category);
+
+                INSERT INTO transactions_fts (rowid, description, notes, category)
+                VALUES (NEW.id, NEW.description, NEW.notes, NEW.category);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete
+            AFTER DELETE ON transactions
+            BEGIN
+                INSERT INTO transactions_fts (transactions_fts, rowid, description, notes, category)
+                SELECT 'delete', OLD.id, OLD.description, OLD.notes, OLD.category
+                WHERE NOT EXISTS (SELECT 1 FROM transactions_fts_pending WHERE id = OLD.id);
+
+                DELETE FROM transactions_fts_pending WHERE id = OLD.id;
+            END
+        ''')
+        index_pending_search(cursor)
+
+    def create_transaction(self, transaction: Transaction) -> int | Future:
+        '''Inserts a transaction, sets its transaction_id and returns the id.
+
+        In write-behind mode returns at once with a Future of the id instead;
+        transaction_id is set when the batch holding the insert commits.
+        '''
+        params = transaction_params(transaction)
+
+        def insert(cursor):
+            cursor.execute(INSERT_TRANSACTION, params)
+            return cursor.lastrowid
+
+        def assign_id(future: Future) -> None:
+            if future.exception() is None:
+                transaction.transaction_id = future.result()
+
+        if self.write_queue is None:
+            transaction.transaction_id = self._write(insert)
+            return transaction.transaction_id
+
+        # Queued single-row inserts are committed as one executemany per batch
+        future = self.write_queue.submit(Insert(INSERT_TRANSACTION, params))
+        if self.write_behind:
+            future.add_done_callback(assign_id)
+            return future
+        transaction.transaction_id = future.result()
+        return transaction.transaction_id
+
+    def create_transactions(self, transactions: Iterable[Transaction], chunk_size: int = 1000) -> int:
+        '''Inserts transactions in chunks of executemany within a single commit.
+
+        ``transactions`` may be any iterable (e.g. a generator over a file), so
+        only one chunk is held in memory at a time. Returns the rows inserted.
+        '''
+        def insert(cursor):
+            count = 0
+            rows = map(transaction_params, transactions)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                cursor.executemany(INSERT_TRANSACTION, chunk)
+                count += len(chunk)
+            return count
+
+        return self._write(insert)
 
     def create_category(self, category: Category):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        def insert(cursor):
             cursor.execute('''
                 INSERT INTO categories 
-                    (description, monthly_allocation, notes)
+                    (description, monthly_allocation_cents, notes)
                 VALUES
                     (?, ?, ?)
                 ''',
-                (category.description, category.monthly_allocation, category.notes))
-            conn.commit()
-            #category.category_id = cursor.lastrowid
+                (category.description, to_cents(category.monthly_allocation), category.notes))
+            return cursor.lastrowid
+
+        category.category_id = self._write(insert)
 
     def create_recurring_expense(self, re: RecurringExpense):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        def insert(cursor):
             cursor.execute('''
                 INSERT INTO recurring_expenses
-                    (amount, frequency, category, description, notes)
+                    (amount_cents, frequency, category, description, notes)
                 VALUES
                     (?, ?, ?, ?, ?)
                 ''',
-                (re.amount, re.frequency, re.category, re.description, re.notes))
-            conn.commit()
-            #re.recurring_expense_id = cursor.lastrowid
+                (to_cents(re.amount), re.frequency, re.category, re.description, re.notes))
+            return cursor.lastrowid
+
+        re.recurring_expense_id = self._write(insert)
+
+    def create_categorisation_rule(self, rule: CategorisationRule):
+        def insert(cursor):
+            cursor.execute('''
+                INSERT INTO categorisation_rules
+                    (pattern, category, is_regex, min_amount_cents, max_amount_cents, priority, notes)
+                VALUES
+                    (?, ?, ?, ?, ?, ?, ?)
+                ''',
+                categorisation_rule_params(rule))
+            return cursor.lastrowid
+
+        rule.rule_id = self._write(insert)
 
     def read_all_transactions(self) -> [Transaction]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT id, amount, date, description, category, notes FROM transactions;')
-            rows = cursor.fetchall()
-            return [Transaction(row[0], row[1], row[2], row[3], row[4], row[5]) for row in rows]
+            cursor.row_factory = _transaction_row
+            cursor.execute(union_all(
+                'SELECT id, amount_cents / 100.0, date, description, category, notes FROM {schema}.transactions',
+                self.partitions(conn)
+            ))
+            return cursor.fetchall()
+
+    def read_transactions_page(self, page_size: int = 50, after_id: int | None = None) -> [Transaction]:
+        '''Returns up to page_size transactions in id order, starting after after_id.
+
+        Keyset pagination: pass the last id of a page to get the next one. Each
+        page is a primary key range seek, however deep into the ledger it is.
+        '''
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _transaction_row
+            cursor.execute(
+                union_all(
+                    '''
+                    SELECT id, amount_cents / 100.0, date, description, category, notes
+                    FROM {schema}.transactions
+                    WHERE id > :after_id
+                    ''',
+                    self.partitions(conn),
+                    'ORDER BY id LIMIT :page_size'
+                ),
+                {'after_id': after_id or 0, 'page_size': page_size}
+            )
+            return cursor.fetchall()
+
+    def read_transactions_page_by_date(
+        self, page_size: int = 50, before_date: str | None = None, before_id: int | None = None
+    ) -> [Transaction]:
+        '''Returns up to page_size transactions, newest first, older than (before_date, before_id).
+
+        Pass the date and id of the last row of a page to get the next one;
+        the (date, id) keyset walks idx_transactions_date without an OFFSET.
+        '''
+        # '~' sorts after every date, starting at the newest; a missing before_id means "everything before this date"
+        before_date = before_date or '~'
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _transaction_row
+            cursor.execute(
+                union_all(
+                    '''
+                    SELECT id, amount_cents / 100.0, date, description, category, notes
+                    FROM {schema}.transactions
+                    WHERE (date, id) < (:before_date, :before_id)
+                    ''',
+                    self.partitions(conn, upper=before_date),
+                    'ORDER BY date DESC, id DESC LIMIT :page_size'
+                ),
+                {'before_date': before_date, 'before_id': before_id if before_id is not None else -1, 'page_size': page_size}
+            )
+            return cursor.fetchall()
+
+    def iter_transactions(self, batch_size: int = 1000) -> Iterator[Transaction]:
+        '''Streams every transaction in id order, fetching batch_size rows at a time'''
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _transaction_row
+            cursor.execute(union_all(
+                'SELECT id, amount_cents / 100.0, date, description, category, notes FROM {schema}.transactions',
+                self.partitions(conn),
+                'ORDER BY id'
+            ))
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield from batch
 
     def read_transaction_by_id(self, transaction_id: int) -> Transaction:
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = _transaction_row
             cursor.execute(
-                'SELECT id, amount, date, description, category, notes FROM transactions WHERE id = ?', 
-                (transaction_id,))
-            row = cursor.fetchone()
-            if row:
-                return Transaction(row[0], row[1], row[2], row[3], row[4], row[5])
-            return None
+                union_all(
+                    'SELECT id, amount_cents / 100.0, date, description, category, notes FROM {schema}.transactions WHERE id = :id',
+                    self.partitions(conn)
+                ),
+                {'id': transaction_id})
+            return cursor.fetchone()
 
-    def read_last_seven_days(self) -> [Transaction]:
-        with sqlite3.connect(self.db_path) as conn:
+    def read_transactions_between(self, start: date | str, end: date | str) -> [Transaction]:
+        '''Returns transactions dated from start to end (inclusive), newest first'''
+        lower = to_date(start).isoformat()
+        upper = (to_date(end) + timedelta(days=1)).isoformat()
+
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = _transaction_row
+            # Plain range predicates on the raw column so idx_transactions_date is used;
+            # the archive is only read when it holds one of the years
             cursor.execute(
+                union_all(
+                    '''
+                    SELECT id, amount_cents / 100.0, date, description, category, notes
+                    FROM {schema}.transactions
+                    WHERE date >= :lower
+                      AND date < :upper
+                    ''',
+                    self.partitions(conn, lower, upper),
+                    'ORDER BY date DESC'
+                ),
+                {'lower': lower, 'upper': upper}
+            )
+            return cursor.fetchall()
+
+    def read_transactions_by_category(self, category: str) -> [Transaction]:
+        '''Returns a category's transactions, newest first'''
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _transaction_row
+            # Served by idx_transactions_category_date, already in date order
+            cursor.execute(
+                union_all(
+                    '''
+                    SELECT id, amount_cents / 100.0, date, description, category, notes
+                    FROM {schema}.transactions
+                    WHERE category = :category
+                    ''',
+                    self.partitions(conn),
+                    'ORDER BY date DESC, id DESC'
+                ),
+                {'category': category}
+            )
+            return cursor.fetchall()
+
+    def search_transactions(
+        self, query: str, date_range: tuple[date | str | None, date | str | None] | None = None,
+        category: str | None = None, limit: int = 50
+    ) -> [Transaction]:
+        '''Returns transactions whose description, notes or category match every word of query, best first.
+
+        Each word matches as a prefix ("groc" finds "Groceries"); FTS5 query
+        syntax in the input is treated as plain text. date_range is an
+        inclusive (start, end) pair where either end may be None.
+
+        bm25 ranking costs a lookup per match, so only the newest
+        SEARCH_CANDIDATES matches passing the filters are ranked; a word found
+        in every transaction still answers in well under a second. Archived
+        years are searched through the archive's own index, when in range.
+        '''
+        match = match_expression(query)
+        if not match:
+            return []
+        start, end = date_range or (None, None)
+        lower = to_date(start).isoformat() if start else ''
+        upper = (to_date(end) + timedelta(days=1)).isoformat() if end else '~'
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _transaction_row
+            ranked = union_all(
                 '''
-                SELECT * 
-                FROM transactions
-                WHERE DATE(date) >= DATE('now', '-7 days')
-                  AND DATE(date) <= DATE('now')
-                ORDER BY date DESC;
-                '''
+                WITH candidates AS (
+                    SELECT f.rowid
+                    FROM {schema}.transactions_fts f
+                    JOIN {schema}.transactions t ON t.id = f.rowid
+                    WHERE transactions_fts MATCH :match
+                      AND t.date >= :lower
+                      AND t.date < :upper
+                      AND (:category IS NULL OR t.category = :category)
+                    ORDER BY f.rowid DESC
+                    LIMIT :candidates
+                )
+                SELECT t.id, t.amount_cents / 100.0 AS amount, t.date, t.description, t.category, t.notes,
+                       f.rank AS rank
+                FROM {schema}.transactions_fts f
+                JOIN {schema}.transactions t ON t.id = f.rowid
+                WHERE transactions_fts MATCH :match
+                  AND f.rowid >= (SELECT min(rowid) FROM candidates)
+                  AND t.date >= :lower
+                  AND t.date < :upper
+                  AND (:category IS NULL OR t.category = :category)
+                ''',
+                self.partitions(conn, lower, upper),
+                'ORDER BY rank, date DESC LIMIT :limit'
             )
-            rows = cursor.fetchall()
-            return [Transaction(*row) for row in rows]
+            # Built from the constant select above only
+            cursor.execute(
+                f'SELECT id, amount, date, description, category, notes FROM ({ranked}) ORDER BY rank, date DESC',  # nosec B608
+                {
+                    'match': match, 'lower': lower, 'upper': upper, 'category': category,
+                    'candidates': SEARCH_CANDIDATES, 'limit': limit
+                }
+            )
+            return cursor.fetchall()
+
+    def read_transaction_columns(
+        self, start: date | str | None = None, end: date | str | None = None
+    ) -> dict[str, list]:
+        '''Returns transactions as column lists keyed by Transaction field name.
+
+        No Transaction object is built per row, so the result can go straight
+        into pandas.DataFrame or NumPy. start/end (inclusive) are optional.
+        Rows are left unsorted so SQLite can stream them in storage order;
+        sort the frame if order matters.
+        '''
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            if start is None and end is None:
+                cursor.execute(union_all(
+                    'SELECT id, amount_cents / 100.0, date, description, category, notes FROM {schema}.transactions',
+                    self.partitions(conn)
+                ))
+                return _to_columns(TRANSACTION_FIELDS, cursor)
+
+            # '~' sorts after every ISO date, making a missing upper bound open ended
+            lower = to_date(start).isoformat() if start else ''
+            upper = (to_date(end) + timedelta(days=1)).isoformat() if end else '~'
+            cursor.execute(
+                union_all(
+                    '''
+                    SELECT id, amount_cents / 100.0, date, description, category, notes
+                    FROM {schema}.transactions
+                    WHERE date >= :lower
+                      AND date < :upper
+                    ''',
+                    self.partitions(conn, lower, upper)
+                ),
+                {'lower': lower, 'upper': upper}
+            )
+            return _to_columns(TRANSACTION_FIELDS, cursor)
+
+    def read_last_seven_days(self) -> [Transaction]:
+        today = date.today()
+        return self.read_transactions_between(today - timedelta(days=7), today)
 
     def read_current_month_transactions(self) -> [Transaction]:
-        with sqlite3.connect(self.db_path) as conn: 
+        first, last = month_bounds(date.today())
+        return self.read_transactions_between(first, last)
+
+    def read_category_month_summary(
+        self, month: date | str | None = None, exclude: Iterable[str] = ()
+    ) -> list[dict]:
+        '''Returns spent vs monthly allocation per category for a month, leaving out exclude.
+
+        Reads the category_monthly_totals rollup, so the cost depends on the
+        number of categories rather than the number of transactions.
+        '''
+        month = to_date(month or date.today()).strftime('%Y-%m')
+
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 '''
-                SELECT *
-                FROM transactions
-                WHERE strftime('%Y-%m', date) = strftime('%Y-%m', 'now')
-                ORDER BY date DESC;
-                '''
+                SELECT t.category, -t.total_cents / 100.0, c.monthly_allocation_cents / 100.0
+                FROM category_monthly_totals t
+                JOIN categories c ON c.description = t.category
+                WHERE t.month = ?
+                  AND t.transaction_count > 0
+                  AND t.category NOT IN (SELECT value FROM json_each(?))
+                ORDER BY t.category;
+                ''',
+                (month, json.dumps(list(exclude)))
             )
             rows = cursor.fetchall()
-            return [Transaction(*row) for row in rows]
+            return [
+                {'category': row[0], 'spent': row[1], 'monthly_allocation': row[2]}
+                for row in rows
+            ]
+
+    def read_category_summary_between(
+        self, start: date | str, end: date | str, exclude: Iterable[str] = ()
+    ) -> list[dict]:
+        '''Returns spent, transaction count and monthly allocation per category from start to end (inclusive).
+
+        Aggregates in SQL over idx_transactions_date, leaving out the exclude
+        categories (passed as one JSON array, so the statement stays cached);
+        categories without a categories row get a monthly_allocation of None.
+        '''
+        lower = to_date(start).isoformat()
+        upper = (to_date(end) + timedelta(days=1)).isoformat()
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            rows = union_all(
+                '''
+                SELECT category, amount_cents
+                FROM {schema}.transactions
+                WHERE date >= :lower
+                  AND date < :upper
+                  AND category NOT IN (SELECT value FROM json_each(:exclude))
+                ''',
+                self.partitions(conn, lower, upper)
+            )
+            # Built from the constant selects above only
+            cursor.execute(
+                f'''
+                SELECT s.category, s.spent_cents / 100.0, s.transaction_count, c.monthly_allocation_cents / 100.0
+                FROM (
+                    SELECT category, -SUM(amount_cents) AS spent_cents, COUNT(*) AS transaction_count
+                    FROM ({rows})
+                    GROUP BY category
+                ) s
+                LEFT JOIN categories c ON c.description = s.category
+                ORDER BY s.category;
+                ''',  # nosec B608
+                {'lower': lower, 'upper': upper, 'exclude': json.dumps(list(exclude))}
+            )
+            return [
+                {'category': row[0], 'spent': row[1], 'transaction_count': row[2], 'monthly_allocation': row[3]}
+                for row in cursor.fetchall()
+            ]
+
+    def read_daily_category_totals(
+        self, start: date | str, end: date | str, exclude: Iterable[str] = ()
+    ) -> dict[str, list]:
+        '''Returns per day/category totals from start to end (inclusive) as columns.
+
+        Reads the category_daily_totals rollup, so a multi-year range costs
+        days x categories rows however many transactions it covers.
+        '''
+        start = to_date(start)
+        end = to_date(end) + timedelta(days=1)
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                SELECT day, category, total_cents / 100.0, transaction_count
+                FROM category_daily_totals
+                WHERE day >= ?
+                  AND day < ?
+                  AND transaction_count > 0
+                  AND category NOT IN (SELECT value FROM json_each(?));
+                ''',
+                (start.isoformat(), end.isoformat(), json.dumps(list(exclude)))
+            )
+            return _to_columns(('day', 'category', 'total', 'transaction_count'), cursor)
+
+    @property
+    def categories_version(self) -> int:
+        '''Counter incremented by every category change, in any process using the database'''
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT version FROM categories_version WHERE id = 1').fetchone()[0]
 
     def read_all_categories(self) -> [Category]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor() 
-            cursor.execute('SELECT * FROM categories;')
-            rows = cursor.fetchall()
-            return [Category(*row) for row in rows]
+            cursor.row_factory = _category_row
+            cursor.execute('SELECT id, description, monthly_allocation_cents / 100.0, notes FROM categories;')
+            return cursor.fetchall()
 
-    def update_transaction(self, t: Transaction) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor() 
+    def read_category_columns(self) -> dict[str, list]:
+        '''Returns all categories as column lists keyed by Category field name'''
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, description, monthly_allocation_cents / 100.0, notes FROM categories;')
+            return _to_columns(CATEGORY_FIELDS, cursor)
+
+    def read_all_recurring_expenses(self) -> [RecurringExpense]:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _recurring_expense_row
+            cursor.execute('''
+                SELECT id, amount_cents / 100.0, frequency, category, description, notes, created_at
+                FROM recurring_expenses;
+            ''')
+            return cursor.fetchall()
+
+    def read_recurring_expense_by_id(self, recurring_expense_id: int) -> RecurringExpense:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _recurring_expense_row
+            cursor.execute('''
+                SELECT id, amount_cents / 100.0, frequency, category, description, notes, created_at
+                FROM recurring_expenses
+                WHERE id = ?
+            ''', (recurring_expense_id,))
+            return cursor.fetchone()
+
+    @property
+    def rules_version(self) -> int:
+        '''Counter incremented by every categorisation rule change, in any process using the database'''
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT version FROM categorisation_rules_version WHERE id = 1').fetchone()[0]
+
+    def read_all_categorisation_rules(self) -> [CategorisationRule]:
+        '''Returns every categorisation rule, in priority order'''
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = _categorisation_rule_row
+            cursor.execute('''
+                SELECT id, pattern, category, is_regex, min_amount_cents / 100.0, max_amount_cents / 100.0,
+                       priority, notes
+                FROM categorisation_rules
+                ORDER BY priority, id;
+            ''')
+            return cursor.fetchall()
+
+    def update_categorisation_rule(self, rule: CategorisationRule) -> None:
+        def update(cursor):
+            cursor.execute(
+                '''
+                UPDATE categorisation_rules
+                SET pattern=?, category=?, is_regex=?, min_amount_cents=?, max_amount_cents=?, priority=?, notes=?
+                WHERE id=?
+                ''',
+                (*categorisation_rule_params(rule), rule.rule_id)
+            )
+
+        self._write(update)
+
+    def delete_categorisation_rule(self, rule_id: int) -> bool:
+        '''Deletes a categorisation rule; returns whether it existed'''
+        def delete(cursor):
+            cursor.execute('DELETE FROM categorisation_rules WHERE id = ?', (rule_id,))
+            return cursor.rowcount > 0
+
+        return self._write(delete)
+
+    def update_recurring_expense(self, re: RecurringExpense) -> None:
+        def update(cursor):
+            cursor.execute(
+                '''
+                UPDATE recurring_expenses
+                SET amount_cents=?, frequency=?, category=?, description=?, notes=?
+                WHERE id=?
+                ''',
+                (to_cents(re.amount), re.frequency, re.category, re.description, re.notes, re.recurring_expense_id)
+            )
+
+        self._write(update)
+
+    def update_transaction(self, t: Transaction) -> Transaction | Future | None:
+        '''Updates a transaction and returns it as stored, or None if there is no such id.
+
+        In write-behind mode returns a Future of that instead, resolved once the update commits.
+        '''
+        def update(cursor):
             cursor.execute(
                 '''
                 UPDATE transactions 
-                SET amount=?, date=?, description=?, category=?, notes=?
+                SET amount_cents=?, date=?, description=?, category=?, notes=?
                 WHERE id=?
-                RETURNING id, amount, date, description, category, notes
+                RETURNING id, amount_cents / 100.0, date, description, category, notes
                 ''',
-                (t.amount, t.date, t.description, t.category, t.notes, t.transaction_id)
+                (*transaction_params(t), t.transaction_id)
             )
-            t = cursor.fetchone()
+            row = cursor.fetchone()
+            return Transaction(*row) if row else None
 
-            conn.commit()
-            
\ No newline at end of file
+        if self.write_behind:
+            return self.write_queue.submit(update)
+        return self._write(update)
+
+    def update_transactions(self, transactions: Iterable[Transaction], require_all: bool = False) -> [Transaction]:
+        '''Updates many transactions with one UPDATE in one commit; returns those found, as stored.
+
+        require_all=True raises ValueError, rolling the whole UPDATE back, when any id is not found.
+        '''
+        # Passed as one JSON array, so the statement is the same (and cached) for any batch size
+        rows = {t.transaction_id: (t.transaction_id, *transaction_params(t)) for t in transactions}
+
+        def update(cursor):
+            cursor.execute(
+                '''
+                UPDATE transactions
+                SET amount_cents = v.amount_cents, date = v.date, description = v.description,
+                    category = v.category, notes = v.notes
+                FROM (
+                    SELECT json_extract(value, '$[0]') AS id, json_extract(value, '$[1]') AS amount_cents,
+                           json_extract(value, '$[2]') AS date, json_extract(value, '$[3]') AS description,
+                           json_extract(value, '$[4]') AS category, json_extract(value, '$[5]') AS notes
+                    FROM json_each(?)
+                ) v
+                WHERE transactions.id = v.id
+                RETURNING id, amount_cents / 100.0, date, description, category, notes
+                ''',
+                (json.dumps(list(rows.values())),)
+            )
+            updated = [Transaction(*row) for row in cursor.fetchall()]
+            if require_all and len(updated) != len(rows):
+                missing = sorted(set(rows) - {t.transaction_id for t in updated})
+                raise ValueError(f"Transactions not found: {', '.join(map(str, missing))}")
+            return updated
+
+        return self._write(update) if rows else []
+
+    def recategorise_transactions(
+        self, category: str, query: str | None = None,
+        date_range: tuple[date | str | None, date | str | None] | None = None,
+        from_category: str | None = None
+    ) -> [Transaction]:
+        '''Moves every transaction matching all the filters to category with one UPDATE; returns those changed.
+
+        query matches as in search_transactions, date_range is an inclusive
+        (start, end) pair where either end may be None and from_category
+        limits the move to one category. A filter left as None matches all.
+        '''
+        match = match_expression(query) if query else ''
+        start, end = date_range or (None, None)
+        lower = to_date(start).isoformat() if start else ''
+        upper = (to_date(end) + timedelta(days=1)).isoformat() if end else '~'
+
+        def update(cursor):
+            cursor.execute(
+                '''
+                UPDATE transactions
+                SET category = :category
+                WHERE category != :category
+                  AND date >= :lower
+                  AND date < :upper
+                  AND (:from_category IS NULL OR category = :from_category)
+                  AND (:match = '' OR id IN (
+                      SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH :match
+                  ))
+                RETURNING id, amount_cents / 100.0, date, description, category, notes
+                ''',
+                {
+                    'category': category, 'lower': lower, 'upper': upper,
+                    'from_category': from_category, 'match': match
+                }
+            )
+            return [Transaction(*row) for row in cursor.fetchall()]
+
+        return self._write(update)
+
+    def split_transaction(self, transaction_id: int, parts: list[Transaction]) -> [Transaction]:
+        '''Replaces a transaction with parts whose amounts add up to its amount, in one commit.
+
+        The first part keeps the transaction's id, the others are inserted;
+        a part's date, description or notes left None are the original's.
+        Sets each part's transaction_id and returns the parts as stored.
+        '''
+        if len(parts) < 2:
+            raise ValueError('A split needs at least two parts')
+
+        def split(cursor):
+            original = cursor.execute(
+                'SELECT amount_cents, date, description, category, notes FROM transactions WHERE id = ?',
+                (transaction_id,)
+            ).fetchone()
+            if original is None:
+                raise ValueError(f'No transaction with id {transaction_id}')
+
+            amount, day, description, _, notes = original
+            params = [
+                transaction_params(Transaction(
+                    None, p.amount, p.date or day, p.description or description, p.category,
+                    notes if p.notes is None else p.notes))
+                for p in parts
+            ]
+            total = sum(p[0] for p in params)
+            if total != amount:
+                raise ValueError(
+                    f'Split parts add up to {from_cents(total):.2f}, not the original {from_cents(amount):.2f}')
+
+            first, *rest = params
+            cursor.execute(
+                '''
+                UPDATE transactions
+                SET amount_cents=?, date=?, description=?, category=?, notes=?
+                WHERE id=?
+                RETURNING id, amount_cents / 100.0, date, description, category, notes
+                ''',
+                (*first, transaction_id)
+            )
+            rows = [cursor.fetchone()]
+            for p in rest:
+                cursor.execute(
+                    INSERT_TRANSACTION + ' RETURNING id, amount_cents / 100.0, date, description, category, notes', p)
+                rows.append(cursor.fetchone())
+            return [Transaction(*row) for row in rows]
+
+        stored = self._write(split)
+        for part, row in zip(parts, stored):
+            part.transaction_id = row.transaction_id
+        return stored
+
+    def _initialize_archive(self) -> None:
+        '''Creates the archive database's tables and drops copies left behind by an interrupted archive_year'''
+        with self.pool.connection() as conn:
+            # Readable while batches are written to it, like the hot database
+            conn.execute('PRAGMA archive.journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS archive.transactions (
+                    id INTEGER PRIMARY KEY,               -- The id it had in the hot database
+                    amount_cents INTEGER NOT NULL,
+                    date TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    notes TEXT
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS archive.idx_transactions_date ON transactions(date)')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS archive.idx_transactions_category_date
+                ON transactions(category, date)
+            ''')
+            # No triggers: archive_year maintains the index a batch at a time
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS archive.transactions_fts USING fts5(
+                    description, notes, category,
+                    content='transactions', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
+                );
+            ''')
+
+            # A row in both databases was copied by a batch whose hot delete never committed
+            conn.execute('''
+                INSERT INTO archive.transactions_fts (transactions_fts, rowid, description, notes, category)
+                SELECT 'delete', a.id, a.description, a.notes, a.category
+                FROM archive.transactions a
+                WHERE a.id IN (SELECT id FROM main.transactions)
+            ''')
+            conn.execute('DELETE FROM archive.transactions WHERE id IN (SELECT id FROM main.transactions)')
+
+    def archive_year(self, year: int, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        '''Moves a closed year's transactions from the hot database to the archive; returns the rows moved.
+
+        Runs batch_size rows at a time. A batch is copied into the archive and
+        committed there while the hot database's write lock is held, then
+        deleted from the hot database with the rollups and the change log put
+        back as they were: nothing but the file holding the rows changes. WAL
+        databases cannot commit together atomically, so a crash between the
+        two commits leaves a batch in both files, never in neither, and
+        archiving the year again finishes the move. Readers see every row
+        throughout, a batch possibly twice for the instant between its commits;
+        data_version is bumped at the end, so views cached meanwhile are rebuilt.
+
+        Archived transactions are read only: updates, recategorisation and
+        splits only change the hot database.
+        '''
+        if self.archive_path is None:
+            raise ValueError('An in-memory database has no archive')
+        if year >= date.today().year:
+            raise ValueError(f'{year} is not a closed year')
+        if self.pool.max_connections < 2:
+            raise ValueError('Archiving holds two pooled connections at once; use a pool_size of 2 or more')
+
+        self.pool.attach(ARCHIVE_SCHEMA, self.archive_path)
+        self._initialize_archive()
+        bounds = {'year': year, 'lower': f'{year:04d}-01-01', 'upper': f'{year + 1:04d}-01-01', 'batch_size': batch_size}
+
+        # Listed before any row moves, so readers include the archive from then on
+        with self.pool.write_connection() as conn:
+            conn.execute('INSERT OR IGNORE INTO transaction_archives (year) VALUES (:year)', bounds)
+
+        moved = 0
+        while True:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                # Writing first takes the hot database's write lock and only it: a
+                # BEGIN IMMEDIATE would lock the archive too, which the copy below needs
+                cursor.execute(
+                    'UPDATE transaction_archives SET archived_at = CURRENT_TIMESTAMP WHERE year = :year', bounds)
+                ids = [row[0] for row in cursor.execute(
+                    '''
+                    SELECT id FROM transactions
+                    WHERE date >= :lower
+                      AND date < :upper
+                    ORDER BY id
+                    LIMIT :batch_size
+                    ''',
+                    bounds
+                )]
+                if not ids:
+                    if moved:
+                        # Views cached while a batch was in both databases may count it twice
+                        cursor.execute('UPDATE data_version SET version = version + 1 WHERE id = 1')
+                    else:
+                        conn.rollback()
+                    return moved
+                batch = {**bounds, 'ids': json.dumps(ids)}
+
+                # Committed before the delete below, by a second connection
+                with self.pool.connection() as archive:
+                    self._copy_to_archive(archive.cursor(), batch)
+                moved += self._delete_archived(cursor, batch)
+
+    @staticmethod
+    def _copy_to_archive(cursor, batch: dict) -> None:
+        '''Copies the batch's rows into the archive and its search index'''
+        # Rows already there were copied by an interrupted run; unindex them before replacing
+        cursor.execute(
+            '''
+            INSERT INTO archive.transactions_fts (transactions_fts, rowid, description, notes, category)
+            SELECT 'delete', id, description, notes, category
+            FROM archive.transactions
+            WHERE id IN (SELECT value FROM json_each(:ids))
+            ''',
+            batch
+        )
+        cursor.execute(
+            '''
+            INSERT OR REPLACE INTO archive.transactions (id, amount_cents, date, description, category, notes)
+            SELECT id, amount_cents, date, description, category, notes
+            FROM main.transactions
+            WHERE id IN (SELECT value FROM json_each(:ids))
+            ''',
+            batch
+        )
+        cursor.execute(
+            '''
+            INSERT INTO archive.transactions_fts (rowid, description, notes, category)
+            SELECT id, description, notes, category
+            FROM archive.transactions
+            WHERE id IN (SELECT value FROM json_each(:ids))
+            ''',
+            batch
+        )
+
+    @staticmethod
+    def _delete_archived(cursor, batch: dict) -> int:
+        '''Deletes the batch's copied rows from the hot database, undoing what the delete triggers record; returns the rows'''
+        seq = cursor.execute('SELECT coalesce(max(seq), 0) FROM transaction_changes').fetchone()[0]
+        cursor.execute('DELETE FROM main.transactions WHERE id IN (SELECT value FROM json_each(:ids))', batch)
+        deleted = cursor.rowcount
+
+        # The rows still count towards the rollups and were not deleted as far as snapshot exports go
+        cursor.execute(
+            '''
+            UPDATE category_daily_totals
+            SET total_cents = total_cents + v.moved_cents,
+                transaction_count = transaction_count + v.moved_count
+            FROM (
+                SELECT date AS day, category, SUM(amount_cents) AS moved_cents, COUNT(*) AS moved_count
+                FROM archive.transactions
+                WHERE id IN (SELECT value FROM json_each(:ids))
+                GROUP BY date, category
+            ) v
+            WHERE category_daily_totals.day = v.day AND category_daily_totals.category = v.category
+            ''',
+            batch
+        )
+        cursor.execute(
+            '''
+            UPDATE category_monthly_totals
+            SET total_cents = total_cents + v.moved_cents,
+                transaction_count = transaction_count + v.moved_count
+            FROM (
+                SELECT substr(date, 1, 7) AS month, category, SUM(amount_cents) AS moved_cents,
+                       COUNT(*) AS moved_count
+                FROM archive.transactions
+                WHERE id IN (SELECT value FROM json_each(:ids))
+                GROUP BY substr(date, 1, 7), category
+            ) v
+            WHERE category_monthly_totals.month = v.month AND category_monthly_totals.category = v.category
+            ''',
+            batch
+        )
+        cursor.execute('DELETE FROM transaction_changes WHERE seq > ?', (seq,))
+        cursor.execute(
+            'UPDATE transaction_archives SET transaction_count = transaction_count + ? WHERE year = ?',
+            (deleted, batch['year'])
+        )
+        return deleted
+
+    def compact(self) -> None:
+        '''Merges the archive's search index and VACUUMs the archive and the hot database, emptying their WALs'''
+        with self.pool.connection() as conn:
+            schemas = self.partitions(conn)
+            if ARCHIVE_SCHEMA in schemas:
+                conn.execute("INSERT INTO archive.transactions_fts (transactions_fts) VALUES ('optimize')")
+                conn.commit()
+            for schema in schemas:
+                conn.execute(f'VACUUM {schema}')
+                conn.execute(f'PRAGMA {schema}.wal_checkpoint(TRUNCATE)')
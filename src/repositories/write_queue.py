@@ -0,0 +1,221 @@
+'''Single writer thread that batches commits from many callers.
+
+Request handlers submit write jobs instead of each taking the database write
+lock and committing on their own. The writer thread collects jobs until
+``max_batch`` are queued or the oldest has waited ``max_delay`` seconds, runs
+them in one BEGIN IMMEDIATE transaction and commits once, so a burst of
+writes costs one lock acquisition and one commit instead of one each.
+
+A job is either a ``func(cursor)`` or an ``Insert``. Every function runs
+inside its own SAVEPOINT: one that raises is rolled back alone and its caller
+gets the exception, the rest of the batch commits. Consecutive Inserts of the
+same statement are combined into multi-row INSERTs (one statement step per
+200 rows, rather than one per row with executemany, which also releases and
+retakes the GIL every row); if that fails they are retried one by one so that
+only the offending rows fail.
+
+Queued jobs are committed by ``flush`` and ``close``, and ``close`` also runs
+at interpreter exit, so a script that never closes its repository still
+writes everything it submitted.
+'''
+import atexit
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+try:
+    from repositories.connection_pool import SQLiteConnectionPool
+except ModuleNotFoundError:
+    from .connection_pool import SQLiteConnectionPool
+
+# Queued in place of a job to stop the writer thread
+_STOP = object()
+
+# Rows per multi-row INSERT, keeping bound parameters far below SQLite's limit
+ROWS_PER_STATEMENT = 200
+
+
+class Insert(NamedTuple):
+    '''Single-row INSERT job; its result is the new rowid.
+
+    sql must end with its ``VALUES (?, ...)`` group, which is repeated to
+    insert many rows at once. Rows inserted together get consecutive rowids
+    (the writer holds the write lock), so they must be assigned by SQLite.
+    '''
+    sql: str
+    params: tuple
+
+
+def _insert_key(item) -> str | None:
+    job = item[0]
+    return job.sql if isinstance(job, Insert) else None
+
+
+class SQLiteWriteQueue:
+    '''Runs submitted write jobs on one thread, committing them in batches.
+
+    ``before_commit(cursor, writes)``, if given, runs last in every batch's
+    transaction with the number of jobs that succeeded.
+    '''
+
+    def __init__(
+        self, pool: SQLiteConnectionPool, max_batch: int = 256, max_delay: float = 0.002,
+        before_commit=None
+    ):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.before_commit = before_commit
+
+        # SimpleQueue: callers in write-behind mode enqueue on every write, and its put is cheapest
+        self._jobs = queue.SimpleQueue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = {'jobs': 0, 'batches': 0, 'failed': 0}
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self._thread.start()
+        # The writer is a daemon thread, so commit what is queued before the interpreter kills it
+        atexit.register(self.close)
+
+    def submit(self, job) -> Future:
+        '''Queues a func(cursor) or Insert; the future resolves once its batch commits'''
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Write queue is closed')
+            self._jobs.put((job, future))
+        return future
+
+    def flush(self) -> None:
+        '''Blocks until every job submitted before the call has been committed (or failed)'''
+        # Jobs run in order, so an empty job committing means all earlier ones have
+        self.submit(None).result()
+
+    def _next_batch(self) -> tuple[list, bool]:
+        '''Blocks for one job, then collects more until the batch is full, max_delay passes or a flush'''
+        batch = []
+        job = self._jobs.get()
+        deadline = time.monotonic() + self.max_delay
+        while job is not _STOP:
+            batch.append(job)
+            if len(batch) >= self.max_batch or job[0] is None:
+                return batch, False
+            try:
+                job = self._jobs.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._commit(batch)
+
+    @staticmethod
+    def _run_job(cursor, job, future: Future, results: list) -> None:
+        '''Runs one job in a savepoint; a failure rolls back and fails this job only'''
+        cursor.execute('SAVEPOINT job')
+        try:
+            if isinstance(job, Insert):
+                cursor.execute(job.sql, job.params)
+                result = cursor.lastrowid
+            else:
+                result = job(cursor)
+        except Exception as e:  # noqa: BLE001 - any job error belongs to its caller, raised from the future
+            cursor.execute('ROLLBACK TO job')
+            cursor.execute('RELEASE job')
+            future.set_exception(e)
+            return
+        cursor.execute('RELEASE job')
+        results.append((future, result))
+
+    def _run_inserts(self, cursor, jobs: list, results: list) -> None:
+        '''Runs Inserts of one statement as multi-row INSERTs'''
+        if len(jobs) == 1:
+            self._run_job(cursor, *jobs[0], results)
+            return
+
+        sql = jobs[0][0].sql.rstrip()
+        values = sql[sql.rindex('('):]
+        inserted = []
+        cursor.execute('SAVEPOINT job')
+        try:
+            for start in range(0, len(jobs), ROWS_PER_STATEMENT):
+                chunk = jobs[start:start + ROWS_PER_STATEMENT]
+                cursor.execute(
+                    sql + (', ' + values) * (len(chunk) - 1),
+                    [value for job, _ in chunk for value in job.params]
+                )
+                # Rows are inserted in VALUES order, the last one being lastrowid
+                first = cursor.lastrowid - len(chunk) + 1
+                inserted.extend((future, first + i) for i, (_, future) in enumerate(chunk))
+        except (sqlite3.Error, OverflowError):
+            # A constraint or a value sqlite3 cannot bind; retry row by row to fail only its job
+            cursor.execute('ROLLBACK TO job')
+            cursor.execute('RELEASE job')
+            for job, future in jobs:
+                self._run_job(cursor, job, future, results)
+            return
+        cursor.execute('RELEASE job')
+        results.extend(inserted)
+
+    def _commit(self, batch: list) -> None:
+        results = []
+        try:
+            with self.pool.write_connection() as conn:
+                cursor = conn.cursor()
+                live = [(job, future) for job, future in batch if future.set_running_or_notify_cancel()]
+                flushes = 0
+                for sql, group in itertools.groupby(live, key=_insert_key):
+                    if sql is not None:
+                        self._run_inserts(cursor, list(group), results)
+                        continue
+                    for job, future in group:
+                        if job is None:
+                            results.append((future, None))
+                            flushes += 1
+                        else:
+                            self._run_job(cursor, job, future, results)
+
+                if self.before_commit is not None:
+                    # results holds the jobs that succeeded
+                    self.before_commit(cursor, len(results) - flushes)
+        except Exception as e:  # noqa: BLE001 - forwarded to every waiting future, or they would hang
+            # Nothing in the batch was committed (or the write lock was never taken)
+            failed = 0
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+                    failed += 1
+        else:
+            for future, result in results:
+                future.set_result(result)
+            failed = 0
+
+        with self._lock:
+            self._stats['jobs'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['failed'] += failed
+
+    def stats(self) -> dict:
+        '''Jobs and batches committed so far, and jobs lost to a failed commit'''
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._jobs.qsize()
+        return stats
+
+    def close(self) -> None:
+        '''Stops accepting jobs and waits for the queued ones to commit'''
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._jobs.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
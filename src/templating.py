@@ -0,0 +1,69 @@
+'''Jinja2 templates and static files set up for serving rather than editing.
+
+Templates are compiled once, before the first request, with their bytecode
+kept in a cache directory so a restart skips the parse. They are not
+checked for changes on every render unless PYTRANSACTIONS_TEMPLATE_RELOAD
+is set, so restart the app (or set it) after editing one.
+
+Templates link static files through static_url(), which adds a hash of
+the file's content; such URLs never change content, so browsers may cache
+them for a year, and an edited file gets a new URL.
+'''
+import hashlib
+import os
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+# Cache-Control for static files requested with and without a content hash
+VERSIONED_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+UNVERSIONED_CACHE_CONTROL = 'no-cache'
+
+
+def template_reload() -> bool:
+    '''Whether PYTRANSACTIONS_TEMPLATE_RELOAD asks for edited templates to be picked up without a restart'''
+    return os.environ.get('PYTRANSACTIONS_TEMPLATE_RELOAD', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def static_url_for(directory: str, prefix: str = '/static', reload: bool = False):
+    '''Builds static_url(path): the URL of a file in directory with a hash of its content'''
+    def static_url(path: str) -> str:
+        with open(os.path.join(directory, path), 'rb') as f:
+            digest = hashlib.blake2s(f.read(), digest_size=8).hexdigest()
+        return f'{prefix}/{path}?v={digest}'
+
+    # Hashed once per file unless files may change under the running app
+    return static_url if reload else lru_cache(maxsize=None)(static_url)
+
+
+def create_templates(directory: str, static_directory: str) -> Jinja2Templates:
+    reload = template_reload()
+    env = Environment(
+        loader=FileSystemLoader(directory),
+        autoescape=True,
+        auto_reload=reload,
+        bytecode_cache=FileSystemBytecodeCache()
+    )
+    env.globals['static_url'] = static_url_for(static_directory, reload=reload)
+    return Jinja2Templates(env=env)
+
+
+def precompile(templates: Jinja2Templates) -> int:
+    '''Compiles every template into the environment's cache; returns how many'''
+    names = templates.env.list_templates(extensions=['html'])
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
+
+
+class CachedStaticFiles(StaticFiles):
+    '''StaticFiles adding Cache-Control: a year for content-hashed URLs, revalidation for the rest'''
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        versioned = 'v' in parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        response.headers['Cache-Control'] = VERSIONED_CACHE_CONTROL if versioned else UNVERSIONED_CACHE_CONTROL
+        return response
@@ -0,0 +1,66 @@
+'''Archiving a closed year moves its rows to the archive database without changing what reads return.'''
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from src.domain import Category, Transaction
+from src.repositories import CachedTransactionRepository, SQLiteTransactionRepository
+
+YEAR = date.today().year
+
+
+def reads(repo) -> dict:
+    return {
+        'all': sorted(repo.read_all_transactions(), key=lambda t: t.transaction_id),
+        'archived_year': repo.read_transactions_between(f'{YEAR - 2}-01-01', f'{YEAR - 2}-12-31'),
+        'across_years': repo.read_transactions_between(f'{YEAR - 2}-06-01', f'{YEAR - 1}-06-30'),
+        'category': repo.read_transactions_by_category('Groceries'),
+        'search': repo.search_transactions('market'),
+    }
+
+
+class ArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'transactions.db')
+        repo = SQLiteTransactionRepository(self.db_path)
+        repo.create_category(Category(None, 'Groceries', 400.0, None))
+        repo.create_transactions(
+            Transaction(None, -1.25 * (i + 1), f'{YEAR - 2 + i % 3}-{i % 12 + 1:02d}-15', f'Market {i}', 'Groceries', None)
+            for i in range(60)
+        )
+        repo.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertArchivesWithoutChangingReads(self, repo):
+        before = reads(repo)
+        self.assertEqual(repo.archive_year(YEAR - 2), 20)
+        repo.compact()
+        self.assertEqual(reads(repo), before)
+        self.assertEqual(len(repo.read_transactions_between(f'{YEAR - 2}-01-01', f'{YEAR}-12-31')), 60)
+        with repo.pool.connection() as conn:
+            self.assertEqual(conn.execute('SELECT count(*) FROM main.transactions').fetchone()[0], 40)
+
+    def test_sqlite(self):
+        repo = SQLiteTransactionRepository(self.db_path)
+        try:
+            self.assertArchivesWithoutChangingReads(repo)
+            self.assertTrue(os.path.exists(repo.archive_path))
+        finally:
+            repo.close()
+
+    def test_cached(self):
+        repo = CachedTransactionRepository(self.db_path)
+        try:
+            self.assertArchivesWithoutChangingReads(repo)
+            # Reads served by the reloaded cache match the database fanning out to the archive
+            self.assertEqual(reads(repo)['archived_year'], reads(repo.backend)['archived_year'])
+        finally:
+            repo.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+'''A batch of corrections is applied in one commit, or not at all.'''
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from src.application.application import Application
+from src.domain import Transaction
+from src.repositories import SQLiteTransactionRepository, TransactionRepository
+
+
+def correction(transaction_id: int, amount: float) -> dict:
+    return {
+        'transaction_id': transaction_id, 'amount': amount, 'date': '2025-01-02',
+        'description': 'Shop', 'category': 'Groceries', 'notes': None
+    }
+
+
+class BatchUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sqlite = SQLiteTransactionRepository(os.path.join(self.directory.name, 'transactions.db'))
+        self.repositories = [self.sqlite, TransactionRepository()]
+        for repo in self.repositories:
+            repo.create_transactions(
+                Transaction(None, -10.0, '2025-01-01', 'Shop', 'Groceries', None) for _ in range(3))
+
+    def tearDown(self):
+        self.sqlite.close()
+        self.directory.cleanup()
+
+    def test_unknown_id_rolls_back_the_batch(self):
+        for repo in self.repositories:
+            with self.subTest(repository=type(repo).__name__), redirect_stdout(StringIO()):
+                with self.assertRaisesRegex(ValueError, 'not found: 99'):
+                    Application(repo).correct_transactions([correction(1, -1.0), correction(99, -2.0)])
+                self.assertEqual([t.amount for t in repo.read_all_transactions()], [-10.0, -10.0, -10.0])
+
+    def test_batch_updates_every_row(self):
+        for repo in self.repositories:
+            with self.subTest(repository=type(repo).__name__), redirect_stdout(StringIO()):
+                updated = Application(repo).correct_transactions([correction(1, -1.0), correction(2, -2.0)])
+                self.assertEqual([t.amount for t in updated], [-1.0, -2.0])
+                amounts = {t.transaction_id: t.amount for t in repo.read_all_transactions()}
+                self.assertEqual(amounts, {1: -1.0, 2: -2.0, 3: -10.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+'''A database with REAL dollar amounts migrates to integer cents without losing a row or a cent.'''
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.repositories import SQLiteTransactionRepository
+from src.repositories.migrate import migrate, needs_migration
+
+# The schema before amounts were stored as cents
+LEGACY_SCHEMA = '''
+    CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, amount REAL NOT NULL, date DATE NOT NULL,
+        description TEXT NOT NULL, category TEXT NOT NULL, notes TEXT);
+    CREATE TABLE categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, description TEXT NOT NULL,
+        monthly_allocation REAL NOT NULL, notes TEXT);
+    CREATE TABLE recurring_expenses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, amount REAL NOT NULL, frequency TEXT NOT NULL,
+        category TEXT NOT NULL, description TEXT NOT NULL, notes TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+'''
+
+# Half cents (which SQLite's round() and to_cents round differently) and the date formats the importer reads
+TRANSACTIONS = [
+    (1.005, '2024-01-05'),
+    (-2.675, '01/06/2024'),
+    (-12.5, '2024-01-07 09:30:00'),
+    (100.0, '2024/02/01'),
+]
+
+
+class MigrateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'transactions.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(LEGACY_SCHEMA)
+        conn.execute("INSERT INTO categories VALUES (1, 'Groceries', 400.125, NULL)")
+        conn.execute("INSERT INTO recurring_expenses VALUES (1, 9.99, 'monthly', 'Groceries', 'Box', NULL, NULL)")
+        conn.executemany(
+            "INSERT INTO transactions (amount, date, description, category) VALUES (?, ?, 'Shop', 'Groceries')",
+            TRANSACTIONS)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        self.assertTrue(needs_migration(self.db_path))
+        self.assertEqual(migrate(self.db_path, batch_size=3), {'categories': 1, 'recurring_expenses': 1, 'transactions': 4})
+        self.assertFalse(needs_migration(self.db_path))
+        self.assertTrue(os.path.exists(self.db_path + '.real-amounts.bak'))
+        self.assertFalse(os.path.exists(self.db_path + '.migrating'))
+
+        repo = SQLiteTransactionRepository(self.db_path)
+        try:
+            transactions = sorted(repo.read_all_transactions(), key=lambda t: t.transaction_id)
+            self.assertEqual([t.amount for t in transactions], [1.01, -2.68, -12.5, 100.0])
+            self.assertEqual([t.date for t in transactions], ['2024-01-05', '2024-01-06', '2024-01-07', '2024-02-01'])
+            self.assertEqual(repo.read_all_categories()[0].monthly_allocation, 400.13)
+            self.assertEqual(repo.read_all_recurring_expenses()[0].amount, 9.99)
+        finally:
+            repo.close()
+
+    def test_unconvertible_row_stops_the_migration(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO transactions (amount, date, description, category) VALUES (1, 'someday', 'x', 'y')")
+        conn.commit()
+        conn.close()
+        with self.assertRaisesRegex(ValueError, 'transactions id 5'):
+            migrate(self.db_path)
+        # The original is left in place, still to be migrated
+        self.assertTrue(needs_migration(self.db_path))
+        self.assertFalse(os.path.exists(self.db_path + '.real-amounts.bak'))
+
+
+if __name__ == '__main__':
+    unittest.main()
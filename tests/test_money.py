@@ -0,0 +1,43 @@
+'''Amounts convert between float dollars and whole cents, rounding half cents away from zero.'''
+import unittest
+from decimal import Decimal
+
+from src.domain.money import from_cents, to_cents
+
+
+class MoneyTest(unittest.TestCase):
+    def test_rounds_half_cents_away_from_zero(self):
+        # Binary floats sit just below these half cents; round(amount * 100) gives 100 and 267
+        self.assertEqual(to_cents(1.005), 101)
+        self.assertEqual(to_cents(2.675), 268)
+        self.assertEqual(to_cents(-1.005), -101)
+        self.assertEqual(to_cents('0.125'), 13)
+
+    def test_whole_cents(self):
+        self.assertEqual(to_cents(12.34), 1234)
+        self.assertEqual(to_cents(-0.1), -10)
+        self.assertEqual(to_cents(7), 700)
+        self.assertEqual(to_cents(' 19.99 '), 1999)
+        self.assertEqual(to_cents(Decimal('1e15')), 10**17)
+
+    def test_exact_rejects_fractions_of_a_cent(self):
+        self.assertEqual(to_cents('1.10', exact=True), 110)
+        with self.assertRaisesRegex(ValueError, 'fraction of a cent'):
+            to_cents('1.005', exact=True)
+
+    def test_rejects_what_is_not_an_amount(self):
+        for amount in ('lots', '', float('nan'), float('inf'), 'Infinity'):
+            with self.subTest(amount=amount), self.assertRaises(ValueError):
+                to_cents(amount)
+        with self.assertRaises(TypeError):
+            to_cents(True)
+
+    def test_from_cents(self):
+        self.assertEqual(from_cents(101), 1.01)
+        self.assertEqual(from_cents(-268), -2.68)
+        for amount in (0.01, 19.99, -1234.56):
+            self.assertEqual(from_cents(to_cents(amount)), amount)
+
+
+if __name__ == '__main__':
+    unittest.main()
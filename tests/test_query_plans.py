@@ -0,0 +1,102 @@
+'''The date range and paging queries search idx_transactions_date rather than scanning transactions.
+
+Each test records the SQL a repository method runs and checks SQLite's
+EXPLAIN QUERY PLAN for it, so a rewrite that wraps the date column in a
+function (or otherwise stops the index being used) fails here.
+
+    python -m pytest tests
+'''
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from src.domain import Category, Transaction
+from src.repositories import SQLiteTransactionRepository
+
+DAYS = 800
+
+# SCAN of the table itself rather than of one of its indexes
+TABLE_SCAN = r'SCAN [\w.]*transactions(?! USING)'
+
+
+def query_plans(repo: SQLiteTransactionRepository, read) -> list[str]:
+    '''EXPLAIN QUERY PLAN details of every transactions query read() runs'''
+    statements = []
+    # pool_size=1: every query runs on this one connection
+    with repo.pool.connection() as conn:
+        conn.set_trace_callback(statements.append)
+    try:
+        read()
+    finally:
+        with repo.pool.connection() as conn:
+            conn.set_trace_callback(None)
+
+    plans = []
+    with repo.pool.connection() as conn:
+        for sql in statements:
+            if 'transactions\n' in sql or 'transactions ' in sql:
+                plans.append(' / '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)))
+    return plans
+
+
+class QueryPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'transactions.db')
+        self.repo = SQLiteTransactionRepository(self.db_path, pool_size=1)
+        self.repo.create_category(Category(None, 'Groceries', 400.0, None))
+        today = date.today()
+        self.repo.create_transactions(
+            Transaction(None, -12.5, (today - timedelta(days=i % DAYS)).isoformat(), f'Shop {i}', 'Groceries', None)
+            for i in range(4 * DAYS)
+        )
+
+    def tearDown(self):
+        self.repo.close()
+        self.directory.cleanup()
+
+    def assertSearchesIndex(self, read, index: str = 'idx_transactions_date'):
+        plans = query_plans(self.repo, read)
+        self.assertTrue(plans, 'no query on transactions was run')
+        for plan in plans:
+            self.assertIn(f'INDEX {index}', plan)
+            # Walking the index in order (SCAN ... USING INDEX, stopped by a LIMIT) is fine; the table is not
+            self.assertNotRegex(plan, TABLE_SCAN)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_last_seven_days(self):
+        self.assertSearchesIndex(self.repo.read_last_seven_days)
+
+    def test_current_month(self):
+        self.assertSearchesIndex(self.repo.read_current_month_transactions)
+
+    def test_between(self):
+        self.assertSearchesIndex(lambda: self.repo.read_transactions_between('2024-01-01', '2024-03-31'))
+
+    def test_page_by_date(self):
+        self.assertSearchesIndex(lambda: self.repo.read_transactions_page_by_date(50))
+        page = self.repo.read_transactions_page_by_date(50)
+        self.assertSearchesIndex(
+            lambda: self.repo.read_transactions_page_by_date(50, page[-1].date, page[-1].transaction_id))
+
+    def test_category(self):
+        self.assertSearchesIndex(
+            lambda: self.repo.read_transactions_by_category('Groceries'), 'idx_transactions_category_date')
+
+    def test_between_with_archive(self):
+        # Both the hot and the archive arm of the UNION ALL search their own index
+        archiver = SQLiteTransactionRepository(self.db_path)  # archiving needs two connections
+        try:
+            self.assertGreater(archiver.archive_year(date.today().year - 2), 0)
+        finally:
+            archiver.close()
+        plans = query_plans(self.repo, lambda: self.repo.read_transactions_between(
+            date.today() - timedelta(days=DAYS), date.today()))
+        self.assertEqual(len(plans), 1)
+        self.assertEqual(plans[0].count('INDEX idx_transactions_date'), 2)
+        self.assertNotRegex(plans[0], TABLE_SCAN)
+
+
+if __name__ == '__main__':
+    unittest.main()
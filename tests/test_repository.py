@@ -0,0 +1,48 @@
+'''The in-memory repository keeps its indexes consistent when an update is rejected.'''
+import unittest
+
+from src.domain import Transaction
+from src.repositories import TransactionRepository
+
+
+class UpdateTransactionTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = TransactionRepository()
+        for day in ('2025-01-01', '2025-01-02', '2025-01-03'):
+            self.repo.create_transaction(Transaction(None, -10.0, day, 'Shop', 'Groceries', None))
+
+    def assertUnchanged(self):
+        self.assertEqual([t.amount for t in self.repo.read_all_transactions()], [-10.0, -10.0, -10.0])
+        self.assertEqual(len(self.repo.read_transactions_by_category('Groceries')), 3)
+        self.assertEqual(len(self.repo.read_transactions_between('2025-01-01', '2025-01-31')), 3)
+
+    def test_bad_date_keeps_the_row(self):
+        with self.assertRaises(ValueError):
+            self.repo.update_transaction(Transaction(2, -5.0, 'garbage', 'Shop', 'Groceries', None))
+        self.assertEqual(self.repo.read_transaction_by_id(2).date, '2025-01-02')
+        self.assertUnchanged()
+
+    def test_bad_amount_keeps_the_row(self):
+        with self.assertRaises(ValueError):
+            self.repo.update_transaction(Transaction(2, 'lots', '2025-01-02', 'Shop', 'Groceries', None))
+        self.assertUnchanged()
+
+    def test_batch_is_all_or_nothing(self):
+        with self.assertRaises(ValueError):
+            self.repo.update_transactions([
+                Transaction(1, -1.0, '2025-01-01', 'Shop', 'Groceries', None),
+                Transaction(2, -2.0, 'garbage', 'Shop', 'Groceries', None),
+            ])
+        self.assertUnchanged()
+
+    def test_batch_normalises_and_skips_unknown_ids(self):
+        updated = self.repo.update_transactions([
+            Transaction(1, -1.005, '2025-01-05T09:30:00', 'Shop', 'Dining', None),
+            Transaction(99, -2.0, '2025-01-01', 'Shop', 'Groceries', None),
+        ])
+        self.assertEqual(updated, [Transaction(1, -1.01, '2025-01-05', 'Shop', 'Dining', None)])
+        self.assertEqual(len(self.repo.read_transactions_by_category('Groceries')), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
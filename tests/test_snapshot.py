@@ -0,0 +1,58 @@
+'''Budget analytics over an exported snapshot match those over the database it was exported from.'''
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from io import StringIO
+
+from src.application.application import Application
+from src.domain import Category, Transaction
+from src.repositories import SQLiteTransactionRepository
+
+try:
+    from src.repositories.snapshot import export_snapshot
+except ModuleNotFoundError:
+    export_snapshot = None
+
+AS_OF = date.today()
+
+
+@unittest.skipIf(export_snapshot is None, 'needs pyarrow')
+class SnapshotAnalyticsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.directory.name, 'snapshot')
+        self.repo = SQLiteTransactionRepository(os.path.join(self.directory.name, 'transactions.db'))
+        self.repo.create_category(Category(None, 'Groceries', 400.0, None))
+        self.repo.create_category(Category(None, 'Dining', 150.0, None))
+        self.repo.create_transactions(
+            Transaction(None, -1.25 * (i % 40 + 1), (AS_OF - timedelta(days=i)).isoformat(), f'Shop {i}',
+                        ('Groceries', 'Dining', 'Income')[i % 3], None)
+            for i in range(500)
+        )
+        export_snapshot(self.repo, self.snapshot)
+
+    def tearDown(self):
+        self.repo.close()
+        self.directory.cleanup()
+
+    def test_forecast_matches_the_database(self):
+        with redirect_stdout(StringIO()):
+            live = Application(self.repo).forecast_budget(AS_OF)
+            offline = Application(self.repo, snapshot=self.snapshot).forecast_budget(AS_OF)
+        self.assertEqual(offline, live)
+        self.assertEqual({row['category'] for row in offline}, {'Groceries', 'Dining'})
+
+    def test_new_export_refreshes_the_forecast(self):
+        app = Application(self.repo, snapshot=self.snapshot)
+        before = app.forecast_category('Dining', AS_OF)
+        self.repo.create_transaction(Transaction(None, -99.0, AS_OF.isoformat(), 'Dinner', 'Dining', None))
+        # Served from the snapshot until the next export
+        self.assertEqual(app.forecast_category('Dining', AS_OF), before)
+        export_snapshot(self.repo, self.snapshot)
+        self.assertEqual(app.forecast_category('Dining', AS_OF)['month_to_date'], before['month_to_date'] + 99.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
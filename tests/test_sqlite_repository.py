@@ -0,0 +1,85 @@
+'''Integrity checks and write paths of the SQLite repository.'''
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.domain import Transaction
+from src.repositories import SQLiteTransactionRepository, TransactionRepository
+
+
+def transaction(amount: float = -10.0, day: str = '2025-01-01', description: str = 'Shop') -> Transaction:
+    return Transaction(None, amount, day, description, 'Groceries', None)
+
+
+class SQLiteRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'transactions.db')
+        self.repo = SQLiteTransactionRepository(self.db_path)
+
+    def tearDown(self):
+        self.repo.close()
+        self.directory.cleanup()
+
+    def test_date_check_constraint(self):
+        # Rows written around the repository cannot hold anything but YYYY-MM-DD either
+        for day in ('01/02/2025', '2025-01-02 09:30:00', '2025-1-2'):
+            with self.subTest(day=day), self.repo.pool.connection() as conn:
+                with self.assertRaises(sqlite3.IntegrityError):
+                    conn.execute(
+                        "INSERT INTO transactions (amount_cents, date, description, category) VALUES (1, ?, 'x', 'y')",
+                        (day,))
+                conn.rollback()
+        with self.repo.pool.connection() as conn, self.assertRaises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO transactions (amount_cents, date, description, category) "
+                         "VALUES (1.5, '2025-01-02', 'x', 'y')")
+        self.assertEqual(self.repo.read_all_transactions(), [])
+
+    def test_dates_and_amounts_are_normalised(self):
+        self.repo.create_transaction(transaction(-1.005, '2025-01-02T09:30:00'))
+        self.assertEqual(self.repo.read_all_transactions(), [Transaction(1, -1.01, '2025-01-02', 'Shop', 'Groceries', None)])
+
+    def test_write_behind_fails_only_the_bad_insert(self):
+        repo = SQLiteTransactionRepository(
+            os.path.join(self.directory.name, 'queued.db'), write_behind=True, flush_interval=0.5)
+        try:
+            # Queued together, so they reach the writer as one multi-row INSERT
+            futures = [repo.create_transaction(transaction(amount)) for amount in (-1.0, 1e30, -3.0)]
+            self.assertEqual(futures[0].result(), 1)
+            with self.assertRaises(OverflowError):
+                futures[1].result()
+            self.assertEqual(futures[2].result(), 2)
+            self.assertEqual([t.amount for t in repo.read_all_transactions()], [-1.0, -3.0])
+        finally:
+            repo.close()
+
+    def test_split_parts_must_add_up(self):
+        for repo in (self.repo, TransactionRepository()):
+            with self.subTest(repository=type(repo).__name__):
+                repo.create_transaction(transaction(-30.0))
+                with self.assertRaisesRegex(ValueError, 'add up to -29.99'):
+                    repo.split_transaction(1, [transaction(-20.0), transaction(-9.99)])
+                self.assertEqual([t.amount for t in repo.read_all_transactions()], [-30.0])
+
+                parts = repo.split_transaction(1, [transaction(-20.0), transaction(-9.995)])
+                self.assertEqual([(t.transaction_id, t.amount) for t in parts], [(1, -20.0), (2, -10.0)])
+                self.assertEqual(sorted(t.amount for t in repo.read_all_transactions()), [-20.0, -10.0])
+
+    def test_search_sees_every_write(self):
+        # Rows are queued for the search index and indexed when their write commits
+        self.repo.create_transaction(transaction(description='Farmers market'))
+        self.repo.create_transactions([transaction(description='Corner bakery'), transaction(description='Market hall')])
+        self.assertEqual(sorted(t.transaction_id for t in self.repo.search_transactions('market')), [1, 3])
+
+        self.repo.update_transaction(Transaction(1, -10.0, '2025-01-01', 'Hardware store', 'Groceries', None))
+        self.assertEqual([t.transaction_id for t in self.repo.search_transactions('market')], [3])
+        self.assertEqual([t.transaction_id for t in self.repo.search_transactions('hardw')], [1])
+
+        self.repo.update_transactions([Transaction(2, -5.0, '2025-01-01', 'Corner market', 'Groceries', None)])
+        self.assertEqual(sorted(t.transaction_id for t in self.repo.search_transactions('market')), [2, 3])
+        self.assertEqual(self.repo.search_transactions('bakery'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()